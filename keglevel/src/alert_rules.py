@@ -0,0 +1,282 @@
+# keglevel app
+#
+# alert_rules.py
+import json
+import operator
+import os
+import threading
+import time
+
+from settings_writer import write_json_atomic
+
+ALERT_STATE_FILE = "alert_state.json"
+ALERT_STATE_VERSION = 1
+
+# --- METRICS ---
+# Producers call AlertRuleEngine.report(metric, key, value) when a value changes.
+METRIC_TAP_REMAINING_LITERS = "tap_remaining_liters"  # key: tap index, value: liters
+METRIC_KEGERATOR_TEMP_F = "kegerator_temp_f"          # key: KEGERATOR_KEY, value: F
+KEGERATOR_KEY = "kegerator"
+
+TEMP_ALERT_COOLDOWN_SECONDS = 2 * 3600
+ALERT_SEVERITIES = ("critical", "normal")
+# Re-check held-back alerts at least this often
+MAX_EVALUATION_INTERVAL_SECONDS = 3600
+
+
+def build_alert_rules(cond_notif_settings):
+    """
+    The rules for the Conditional Notification settings. A rule is a plain dict:
+
+        id               - stable name; the rule's state is stored under it
+        metric / action  - what it watches, and the action registered for it
+        comparator       - "<", "<=", ">", ">=" against threshold, or "outside" [low, high]
+        hysteresis       - how far back past the threshold a value must go to re-arm the rule
+        cooldown_seconds - minimum time between two firings
+        repeat           - keep firing every cooldown while the condition holds (else once per excursion)
+        severity         - "critical" alerts bypass the alert digest and are sent at once;
+                           "normal" ones wait out the digest window and are merged
+    """
+    if cond_notif_settings.get('notification_type', 'None') == 'None':
+        return []
+
+    rules = []
+    threshold_liters = cond_notif_settings.get('threshold_liters')
+    if threshold_liters is not None:
+        rules.append({
+            "id": "low_volume", "metric": METRIC_TAP_REMAINING_LITERS, "action": "low_volume",
+            "comparator": "<=", "threshold": threshold_liters,
+            # Re-arms once the keg is back above 125% of the threshold (i.e. refilled)
+            "hysteresis": threshold_liters * 0.25,
+            "cooldown_seconds": 0, "repeat": False, "severity": "normal",
+        })
+
+    low_temp_f = cond_notif_settings.get('low_temp_f')
+    high_temp_f = cond_notif_settings.get('high_temp_f')
+    if low_temp_f is not None and high_temp_f is not None:
+        # A warm (or freezing) kegerator spoils beer, so by default this is never held back
+        # for a digest; 'normal' lets it go out merged with the low-volume alerts
+        temp_severity = cond_notif_settings.get('temp_alert_severity', "critical")
+        if temp_severity not in ALERT_SEVERITIES:
+            temp_severity = "critical"
+        rules.append({
+            "id": "temperature_range", "metric": METRIC_KEGERATOR_TEMP_F, "action": "temperature",
+            "comparator": "outside", "threshold": [low_temp_f, high_temp_f],
+            "hysteresis": 0.0,
+            "cooldown_seconds": TEMP_ALERT_COOLDOWN_SECONDS, "repeat": True, "severity": temp_severity,
+        })
+    return rules
+
+
+_COMPARATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+def _compile_condition(comparator, threshold, hysteresis):
+    """Returns (is_triggered(value), is_cleared(value)) for a rule's comparator."""
+    if comparator in ("<", "<="):
+        compare = _COMPARATORS[comparator]
+        return (lambda v: compare(v, threshold)), (lambda v: v > threshold + hysteresis)
+    if comparator in (">", ">="):
+        compare = _COMPARATORS[comparator]
+        return (lambda v: compare(v, threshold)), (lambda v: v < threshold - hysteresis)
+    if comparator == "outside":
+        low, high = threshold
+        return (lambda v: v < low or v > high), (lambda v: low + hysteresis <= v <= high - hysteresis)
+    raise ValueError(f"Unknown alert comparator '{comparator}'")
+
+
+class CompiledRule:
+    """A rule dict compiled into condition functions, with its per-key state {key: {"active", "last_fired"}}."""
+
+    def __init__(self, rule, state=None):
+        self.rule = rule
+        self.id = rule['id']
+        self.metric = rule['metric']
+        self.action = rule['action']
+        self.cooldown_seconds = float(rule.get('cooldown_seconds', 0))
+        self.repeat = bool(rule.get('repeat', False))
+        self.is_triggered, self.is_cleared = _compile_condition(
+            rule['comparator'], rule['threshold'], float(rule.get('hysteresis', 0.0))
+        )
+        self.state = state if state is not None else {}
+
+    def evaluate(self, key, value, now):
+        """Returns "fire" when the action should run, "clear" when the rule re-arms, else None."""
+        state = self.state.get(str(key))
+        active = state['active'] if state else False
+        last_fired = state['last_fired'] if state else 0.0
+
+        if active and self.is_cleared(value):
+            return "clear"
+        if self.is_triggered(value) and (self.repeat or not active) and now - last_fired >= self.cooldown_seconds:
+            return "fire"
+        return None
+
+    def record(self, key, event, now):
+        state = self.state.setdefault(str(key), {"active": False, "last_fired": 0.0})
+        if event == "fire":
+            state['active'] = True
+            state['last_fired'] = now
+        elif event == "clear":
+            state['active'] = False
+
+    def get_due_time(self, key, value):
+        """When a firing held back by the cooldown becomes due, or None."""
+        if not self.cooldown_seconds or not self.is_triggered(value):
+            return None
+        state = self.state.get(str(key))
+        if state is None or (state['active'] and not self.repeat):
+            return None
+        return state['last_fired'] + self.cooldown_seconds
+
+
+class AlertRuleEngine:
+    """
+    Evaluates alert rules when the metrics they watch change.
+
+    report() is called by the producers (SensorLogic for tap volumes, TemperatureLogic
+    for the kegerator temperature). It drops unchanged values, otherwise stores the
+    value and wakes the engine's thread; producers never evaluate or send anything.
+    The thread evaluates only the rules indexed under the changed metric, so more
+    rules add no cost to the sensor loop. It also wakes when a cooldown expires
+    (repeating rules). Fired/cleared state lives in alert_state.json.
+
+    Actions are registered by name: callback(rule, key, value) returns True once the
+    alert was sent (queued); only then is the firing recorded.
+    """
+
+    def __init__(self, state_path):
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._running = False
+        self._thread = None
+
+        self._actions = {}
+        self._rules_by_metric = {}
+        self._values = {}    # (metric, key) -> latest value
+        self._changed = set()  # (metric, key) not evaluated since it changed
+        self._state, self.state_loaded = self._load_state()
+
+    # --- STATE ---
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}, False
+        try:
+            with open(self.state_path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == ALERT_STATE_VERSION and isinstance(data.get('rules'), dict):
+                return data['rules'], True
+            print("AlertRuleEngine: Unknown alert state format. Starting fresh.")
+        except Exception as e:
+            print(f"AlertRuleEngine: Could not read {self.state_path}: {e}. Starting fresh.")
+        return {}, False
+
+    def _save_state(self):
+        try:
+            write_json_atomic(self.state_path, {"version": ALERT_STATE_VERSION, "rules": self._state}, indent=None)
+        except OSError as e:
+            print(f"AlertRuleEngine: Could not save alert state: {e}")
+
+    def seed_state(self, rule_id, key, active, last_fired):
+        """Sets a rule's state for 'key' (used to migrate older bookkeeping)."""
+        with self._lock:
+            self._state.setdefault(rule_id, {})[str(key)] = {"active": bool(active), "last_fired": float(last_fired)}
+            self._save_state()
+            self.state_loaded = True
+
+    # --- CONFIGURATION ---
+    def register_action(self, name, callback):
+        self._actions[name] = callback
+
+    def set_rules(self, rules):
+        """Compiles 'rules' (see build_alert_rules) and re-evaluates every known value against them."""
+        rules_by_metric = {}
+        with self._lock:
+            for rule in rules:
+                compiled = CompiledRule(rule, self._state.setdefault(rule['id'], {}))
+                rules_by_metric.setdefault(compiled.metric, []).append(compiled)
+            self._rules_by_metric = rules_by_metric
+            self._changed.update(self._values.keys())
+        self._wake_event.set()
+
+    # --- PRODUCERS ---
+    def report(self, metric, key, value):
+        if value is None:
+            return
+        with self._lock:
+            if self._values.get((metric, key)) == value:
+                return
+            self._values[(metric, key)] = value
+            self._changed.add((metric, key))
+        self._wake_event.set()
+
+    # --- WORKER ---
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._wake_event.clear()
+        self._thread = threading.Thread(target=self._engine_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._wake_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+
+    def _engine_loop(self):
+        print("AlertRuleEngine: Engine loop started.")
+        wait_time = None
+        while self._running:
+            self._wake_event.wait(wait_time)
+            self._wake_event.clear()
+            if not self._running:
+                break
+            try:
+                wait_time = self._evaluate_pending(time.time())
+            except Exception as e:
+                print(f"AlertRuleEngine: Error evaluating alert rules: {e}")
+                wait_time = MAX_EVALUATION_INTERVAL_SECONDS
+        print("AlertRuleEngine: Engine loop stopped.")
+
+    def _evaluate_pending(self, now):
+        """Evaluates changed values and expired cooldowns. Returns the seconds until the next cooldown expiry."""
+        with self._lock:
+            pending = []
+            next_due = None
+            for (metric, key), value in self._values.items():
+                for rule in self._rules_by_metric.get(metric, ()):
+                    if (metric, key) in self._changed:
+                        pending.append((rule, key, value))
+                        continue
+                    due = rule.get_due_time(key, value)
+                    if due is not None and due <= now:
+                        pending.append((rule, key, value))
+            self._changed.clear()
+
+        for rule, key, value in pending:
+            event = rule.evaluate(key, value, now)
+            if event == "fire":
+                action = self._actions.get(rule.action)
+                if action is None or not action(rule.rule, key, value):
+                    continue
+            if event is not None:
+                print(f"AlertRuleEngine: Rule '{rule.id}' {'fired' if event == 'fire' else 're-armed'} for {key} ({value:.2f}).")
+                with self._lock:
+                    rule.record(key, event, now)
+                    self._save_state()
+
+        with self._lock:
+            for (metric, key), value in self._values.items():
+                for rule in self._rules_by_metric.get(metric, ()):
+                    due = rule.get_due_time(key, value)
+                    if due is not None and due > now and (next_due is None or due < next_due):
+                        next_due = due
+
+        if next_due is None:
+            return MAX_EVALUATION_INTERVAL_SECONDS
+        return min(max(1.0, next_due - now), MAX_EVALUATION_INTERVAL_SECONDS)
@@ -0,0 +1,215 @@
+# keglevel app
+#
+# asset_cache.py
+import os
+import re
+import math
+from collections import OrderedDict
+
+import tkinter as tk
+
+# Decoded images cost roughly width * height * 4 bytes inside Tk.
+BYTES_PER_PIXEL = 4
+
+# Images still shown by an open window are never evicted. Images whose windows
+# have closed are kept (LRU) only while they fit in this budget.
+IDLE_IMAGE_BUDGET_BYTES = 4 * 1024 * 1024
+
+# Subsampling is integer-only, so a slight overshoot would halve the image. Images up to
+# this much larger than max_size are returned full size (callers show them scrollable).
+SUBSAMPLE_MIN_RATIO = 1.25
+
+HELP_FILE_NAME = "help.md"
+SECTION_REGEX = re.compile(r'\[SECTION:\s*(.*?)\](.*?)(?=\[SECTION:|\Z)', re.S)
+LINK_SPLIT_REGEX = re.compile(r'(\[.*?\]\(.*?\))')
+LINK_REGEX = re.compile(r'\[(.*?)\]\((.*?)\)')
+BOLD_SPLIT_REGEX = re.compile(r'(\*\*.*?\*\*)')
+
+
+def parse_help_text(help_text):
+    """
+    Tokenizes help markdown into ready-to-insert segments.
+    Returns a list of (text, tags, link_url) tuples; link_url is None for plain text.
+    """
+    segments = []
+
+    def parse_line_content(line_str, base_tags=()):
+        for part in LINK_SPLIT_REGEX.split(line_str):
+            link_match = LINK_REGEX.match(part)
+            if link_match:
+                segments.append((link_match.group(1), base_tags, link_match.group(2)))
+                continue
+            for bold_part in BOLD_SPLIT_REGEX.split(part):
+                if bold_part.startswith("**") and bold_part.endswith("**"):
+                    segments.append((bold_part[2:-2], base_tags + ("bold",), None))
+                elif bold_part:
+                    segments.append((bold_part, base_tags, None))
+
+    for line in help_text.strip().splitlines():
+        line_stripped = line.strip()
+
+        if line_stripped.startswith("##") and line_stripped.endswith("##"):
+            segments.append((line_stripped[2:-2].strip() + "\n", ("heading",), None))
+        elif line_stripped.startswith("* "):
+            segments.append(("• ", ("bullet",), None))
+            parse_line_content(line_stripped[2:], base_tags=("bullet",))
+            segments.append(("\n", (), None))
+        elif not line_stripped:
+            segments.append(("\n", (), None))
+        else:
+            parse_line_content(line_stripped)
+            segments.append(("\n", (), None))
+
+    return segments
+
+
+class AssetCache:
+    """
+    Caches decoded GIF images and parsed help.md sections for the popups.
+
+    Images are keyed by (file name, subsample factor) so each scaled variant is
+    decoded once. Every image is pinned to the window ("owner") that asked for it;
+    release_owner() is called when that window closes, after which the image is
+    kept only while it fits in IDLE_IMAGE_BUDGET_BYTES.
+
+    Help sections are re-parsed only when help.md changes on disk.
+    """
+
+    def __init__(self, root, assets_dir, idle_budget_bytes=IDLE_IMAGE_BUDGET_BYTES):
+        self.root = root
+        self.assets_dir = assets_dir
+        self.idle_budget_bytes = idle_budget_bytes
+
+        # key -> {'image', 'bytes', 'signature', 'owners'}
+        self._images = OrderedDict()
+        self._idle_bytes = 0
+
+        self._help_signature = None
+        self._help_sections = {}
+        self._help_segments = {}
+
+    # --- IMAGES ---
+
+    def _get_signature(self, path):
+        try:
+            stat_result = os.stat(path)
+            return (stat_result.st_mtime_ns, stat_result.st_size)
+        except OSError:
+            return None
+
+    def get_image(self, file_name, owner, max_size=None):
+        """
+        Returns a tk.PhotoImage for assets/<file_name>, decoding it only on the first request.
+        If max_size=(width, height) is given and the image is more than SUBSAMPLE_MIN_RATIO
+        times larger, an integer-subsampled variant that fits is returned (and cached separately).
+        Raises the same exceptions as tk.PhotoImage (FileNotFoundError is raised for missing files).
+        """
+        path = os.path.join(self.assets_dir, file_name)
+        signature = self._get_signature(path)
+        if signature is None:
+            raise FileNotFoundError(path)
+
+        # The full-size image is the source for every scaled variant
+        base_entry = self._get_entry((file_name, 1), signature, owner, lambda: tk.PhotoImage(master=self.root, file=path))
+
+        factor = 1
+        if max_size:
+            base_image = base_entry['image']
+            ratio = max(base_image.width() / float(max_size[0]), base_image.height() / float(max_size[1]))
+            if ratio > SUBSAMPLE_MIN_RATIO:
+                factor = int(math.ceil(ratio))
+
+        if factor == 1:
+            return base_entry['image']
+
+        scaled_entry = self._get_entry((file_name, factor), signature, owner, lambda: base_entry['image'].subsample(factor, factor))
+        return scaled_entry['image']
+
+    def _get_entry(self, key, signature, owner, decode_func):
+        entry = self._images.get(key)
+        if entry is not None and entry['signature'] != signature:
+            # File changed on disk; drop the stale decode
+            self._remove_entry(key)
+            entry = None
+
+        if entry is None:
+            image = decode_func()
+            entry = {
+                'image': image,
+                'bytes': image.width() * image.height() * BYTES_PER_PIXEL,
+                'signature': signature,
+                'owners': set(),
+            }
+            self._images[key] = entry
+        elif not entry['owners']:
+            self._idle_bytes -= entry['bytes']
+
+        entry['owners'].add(owner)
+        self._images.move_to_end(key)
+        return entry
+
+    def _remove_entry(self, key):
+        entry = self._images.pop(key, None)
+        if entry is not None and not entry['owners']:
+            self._idle_bytes -= entry['bytes']
+
+    def release_owner(self, owner):
+        """Unpins every image held by 'owner' (a closed window) and trims idle images to budget."""
+        for entry in self._images.values():
+            if owner in entry['owners']:
+                entry['owners'].discard(owner)
+                if not entry['owners']:
+                    self._idle_bytes += entry['bytes']
+        self._evict_idle()
+
+    def _evict_idle(self):
+        # Oldest idle images go first; pinned images are never evicted
+        for key in list(self._images.keys()):
+            if self._idle_bytes <= self.idle_budget_bytes:
+                break
+            if not self._images[key]['owners']:
+                self._remove_entry(key)
+
+    def clear(self):
+        self._images.clear()
+        self._idle_bytes = 0
+        self._help_signature = None
+        self._help_sections = {}
+        self._help_segments = {}
+
+    # --- HELP ---
+
+    def _refresh_help_sections(self):
+        help_file_path = os.path.join(self.assets_dir, HELP_FILE_NAME)
+        signature = self._get_signature(help_file_path)
+        if signature is None:
+            raise FileNotFoundError(help_file_path)
+        if signature == self._help_signature:
+            return
+
+        with open(help_file_path, 'r', encoding='utf-8') as f:
+            full_help_text = f.read()
+
+        sections = {}
+        for name, body in SECTION_REGEX.findall(full_help_text):
+            sections.setdefault(name.strip(), body.strip()) # First occurrence wins, as with re.search
+        self._help_sections = sections
+        self._help_segments = {}
+        self._help_signature = signature
+
+    def get_help_section(self, section_name):
+        """Returns the raw text of a help.md section, or None if the section does not exist."""
+        self._refresh_help_sections()
+        return self._help_sections.get(section_name)
+
+    def get_help_segments(self, section_name):
+        """Returns the parsed segments for a section (see parse_help_text), or None if missing."""
+        self._refresh_help_sections()
+        segments = self._help_segments.get(section_name)
+        if segments is None:
+            help_text = self._help_sections.get(section_name)
+            if help_text is None:
+                return None
+            segments = parse_help_text(help_text)
+            self._help_segments[section_name] = segments
+        return segments
@@ -0,0 +1,312 @@
+# keglevel app
+#
+# beverage_search.py
+import bisect
+import difflib
+import hashlib
+import json
+import os
+import re
+import unicodedata
+
+from settings_writer import write_json_atomic
+
+SEARCH_INDEX_FILE = "search_index.json"
+SEARCH_INDEX_VERSION = 2
+
+# Asset files the cached index is built from (the strict style list used by the beverage editor)
+BJCP_SOURCES = ["bjcp_styles.json"]
+
+# A query word with no prefix match falls back to vocabulary words (sharing a trigram) whose
+# difflib ratio to it, or to their start of the same length, is at least this
+FUZZY_MIN_RATIO = 0.75
+FUZZY_MIN_TOKEN_LENGTH = 3
+DEFAULT_LIMIT = 50
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Style codes: "1A", "21B", "M1A", "C2"; "01A" is read as "1A"
+_CODE_RE = re.compile(r"^([A-Za-z]?)0*(\d+)([A-Za-z]?)$")
+# Sorts after every token character, for prefix ranges in the sorted vocabulary
+_PREFIX_END = "{"
+
+
+def tokenize(text):
+    """Lower-case ASCII words of 'text' ("Kölsch" -> ["kolsch"]; style codes lose leading zeros, "01A" -> "1a")."""
+    text = unicodedata.normalize('NFKD', str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [(parse_style_code(t)[0] or t).lower() for t in _TOKEN_RE.findall(text.lower())]
+
+
+def parse_style_code(code):
+    """Returns (normalized code, category) for a style code ("01A" -> ("1A", "1")), or (None, None)."""
+    match = _CODE_RE.match(str(code or "").strip())
+    if not match:
+        return None, None
+    prefix, number, letter = match.groups()
+    category = f"{prefix.upper()}{int(number)}"
+    return category + letter.upper(), category
+
+
+def _trigrams(token):
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TokenIndex:
+    """
+    Word index over a list of entries: a sorted vocabulary with postings (word ->
+    entry positions) for prefix lookup by bisection, and a trigram map (trigram ->
+    vocabulary positions) that narrows the words fuzzy lookup has to compare.
+    """
+
+    def __init__(self, vocabulary, postings, trigrams):
+        self.vocabulary = vocabulary
+        self.postings = postings
+        self.trigrams = trigrams
+
+    @classmethod
+    def build(cls, entry_tokens):
+        by_token = {}
+        for position, tokens in enumerate(entry_tokens):
+            for token in set(tokens):
+                by_token.setdefault(token, []).append(position)
+        vocabulary = sorted(by_token)
+        trigrams = {}
+        for vocab_position, token in enumerate(vocabulary):
+            for trigram in _trigrams(token):
+                trigrams.setdefault(trigram, []).append(vocab_position)
+        return cls(vocabulary, [by_token[t] for t in vocabulary], trigrams)
+
+    def to_json(self):
+        return {"vocabulary": self.vocabulary, "postings": self.postings, "trigrams": self.trigrams}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['vocabulary'], data['postings'], data['trigrams'])
+
+    def prefix_matches(self, token):
+        lo = bisect.bisect_left(self.vocabulary, token)
+        hi = bisect.bisect_left(self.vocabulary, token + _PREFIX_END, lo)
+        matches = set()
+        for vocab_position in range(lo, hi):
+            matches.update(self.postings[vocab_position])
+        return matches
+
+    def fuzzy_matches(self, token):
+        """Returns {entry position: best difflib ratio} for words close to 'token'."""
+        if len(token) < FUZZY_MIN_TOKEN_LENGTH:
+            return {}
+        candidates = set()
+        for trigram in _trigrams(token):
+            candidates.update(self.trigrams.get(trigram, ()))
+
+        matcher = difflib.SequenceMatcher(a=token)
+        matches = {}
+        for vocab_position in candidates:
+            word = self.vocabulary[vocab_position]
+            # Compare with the word's start too, so a half-typed misspelling ("kellr") still matches
+            ratio = 0.0
+            for candidate in {word, word[:len(token)]}:
+                matcher.set_seq2(candidate)
+                ratio = max(ratio, matcher.ratio())
+            if ratio >= FUZZY_MIN_RATIO:
+                for position in self.postings[vocab_position]:
+                    matches[position] = max(ratio, matches.get(position, 0.0))
+        return matches
+
+
+class BeverageSearchIndex:
+    """
+    Prefix, fuzzy and category search over the BJCP styles and the user's beverage
+    library, for as-you-type filtering.
+
+    The BJCP part comes from files that only change with an app update, so it is built
+    once and cached in search_index.json under a checksum of the source files; later
+    starts load the cache without re-tokenizing. The user's beverages are a few dozen
+    entries and are re-indexed in memory whenever set_beverages() sees a change.
+
+    Entries are dicts with 'kind' ("style" or "beverage") and 'label' (the
+    text shown in dropdowns); styles also carry code, name, impression, guide and
+    category, beverages their id and bjcp.
+    """
+
+    def __init__(self, assets_dir, cache_path):
+        self.assets_dir = assets_dir
+        self.cache_path = cache_path
+
+        self._static_entries, self._static_index = self._load_static()
+        self._styles = [e for e in self._static_entries if e['kind'] == "style"]
+        self._style_by_label = {e['label']: e for e in self._styles}
+
+        self._beverage_entries = []
+        self._beverage_index = _TokenIndex.build([])
+        self._beverage_signature = None
+
+    # --- BJCP PART (cached on disk) ---
+    def _get_source_checksum(self):
+        digest = hashlib.sha1(f"v{SEARCH_INDEX_VERSION}".encode('ascii'))
+        for file_name in BJCP_SOURCES:
+            digest.update(f"|{file_name}|".encode('utf-8'))
+            try:
+                with open(os.path.join(self.assets_dir, file_name), 'rb') as f:
+                    digest.update(f.read())
+            except OSError:
+                digest.update(b"<missing>")
+        return digest.hexdigest()
+
+    def _load_static(self):
+        checksum = self._get_source_checksum()
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('version') == SEARCH_INDEX_VERSION and cached.get('checksum') == checksum:
+                return cached['entries'], _TokenIndex.from_json(cached['index'])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"BeverageSearchIndex: Ignoring unreadable index cache: {e}")
+
+        entries = self._build_static_entries()
+        index = _TokenIndex.build([self._get_entry_tokens(e) for e in entries])
+        try:
+            write_json_atomic(self.cache_path, {"version": SEARCH_INDEX_VERSION, "checksum": checksum,
+                                                "entries": entries, "index": index.to_json()}, indent=None)
+            print(f"BeverageSearchIndex: Indexed {len(entries)} BJCP entries.")
+        except OSError as e:
+            print(f"BeverageSearchIndex: Could not save index cache: {e}")
+        return entries, index
+
+    def _build_static_entries(self):
+        entries = []
+        for file_name in BJCP_SOURCES:
+            try:
+                with open(os.path.join(self.assets_dir, file_name), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"BeverageSearchIndex: Could not load {file_name}: {e}")
+                continue
+
+            for style in data:
+                _, category = parse_style_code(style.get('code'))
+                entries.append({
+                    "kind": "style", "label": f"{style.get('code')} {style.get('name')}",
+                    "code": style.get('code'), "name": style.get('name'),
+                    "impression": style.get('impression', ''), "guide": style.get('guide', ''),
+                    "category": category,
+                })
+        return entries
+
+    def _get_entry_tokens(self, entry):
+        tokens = tokenize(entry['label'])
+        if entry.get('kind') == "beverage":
+            tokens += tokenize(entry.get('bjcp'))
+        code, _ = parse_style_code(entry.get('code'))
+        if code:
+            tokens.append(code.lower())
+        return tokens
+
+    # --- USER BEVERAGES (in memory) ---
+    def set_beverages(self, beverages):
+        """Re-indexes the user's beverage library if it changed since the last call."""
+        signature = tuple((b.get('id'), b.get('name'), b.get('bjcp')) for b in beverages)
+        if signature == self._beverage_signature:
+            return
+        self._beverage_signature = signature
+        self._beverage_entries = [
+            {"kind": "beverage", "label": b.get('name', ''), "id": b.get('id'), "bjcp": b.get('bjcp', ''),
+             "category": parse_style_code(str(b.get('bjcp', '')).partition(' ')[0])[1]}
+            for b in beverages if b.get('id')
+        ]
+        self._beverage_index = _TokenIndex.build([self._get_entry_tokens(e) for e in self._beverage_entries])
+
+    # --- LOOKUP ---
+    def get_styles(self):
+        """The strict BJCP style list (bjcp_styles.json order)."""
+        return self._styles
+
+    def get_style(self, label):
+        return self._style_by_label.get(label)
+
+    def by_category(self, category, kinds=None):
+        """Entries in a style category ("21", "M1", ...; leading zeros are ignored)."""
+        _, category = parse_style_code(category)
+        return [e for _, entries in self._get_parts(kinds) for e in entries
+                if e.get('category') == category and (kinds is None or e['kind'] in kinds)]
+
+    def _get_parts(self, kinds):
+        parts = []
+        if kinds is None or "style" in kinds:
+            parts.append((self._static_index, self._static_entries))
+        if kinds is None or "beverage" in kinds:
+            parts.append((self._beverage_index, self._beverage_entries))
+        return parts
+
+    def search(self, query, kinds=None, limit=DEFAULT_LIMIT):
+        """
+        Entries matching every word of 'query' by prefix; a word with no prefix match
+        is matched fuzzily instead. An exact style code ranks first, then prefix-only
+        matches in library order, then fuzzy ones by similarity. An empty query returns
+        all; limit=None returns every match.
+        """
+        tokens = tokenize(query)
+        code, _ = parse_style_code(query)
+        results = []
+        for index, entries in self._get_parts(kinds):
+            # position -> score (1.0 per prefix-matched word, times the ratio of each fuzzy one)
+            if not tokens:
+                scores, fuzzy = dict.fromkeys(range(len(entries)), 1.0), False
+            else:
+                scores, fuzzy = None, False
+                for token in tokens:
+                    token_scores = dict.fromkeys(index.prefix_matches(token), 1.0)
+                    if not token_scores:
+                        token_scores = index.fuzzy_matches(token)
+                        fuzzy = True
+                    if scores is None:
+                        scores = token_scores
+                    else:
+                        scores = {p: scores[p] * token_scores[p] for p in scores if p in token_scores}
+                    if not scores:
+                        break
+
+            for position, score in (scores or {}).items():
+                entry = entries[position]
+                if kinds is not None and entry['kind'] not in kinds:
+                    continue
+                exact_code = code is not None and parse_style_code(entry.get('code'))[0] == code
+                results.append(((not exact_code, fuzzy, -score, position), entry))
+
+        results.sort(key=lambda r: r[0])
+        if limit is not None:
+            results = results[:limit]
+        return [entry for _, entry in results]
+
+    def resolve(self, text, kinds=None):
+        """
+        The entry that typed 'text' refers to: an exact label (ignoring case), an exact
+        style code, or the only search match. Returns None if it is ambiguous or matches
+        nothing.
+        """
+        text = str(text or "").strip()
+        matches = self.search(text, kinds=kinds, limit=None) if text else []
+        folded = text.casefold()
+        for entry in matches:
+            if entry['label'].casefold() == folded:
+                return entry
+        code, _ = parse_style_code(text)
+        if matches and code is not None and parse_style_code(matches[0].get('code'))[0] == code:
+            return matches[0]
+        return matches[0] if len(matches) == 1 else None
+
+
+def attach_combobox_filter(combobox, get_labels, all_labels):
+    """
+    As-you-type filtering for an editable ttk.Combobox: after each keystroke the
+    dropdown values become get_labels(typed text), or 'all_labels' when it is empty.
+    """
+    def on_key(event):
+        if event.keysym in ("Up", "Down", "Return", "KP_Enter", "Escape", "Tab"):
+            return
+        text = combobox.get().strip()
+        combobox['values'] = get_labels(text) if text else all_labels()
+    combobox.bind("<KeyRelease>", on_key, add="+")
@@ -0,0 +1,152 @@
+# keglevel app
+#
+# imap_idle.py
+import re
+import select
+import time
+
+# NOTE: imaplib is imported in connect(); most installs never enable STATUS requests.
+
+# Servers drop IDLE after 30 min at the latest (RFC 2177); renew well before
+IDLE_RENEW_SECONDS = 9 * 60
+# How long to wait for the server to answer IDLE / DONE
+IDLE_RESPONSE_TIMEOUT_SECONDS = 30
+# IDLE waits in slices of this length so stop requests are noticed quickly
+IDLE_STOP_CHECK_SECONDS = 1.0
+CONNECT_TIMEOUT_SECONDS = 30
+
+_NEW_MAIL_RE = re.compile(rb'^\* \d+ (EXISTS|RECENT)\b', re.IGNORECASE)
+
+
+class ImapIdleError(Exception):
+    """The IMAP session is unusable; close it and reconnect."""
+
+
+class ImapIdleClient:
+    """
+    One long-lived IMAP session on the inbox that waits for new mail with IDLE.
+
+    connect() logs in and selects the inbox once; idle() then blocks until the
+    server announces new mail (EXISTS/RECENT) or the timeout passes. The usual
+    imaplib commands stay available on .mail between idle() calls (search, store,
+    noop). imaplib has no IDLE support before Python 3.14, so the IDLE exchange is
+    done on the socket directly. Servers without IDLE report supports_idle False;
+    callers then poll on the same session instead of reconnecting per check.
+    """
+
+    def __init__(self, server, port, user, password, use_ssl=True):
+        self.server = server
+        self.port = int(port)
+        self.user = user
+        self.password = password
+        self.use_ssl = use_ssl
+        self.mail = None
+        self.supports_idle = False
+        self._buffer = b""
+        self._tag_counter = 0
+
+    def connect(self):
+        import imaplib
+        imap_class = imaplib.IMAP4_SSL if self.use_ssl else imaplib.IMAP4
+        self.mail = imap_class(self.server, self.port, timeout=CONNECT_TIMEOUT_SECONDS)
+        self.mail.login(self.user, self.password)
+        self.mail.select('inbox')
+        self.supports_idle = 'IDLE' in self.mail.capabilities
+        # The counts reported by SELECT are not new mail
+        self._pop_new_mail()
+        # The connect timeout must not apply while idling; idle() does its own waiting
+        self.mail.sock.settimeout(None)
+        self._buffer = b""
+
+    def close(self):
+        if self.mail is None:
+            return
+        try:
+            self.mail.logout()
+        except Exception:
+            try:
+                self.mail.shutdown()
+            except Exception:
+                pass
+        self.mail = None
+
+    def noop(self):
+        """
+        Keepalive; also raises if the server has dropped the connection. Returns True if
+        the server reported new mail since the last check (e.g. mail that arrived
+        between two IDLE cycles, which the next IDLE would not announce).
+        """
+        status, _ = self.mail.noop()
+        if status != 'OK':
+            raise ImapIdleError(f"NOOP failed: {status}")
+        return self._pop_new_mail()
+
+    def _pop_new_mail(self):
+        new_mail = False
+        for name in ('EXISTS', 'RECENT'):
+            _, data = self.mail.response(name)
+            if data and data[0] is not None:
+                new_mail = True
+        return new_mail
+
+    def _send_line(self, text):
+        self.mail.send(text.encode('ascii') + b"\r\n")
+
+    def _read_line(self, timeout):
+        """Returns the next response line (without CRLF), or None if nothing arrived within 'timeout'."""
+        deadline = time.monotonic() + timeout
+        sock = self.mail.sock
+        while b"\r\n" not in self._buffer:
+            # SSL may already hold decrypted bytes that select() cannot see
+            pending = sock.pending() if hasattr(sock, 'pending') else 0
+            if not pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                readable, _, _ = select.select([sock], [], [], remaining)
+                if not readable:
+                    return None
+            data = sock.recv(4096)
+            if not data:
+                raise ImapIdleError("Connection closed by server")
+            self._buffer += data
+        line, self._buffer = self._buffer.split(b"\r\n", 1)
+        return line
+
+    def idle(self, timeout=IDLE_RENEW_SECONDS, should_stop=None):
+        """
+        Waits in IDLE for up to 'timeout' seconds. Returns True if the server reported
+        new mail. 'should_stop' (a callable) ends the wait early when it returns True.
+        """
+        self._tag_counter += 1
+        tag = f"KLIDLE{self._tag_counter}"
+        self._send_line(f"{tag} IDLE")
+
+        line = self._read_line(IDLE_RESPONSE_TIMEOUT_SECONDS)
+        if line is None or not line.startswith(b"+"):
+            raise ImapIdleError(f"IDLE not accepted: {line!r}")
+
+        new_mail = False
+        deadline = time.monotonic() + timeout
+        while not new_mail:
+            if should_stop and should_stop():
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            line = self._read_line(min(remaining, IDLE_STOP_CHECK_SECONDS))
+            if line is not None and _NEW_MAIL_RE.match(line):
+                new_mail = True
+
+        self._send_line("DONE")
+        while True:
+            line = self._read_line(IDLE_RESPONSE_TIMEOUT_SECONDS)
+            if line is None:
+                raise ImapIdleError("No response to DONE")
+            if line.startswith(tag.encode('ascii') + b" "):
+                if not line[len(tag) + 1:].upper().startswith(b"OK"):
+                    raise ImapIdleError(f"IDLE ended with: {line!r}")
+                break
+            if _NEW_MAIL_RE.match(line):
+                new_mail = True
+        return new_mail
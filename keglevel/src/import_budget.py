@@ -0,0 +1,126 @@
+# keglevel app
+#
+# import_budget.py
+import os
+import subprocess
+import sys
+
+# Modules imported on the normal startup path (see main.main()).
+STARTUP_MODULES = [
+    "settings_manager",
+    "sensor_logic",
+    "notification_service",
+    "temperature_logic",
+    "ui_manager",
+    "setup_wizard",
+]
+
+# Cumulative import budget per app module in milliseconds.
+# Sized for a Pi Zero-class board; desktop machines will come in far below these.
+IMPORT_BUDGET_MS = {
+    "settings_manager": 150,
+    "sensor_logic": 120,
+    "notification_service": 60,
+    "temperature_logic": 40,
+    "ui_manager_base": 400,
+    "popup_manager_mixin": 250,
+    "ui_manager": 700,
+    "setup_wizard": 60,
+}
+
+# Modules that are loaded on first use and must never appear at startup.
+# If one of these shows up in the report, something pulled it back onto the startup path.
+DEFERRED_MODULES = [
+    "smtplib",
+    "imaplib",
+    "email.mime.text",
+    "process_flow",
+    "webbrowser",
+    "tkinter.scrolledtext",
+    "main",
+    "web_dashboard",
+    "http.server",
+    "concurrent.futures",
+    "beverage_search",
+]
+
+
+def measure_import_times(modules=None):
+    """
+    Imports 'modules' in a fresh interpreter with -X importtime.
+    Returns {module_name: cumulative_ms} for every module loaded.
+    """
+    modules = modules or STARTUP_MODULES
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    code = "import " + ", ".join(modules)
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=src_dir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        # Format: "import time:   self [us] | cumulative | imported package"
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue # Header line
+        timings[parts[2].strip()] = cumulative_us / 1000.0
+    return timings
+
+
+def run_import_report(modules=None):
+    """
+    Prints the per-module cumulative import time against IMPORT_BUDGET_MS.
+    Returns 0 if every module is within budget and no deferred module was loaded, else 1.
+    """
+    timings = measure_import_times(modules)
+    if not timings:
+        print("Import Budget: No timing data collected (import failed?).")
+        return 1
+
+    failures = []
+
+    print("--- KegLevel Startup Import Report ---")
+    print(f"{'Module'.ljust(24)} {'Cumulative ms'.rjust(14)} {'Budget ms'.rjust(10)}")
+    for name, budget_ms in IMPORT_BUDGET_MS.items():
+        elapsed_ms = timings.get(name)
+        if elapsed_ms is None:
+            print(f"{name.ljust(24)} {'--'.rjust(14)} {str(budget_ms).rjust(10)}")
+            continue
+        flag = ""
+        if elapsed_ms > budget_ms:
+            flag = "  OVER BUDGET"
+            failures.append(f"{name} took {elapsed_ms:.1f} ms (budget {budget_ms} ms)")
+        print(f"{name.ljust(24)} {elapsed_ms:14.1f} {str(budget_ms).rjust(10)}{flag}")
+
+    loaded_deferred = [name for name in DEFERRED_MODULES if name in timings]
+    for name in loaded_deferred:
+        failures.append(f"{name} was imported at startup but should load on first use")
+
+    print("")
+    print("--- Slowest Modules (cumulative) ---")
+    for name, elapsed_ms in sorted(timings.items(), key=lambda kv: kv[1], reverse=True)[:10]:
+        print(f"{name.ljust(40)} {elapsed_ms:8.1f} ms")
+
+    print("")
+    if failures:
+        for failure in failures:
+            print(f"Import Budget: FAIL: {failure}")
+        return 1
+
+    print("Import Budget: OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_import_report())
@@ -0,0 +1,164 @@
+# keglevel app
+#
+# job_scheduler.py
+import heapq
+import itertools
+import threading
+import time
+
+MAX_WORKERS = 2
+# stop() waits this long for running jobs to return
+STOP_TIMEOUT_SECONDS = 2.0
+
+
+class ScheduledJob:
+    """Handle returned by JobScheduler.add_job(); pass it to reschedule() / cancel()."""
+
+    def __init__(self, name, func, error_delay):
+        self.name = name
+        self.func = func
+        self.error_delay = error_delay
+        self.due = None           # monotonic time of the next run; None while not scheduled
+        self.running = False
+        self.cancelled = False
+        self._rerun_delay = None  # reschedule() requested while the job was running
+
+    def is_scheduled(self):
+        return self.due is not None
+
+
+class JobScheduler:
+    """
+    Runs one-shot and periodic background jobs on one dispatcher thread and a small
+    bounded worker pool, instead of a sleeping thread per job.
+
+    A job is a plain function. Its return value is the delay in seconds until it runs
+    again, or None to run again only when reschedule()d, so periodic jobs (and jobs
+    whose period comes from settings) are one-shot jobs that re-arm themselves.
+    Pending runs are kept in a heap ordered by due time; the dispatcher sleeps until
+    the earliest one or until the heap changes, so idle jobs cost no wakeups. A job
+    never overlaps itself: reschedule() on a running job takes effect when it returns.
+    Jobs should be short; with only MAX_WORKERS workers, anything that blocks for long
+    (such as an IMAP IDLE session) belongs on its own thread.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, name="jobs"):
+        self.max_workers = max_workers
+        self.name = name
+        self._cond = threading.Condition()
+        self._heap = []  # (due, sequence, job)
+        self._sequence = itertools.count()
+        self._running = False
+        self._active_count = 0
+        self._thread = None
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Loaded on first use; keeps concurrent.futures off the startup path
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._executor
+
+    # --- PUBLIC API ---
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=STOP_TIMEOUT_SECONDS):
+        """Stops dispatching and waits up to 'timeout' for running jobs. Pending runs are dropped."""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            for _, _, job in self._heap:
+                job.due = None
+            self._heap = []
+            self._cond.notify_all()
+            deadline = time.monotonic() + timeout
+            while self._active_count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"JobScheduler: {self._active_count} job(s) still running at shutdown.")
+                    break
+                self._cond.wait(remaining)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def add_job(self, name, func, delay=0.0, error_delay=None):
+        """
+        Schedules 'func' to run in 'delay' seconds (see class docs for its return value).
+        If it raises, it runs again after 'error_delay' seconds (None: not until rescheduled).
+        """
+        job = ScheduledJob(name, func, error_delay)
+        with self._cond:
+            self._schedule_locked(job, delay)
+        return job
+
+    def reschedule(self, job, delay=0.0):
+        """Moves the job's next run to 'delay' seconds from now (also re-arms a finished job)."""
+        with self._cond:
+            if job.cancelled:
+                return
+            if job.running:
+                job._rerun_delay = delay
+            else:
+                self._schedule_locked(job, delay)
+
+    def cancel(self, job):
+        with self._cond:
+            job.cancelled = True
+            job.due = None
+            job._rerun_delay = None
+            # The heap entry is dropped lazily by the dispatcher
+
+    # --- DISPATCHER ---
+    def _schedule_locked(self, job, delay):
+        job.due = time.monotonic() + max(0.0, float(delay))
+        heapq.heappush(self._heap, (job.due, next(self._sequence), job))
+        self._cond.notify_all()
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while self._running:
+                # Drop entries superseded by a reschedule()/cancel()
+                while self._heap and self._heap[0][2].due != self._heap[0][0]:
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                wait_time = self._heap[0][0] - time.monotonic()
+                if wait_time > 0:
+                    self._cond.wait(wait_time)
+                    continue
+
+                _, _, job = heapq.heappop(self._heap)
+                job.due = None
+                job.running = True
+                self._active_count += 1
+                self._get_executor().submit(self._run_job, job)
+
+    def _run_job(self, job):
+        try:
+            next_delay = job.func()
+        except Exception as e:
+            print(f"JobScheduler: Job '{job.name}' failed: {e}")
+            next_delay = job.error_delay
+
+        with self._cond:
+            job.running = False
+            self._active_count -= 1
+            if self._running and not job.cancelled:
+                if job._rerun_delay is not None:
+                    next_delay, job._rerun_delay = job._rerun_delay, None
+                if next_delay is not None:
+                    self._schedule_locked(job, next_delay)
+            self._cond.notify_all()
@@ -0,0 +1,464 @@
+# keglevel app
+#
+# mail_standin.py
+import contextlib
+import email
+import random
+import re
+import socketserver
+import threading
+import time
+
+# Developer utility: in-process SMTP and IMAP servers that stand in for real mail
+# accounts, so NotificationService (and fermvault's NotificationManager) can be run
+# and benchmarked offline. See notification_bench.py.
+#
+# The stand-ins speak plain TCP. The apps use STARTTLS (SMTP) and IMAP over SSL,
+# so wrap client code in plaintext_mail_clients() while talking to them.
+
+STANDIN_HOST = "127.0.0.1"
+STANDIN_USER = "keglevel@standin.local"
+STANDIN_PASSWORD = "standin"
+
+_IMAP_TOKEN_RE = re.compile(r'"[^"]*"|\(|\)|[^\s()]+')
+
+
+@contextlib.contextmanager
+def plaintext_mail_clients():
+    """Makes smtplib skip STARTTLS and imaplib.IMAP4_SSL connect in plain text, while active."""
+    import imaplib
+    import smtplib
+    original_starttls = smtplib.SMTP.starttls
+    original_imap_ssl = imaplib.IMAP4_SSL
+    smtplib.SMTP.starttls = lambda self, *args, **kwargs: (220, b"standin: TLS skipped")
+    imaplib.IMAP4_SSL = imaplib.IMAP4
+    try:
+        yield
+    finally:
+        smtplib.SMTP.starttls = original_starttls
+        imaplib.IMAP4_SSL = original_imap_ssl
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _StandinServer:
+    """
+    Common part of the stand-ins: a threaded TCP server on localhost plus fault injection.
+
+        latency_seconds - delay before every reply (a slow or distant server)
+        failure_rate    - chance (0..1) that a command gets a transient error
+        drop_rate       - chance (0..1) that the server drops the connection instead of replying
+        reject_auth     - every login fails
+    """
+
+    def __init__(self, handler_class, host=STANDIN_HOST, port=0, latency_seconds=0.0,
+                 failure_rate=0.0, drop_rate=0.0, reject_auth=False, seed=None):
+        self.latency_seconds = latency_seconds
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.reject_auth = reject_auth
+        self.user = STANDIN_USER
+        self.password = STANDIN_PASSWORD
+
+        self._random = random.Random(seed)
+        self._lock = threading.Condition()
+        self.stats = {"connections": 0, "logins": 0, "commands": 0, "failures": 0, "drops": 0}
+
+        self._server = _ThreadingServer((host, port), handler_class)
+        self._server.standin = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _next_fault(self):
+        """Called once per command. Returns None, "fail" or "drop" (and applies the latency)."""
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        with self._lock:
+            self.stats["commands"] += 1
+            roll = self._random.random()
+        if roll < self.drop_rate:
+            self._count("drops")
+            return "drop"
+        if roll < self.drop_rate + self.failure_rate:
+            self._count("failures")
+            return "fail"
+        return None
+
+    def _check_login(self, user, password):
+        ok = not self.reject_auth and user == self.user and password == self.password
+        if ok:
+            self._count("logins")
+        return ok
+
+
+# --- SMTP ---
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def _reply(self, line):
+        self.wfile.write(line.encode('ascii') + b"\r\n")
+        self.wfile.flush()
+
+    def handle(self):
+        standin = self.server.standin
+        standin._count("connections")
+        self._reply("220 standin ESMTP ready")
+        sender, recipients, authenticated = None, [], False
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            argument = command[len(verb):].strip()
+
+            fault = standin._next_fault()
+            if fault == "drop":
+                return
+            if fault == "fail" and verb in ("MAIL", "RCPT", "DATA"):
+                self._reply("451 standin: transient failure, try again later")
+                continue
+
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-standin\r\n250-STARTTLS\r\n250 AUTH PLAIN LOGIN\r\n")
+                self.wfile.flush()
+            elif verb == "STARTTLS":
+                self._reply("454 standin: TLS not available (use plaintext_mail_clients())")
+            elif verb == "AUTH":
+                authenticated = self._auth(argument)
+                self._reply("235 Authentication successful" if authenticated else "535 Authentication failed")
+            elif verb == "MAIL":
+                if not authenticated:
+                    self._reply("530 Authentication required")
+                    continue
+                sender, recipients = argument.split(':', 1)[1].strip().strip('<>'), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                recipient = argument.split(':', 1)[1].strip().strip('<>')
+                if recipient in standin.refused_recipients:
+                    self._reply("550 standin: mailbox unavailable")
+                    continue
+                recipients.append(recipient)
+                self._reply("250 OK")
+            elif verb == "DATA":
+                if not recipients:
+                    self._reply("503 No valid recipients")
+                    continue
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = self._read_data()
+                if data is None:
+                    return
+                standin._store(sender, recipients, data)
+                sender, recipients = None, []
+                self._reply("250 OK queued")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                self._reply("250 OK")
+            elif verb == "NOOP":
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+    def _auth(self, argument):
+        import base64
+        parts = argument.split()
+        mechanism = parts[0].upper() if parts else ""
+        try:
+            if mechanism == "PLAIN":
+                encoded = parts[1] if len(parts) > 1 else self._challenge("")
+                _, user, password = base64.b64decode(encoded).decode('utf-8').split('\0')
+            elif mechanism == "LOGIN":
+                user = base64.b64decode(parts[1] if len(parts) > 1 else self._challenge("VXNlcm5hbWU6")).decode('utf-8')
+                password = base64.b64decode(self._challenge("UGFzc3dvcmQ6")).decode('utf-8')
+            else:
+                return False
+        except (ValueError, IndexError):
+            return False
+        return self.server.standin._check_login(user, password)
+
+    def _challenge(self, text):
+        self._reply(f"334 {text}")
+        return self.rfile.readline().strip()
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return None
+            if line in (b".\r\n", b".\n"):
+                return b"".join(lines)
+            lines.append(line[1:] if line.startswith(b"..") else line)
+
+
+class StandinSMTPServer(_StandinServer):
+    """
+    Accepts mail from the apps' SMTP clients (AUTH PLAIN/LOGIN with STANDIN_USER /
+    STANDIN_PASSWORD) and keeps it in .messages: dicts with sender, recipients,
+    subject, body and 'received' (time.time()). 'refused_recipients' get 550 on RCPT.
+    """
+
+    def __init__(self, refused_recipients=(), **kwargs):
+        super().__init__(_SMTPHandler, **kwargs)
+        self.refused_recipients = set(refused_recipients)
+        self.messages = []
+
+    def _store(self, sender, recipients, data):
+        parsed = email.message_from_bytes(data)
+        payload = parsed.get_payload(decode=True) if not parsed.is_multipart() else b""
+        with self._lock:
+            self.messages.append({
+                "sender": sender,
+                "recipients": list(recipients),
+                "subject": parsed.get('Subject', ''),
+                "body": (payload or b"").decode('utf-8', 'replace'),
+                "received": time.time(),
+            })
+            self._lock.notify_all()
+
+    def wait_for_messages(self, count, timeout):
+        """Waits until at least 'count' messages arrived. Returns True if they did."""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while len(self.messages) < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+            return True
+
+
+# --- IMAP ---
+class _IMAPHandler(socketserver.StreamRequestHandler):
+
+    def _send(self, data):
+        self.wfile.write(data)
+        self.wfile.flush()
+
+    def _reply(self, line):
+        self._send(line.encode('utf-8') + b"\r\n")
+
+    def handle(self):
+        standin = self.server.standin
+        standin._count("connections")
+        self._known_count = 0
+        self._reply(f"* OK [CAPABILITY {standin.capabilities()}] standin IMAP ready")
+        selected = False
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            parts = line.decode('utf-8', 'replace').strip().split(' ', 2)
+            if len(parts) < 2:
+                self._reply("* BAD missing command")
+                continue
+            tag, verb = parts[0], parts[1].upper()
+            argument = parts[2] if len(parts) > 2 else ""
+            if verb == "UID":
+                self._reply(f"{tag} BAD UID commands not supported by the stand-in")
+                continue
+
+            fault = standin._next_fault()
+            if fault == "drop":
+                return
+            if fault == "fail" and verb not in ("CAPABILITY", "LOGOUT"):
+                self._reply(f"{tag} NO [UNAVAILABLE] standin: transient failure")
+                continue
+
+            if verb == "CAPABILITY":
+                self._reply(f"* CAPABILITY {standin.capabilities()}")
+                self._reply(f"{tag} OK CAPABILITY completed")
+            elif verb == "LOGIN":
+                tokens = [t.strip('"') for t in _IMAP_TOKEN_RE.findall(argument)]
+                if len(tokens) == 2 and standin._check_login(tokens[0], tokens[1]):
+                    self._reply(f"{tag} OK LOGIN completed")
+                else:
+                    self._reply(f"{tag} NO [AUTHENTICATIONFAILED] Invalid credentials")
+            elif verb in ("SELECT", "EXAMINE"):
+                selected = True
+                self._known_count = standin.message_count()
+                self._reply(f"* {self._known_count} EXISTS")
+                self._reply(f"{tag} OK [READ-WRITE] {verb} completed")
+            elif verb == "NOOP":
+                # Like real servers, report mail that arrived since the session last heard
+                if selected and standin.message_count() != self._known_count:
+                    self._known_count = standin.message_count()
+                    self._reply(f"* {self._known_count} EXISTS")
+                self._reply(f"{tag} OK NOOP completed")
+            elif verb == "SEARCH" and selected:
+                numbers = standin.search(_IMAP_TOKEN_RE.findall(argument))
+                self._reply("* SEARCH" + "".join(f" {n}" for n in numbers))
+                self._reply(f"{tag} OK SEARCH completed")
+            elif verb == "FETCH" and selected:
+                sequence_set, _, _ = argument.partition(' ')
+                for number in _parse_sequence_set(sequence_set):
+                    raw = standin.get_raw(number)
+                    if raw is not None:
+                        self._send(f"* {number} FETCH (RFC822 {{{len(raw)}}}\r\n".encode('ascii') + raw + b")\r\n")
+                self._reply(f"{tag} OK FETCH completed")
+            elif verb == "STORE" and selected:
+                sequence_set, _, flags = argument.partition(' ')
+                if '\\seen' in flags.lower():
+                    standin.set_seen(_parse_sequence_set(sequence_set), not flags.startswith('-'))
+                self._reply(f"{tag} OK STORE completed")
+            elif verb == "IDLE" and selected and standin.supports_idle:
+                self._idle(tag)
+            elif verb == "CLOSE":
+                selected = False
+                self._reply(f"{tag} OK CLOSE completed")
+            elif verb == "LOGOUT":
+                self._reply("* BYE standin logging out")
+                self._reply(f"{tag} OK LOGOUT completed")
+                return
+            else:
+                self._reply(f"{tag} BAD command not supported")
+
+    def _idle(self, tag):
+        standin = self.server.standin
+        self._reply("+ idling")
+        standin._add_idler(self._announce)
+        try:
+            # Mail that arrived before IDLE is announced at once
+            if standin.message_count() != self._known_count:
+                self._announce(standin.message_count())
+            self.rfile.readline()  # DONE (or EOF)
+        finally:
+            standin._remove_idler(self._announce)
+        self._reply(f"{tag} OK IDLE terminated")
+
+    def _announce(self, count):
+        self._known_count = count
+        self._reply(f"* {count} EXISTS")
+
+
+def _parse_sequence_set(sequence_set):
+    numbers = []
+    for part in sequence_set.split(','):
+        if ':' in part:
+            low, high = part.split(':', 1)
+            numbers.extend(range(int(low), int(high) + 1))
+        elif part:
+            numbers.append(int(part))
+    return numbers
+
+
+class StandinIMAPServer(_StandinServer):
+    """
+    A single inbox for STANDIN_USER. deliver() adds a message and pushes EXISTS to any
+    IDLE session at once. Supports what the apps use: LOGIN, SELECT, SEARCH
+    (UNSEEN/SEEN/ALL/FROM/SUBJECT/TEXT), FETCH RFC822, STORE \\Seen, NOOP and IDLE;
+    supports_idle=False models servers without IDLE.
+    """
+
+    def __init__(self, supports_idle=True, **kwargs):
+        super().__init__(_IMAPHandler, **kwargs)
+        self.supports_idle = supports_idle
+        self.messages = []  # dicts: sender, subject, body, seen, delivered
+        self._idlers = []
+
+    def capabilities(self):
+        return "IMAP4rev1 AUTH=PLAIN" + (" IDLE" if self.supports_idle else "")
+
+    def deliver(self, sender, subject, body=""):
+        """Adds a message to the inbox. Returns its sequence number."""
+        with self._lock:
+            self.messages.append({"sender": sender, "subject": subject, "body": body,
+                                  "seen": False, "delivered": time.time()})
+            number = len(self.messages)
+            idlers = list(self._idlers)
+        for announce in idlers:
+            try:
+                announce(number)
+            except OSError:
+                pass
+        return number
+
+    def message_count(self):
+        with self._lock:
+            return len(self.messages)
+
+    def unseen_count(self):
+        with self._lock:
+            return sum(1 for m in self.messages if not m['seen'])
+
+    def search(self, tokens):
+        criteria = []
+        tokens = [t for t in tokens if t not in ("(", ")")]
+        i = 0
+        while i < len(tokens):
+            key = tokens[i].upper()
+            if key in ("FROM", "SUBJECT", "TEXT") and i + 1 < len(tokens):
+                criteria.append((key, tokens[i + 1].strip('"').lower()))
+                i += 2
+                continue
+            if key in ("UNSEEN", "SEEN"):
+                criteria.append((key, None))
+            i += 1
+
+        with self._lock:
+            return [n for n, m in enumerate(self.messages, 1) if all(_matches(m, c) for c in criteria)]
+
+    def get_raw(self, number):
+        with self._lock:
+            if not 1 <= number <= len(self.messages):
+                return None
+            m = self.messages[number - 1]
+        return (f"From: {m['sender']}\r\nTo: {self.user}\r\nSubject: {m['subject']}\r\n"
+                f"Content-Type: text/plain; charset=utf-8\r\n\r\n{m['body']}\r\n").encode('utf-8')
+
+    def set_seen(self, numbers, seen=True):
+        with self._lock:
+            for number in numbers:
+                if 1 <= number <= len(self.messages):
+                    self.messages[number - 1]['seen'] = seen
+
+    def _add_idler(self, announce):
+        with self._lock:
+            self._idlers.append(announce)
+
+    def _remove_idler(self, announce):
+        with self._lock:
+            self._idlers.remove(announce)
+
+
+def _matches(message, criterion):
+    key, value = criterion
+    if key == "UNSEEN":
+        return not message['seen']
+    if key == "SEEN":
+        return message['seen']
+    if key == "FROM":
+        return value in message['sender'].lower()
+    if key == "SUBJECT":
+        return value in message['subject'].lower()
+    # TEXT: headers and body
+    return value in f"{message['sender']} {message['subject']} {message['body']}".lower()
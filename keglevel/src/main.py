@@ -11,6 +11,7 @@ import re
 import platform 
 import shutil 
 import signal 
+import time
 from pathlib import Path 
 
 # --- AUTOGENERATED FILE MANAGEMENT LOGIC ---
@@ -84,6 +85,13 @@ def handle_exit_signal(signum, frame):
     except Exception:
         pass 
 
+    try:
+        # os._exit() skips atexit, so flush pending settings writes explicitly
+        if 'settings_mgr' in globals() and settings_mgr:
+            settings_mgr.flush_settings()
+    except Exception:
+        pass 
+
     try:
         # Check if SIGHUP exists (Linux/Unix only)
         is_sighup = hasattr(signal, 'SIGHUP') and signum == signal.SIGHUP
@@ -102,15 +110,27 @@ signal.signal(signal.SIGTERM, handle_exit_signal)
 
 # --- GLOBAL VARIABLES FOR SIGNAL HANDLER ACCESS ---
 sensor_ctrl = None
+settings_mgr = None
 
 # --- MAIN EXECUTION FUNCTION ---
 def main():
     global sensor_ctrl
+    global settings_mgr
+    
+    startup_t0 = time.perf_counter()
     
     LAUNCH_BEVERAGE_LIBRARY = False
     if len(sys.argv) > 1:
         if sys.argv[1] == "--open-beverage-library":
             LAUNCH_BEVERAGE_LIBRARY = True
+        elif sys.argv[1] == "--import-report":
+            # Developer utility: print per-module startup import times against the budget
+            from import_budget import run_import_report
+            sys.exit(run_import_report())
+        elif sys.argv[1] == "--notification-bench":
+            # Developer utility: notification latency/throughput against local SMTP/IMAP stand-ins
+            from notification_bench import run_notification_bench
+            sys.exit(run_notification_bench())
 
     # Import modules inside main to avoid circular deps or early execution
     from settings_manager import SettingsManager
@@ -205,12 +225,29 @@ def main():
         app_version_string
     )
 
+    # --- OPTIONAL: Read-only web dashboard (imported only when enabled) ---
+    dashboard_svc = None
+    if settings_mgr.get_web_dashboard_enabled():
+        try:
+            from web_dashboard import WebDashboard
+            dashboard_svc = WebDashboard(settings_mgr, num_configured_sensors, port=settings_mgr.get_web_dashboard_port())
+            sensor_ctrl.dashboard = dashboard_svc
+            temp_logic_svc.dashboard = dashboard_svc
+        except Exception as e:
+            print(f"Main: Could not create web dashboard: {e}")
+            dashboard_svc = None
+
     # Link services
     notification_svc.ui_manager = ui
     if ui.notification_service and hasattr(ui, 'update_notification_status_display'):
         ui.notification_service.ui_manager_status_update_cb = ui.update_notification_status_display
     if ui.temp_logic and hasattr(ui, 'update_temperature_display'):
         ui.temp_logic.ui_callbacks["update_temp_display_cb"] = ui.update_temperature_display
+    # Alert rules are evaluated when temperatures change (not in the flow-meter loop)
+    temp_logic_svc.alert_engine = notification_svc.alert_engine
+        
+    # --- STARTUP TIMING: Report time-to-first-frame once the main loop goes idle ---
+    root.after_idle(lambda: print(f"Main: Time to first frame: {(time.perf_counter() - startup_t0) * 1000.0:.0f} ms"))
         
 # --- SCHEDULE EULA POPUP (Fallback) ---
     # Note: If Wizard runs successfully, eula_agreed will be True, so this won't show.
@@ -236,6 +273,7 @@ def main():
     if notification_svc: notification_svc.start_scheduler()
     if temp_logic_svc: temp_logic_svc.start_monitoring()
     if sensor_ctrl: sensor_ctrl.start_monitoring()
+    if dashboard_svc: dashboard_svc.start()
     
     if settings_mgr.get_launch_workflow_on_start():
         # Also schedule workflow popup to prevent blocking
@@ -252,8 +290,12 @@ def main():
         print(f"\n[CRITICAL ERROR] Application crashed: {e}")
     finally:
         print("[SHUTDOWN] Performing standard exit cleanup...")
+        if dashboard_svc:
+            dashboard_svc.stop()
         if sensor_ctrl:
             sensor_ctrl.cleanup_gpio()
+        if settings_mgr:
+            settings_mgr.stop_settings_writer()
         print("[SHUTDOWN] Cleanup complete.")
 
     print("Main: Application has exited mainloop.")
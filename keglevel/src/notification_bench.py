@@ -0,0 +1,270 @@
+# keglevel app
+#
+# notification_bench.py
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from mail_standin import (StandinSMTPServer, StandinIMAPServer, plaintext_mail_clients,
+                          STANDIN_USER, STANDIN_PASSWORD)
+
+# Developer utility: measures the notification path against the local mail stand-ins
+# (mail_standin.py). Run from src/:  python notification_bench.py [--latency 0.2] [--messages 50]
+#
+#   alert latency - producer report() -> alert rule -> outbox -> SMTP server
+#   throughput    - a burst of queued messages drained over the pooled SMTP session
+#   loop delay    - how late a 10 ms producer loop runs while alerts go out to a slow server
+#   status        - STATUS mail delivered to the inbox -> IDLE wakeup (or poll) -> reply received
+#
+# Each benchmark runs the app's NotificationService on a SettingsManager in a scratch data directory.
+#   fermvault     - the same alert sent by fermvault's NotificationManager, which sends inline
+
+ALERT_RECIPIENT = "brewer@standin.local"
+STATUS_SENDER = "brewer@standin.local"
+LOOP_TICK_SECONDS = 0.01
+WAIT_TIMEOUT_SECONDS = 60
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _summary(values):
+    """(median, p95, max) in milliseconds."""
+    return tuple(v * 1000.0 for v in (_percentile(values, 0.5), _percentile(values, 0.95), max(values, default=0.0)))
+
+
+class _BenchUI:
+    """The parts of the UI that NotificationService reads when it formats a message."""
+
+    def __init__(self, num_taps):
+        self.num_sensors = num_taps
+        self.last_known_remaining_liters = [1.0] * num_taps
+        self.temp_logic = None
+
+
+class _Bench:
+    """
+    The app's NotificationService (with its outbox and alert rule engine) on a
+    SettingsManager in a scratch data directory, configured for the stand-in servers.
+    """
+
+    def __init__(self, smtp, num_taps, imap=None):
+        from settings_manager import SettingsManager
+        from notification_service import NotificationService
+
+        self.smtp = smtp
+        self.data_dir = tempfile.mkdtemp(prefix="keglevel-bench-")
+        self.settings_manager = SettingsManager(num_taps, data_dir=self.data_dir)
+        self.settings_manager.save_push_notification_settings({
+            "notification_type": "Email", "frequency": "Daily", "server_email": STANDIN_USER,
+            "server_password": STANDIN_PASSWORD, "email_recipient": ALERT_RECIPIENT,
+            "smtp_server": smtp.host, "smtp_port": smtp.port,
+        })
+        cond_settings = self.settings_manager.get_conditional_notification_settings()
+        cond_settings.update({"notification_type": "Email", "threshold_liters": 2.0, "digest_window_seconds": 0})
+        self.settings_manager.save_conditional_notification_settings(cond_settings)
+        if imap is not None:
+            self.settings_manager.save_status_request_settings({
+                "enable_status_request": True, "authorized_sender": STATUS_SENDER,
+                "rpi_email_address": STANDIN_USER, "rpi_email_password": STANDIN_PASSWORD,
+                "imap_server": imap.host, "imap_port": imap.port, "smtp_server": smtp.host, "smtp_port": smtp.port,
+            })
+
+        # The scheduler's jobs (periodic push, update check) are not benchmarked, so only the engine is started
+        self.service = NotificationService(self.settings_manager, _BenchUI(num_taps))
+        self.service.alert_engine.start()
+
+    def close(self):
+        self.service.stop_status_request_listener()
+        self.service.alert_engine.stop()
+        self.service.outbox.stop()
+        self.settings_manager.stop_settings_writer()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+def bench_alert_latency(latency_seconds, samples):
+    """report() -> delivered, one alert at a time. Returns (latencies, report_call_times)."""
+    from alert_rules import METRIC_TAP_REMAINING_LITERS
+    with StandinSMTPServer(latency_seconds=latency_seconds) as smtp:
+        bench = _Bench(smtp, samples)
+        latencies, call_times = [], []
+        try:
+            for tap_index in range(samples):
+                t0 = time.time()
+                bench.service.alert_engine.report(METRIC_TAP_REMAINING_LITERS, tap_index, 1.0)
+                call_times.append(time.time() - t0)
+                if not smtp.wait_for_messages(tap_index + 1, WAIT_TIMEOUT_SECONDS):
+                    print(f"Notification Bench: Alert {tap_index} was not delivered.")
+                    break
+                latencies.append(smtp.messages[tap_index]['received'] - t0)
+        finally:
+            bench.close()
+    return latencies, call_times
+
+
+def bench_throughput(latency_seconds, count):
+    """Queues 'count' push reports at once. Returns (messages per second, total queueing seconds, SMTP connections)."""
+    with StandinSMTPServer(latency_seconds=latency_seconds) as smtp:
+        bench = _Bench(smtp, 1)
+        try:
+            t0 = time.time()
+            for i in range(count):
+                bench.service.send_push_notification()
+            enqueue_seconds = time.time() - t0
+            smtp.wait_for_messages(count, WAIT_TIMEOUT_SECONDS)
+            elapsed = smtp.messages[-1]['received'] - t0 if smtp.messages else 0.0
+            rate = len(smtp.messages) / elapsed if elapsed > 0 else 0.0
+            return rate, enqueue_seconds, smtp.stats['connections']
+        finally:
+            bench.close()
+
+
+def bench_loop_delay(latency_seconds, alerts):
+    """
+    Runs a producer loop every LOOP_TICK_SECONDS that reports tap volumes (as the
+    sensor loop does) while 'alerts' of them fire. Returns the tick lateness values.
+    """
+    from alert_rules import METRIC_TAP_REMAINING_LITERS
+    with StandinSMTPServer(latency_seconds=latency_seconds) as smtp:
+        bench = _Bench(smtp, alerts)
+        lateness = []
+        try:
+            next_tick = time.monotonic()
+            tick = 0
+            while len(smtp.messages) < alerts and tick < WAIT_TIMEOUT_SECONDS / LOOP_TICK_SECONDS:
+                now = time.monotonic()
+                lateness.append(max(0.0, now - next_tick))
+                # One tap goes low every 10 ticks; the others keep changing above the threshold
+                for tap_index in range(alerts):
+                    liters = 1.0 if tap_index <= tick // 10 else 10.0 + tick * 0.001
+                    bench.service.alert_engine.report(METRIC_TAP_REMAINING_LITERS, tap_index, liters)
+                tick += 1
+                next_tick += LOOP_TICK_SECONDS
+                time.sleep(max(0.0, next_tick - time.monotonic()))
+        finally:
+            bench.close()
+    return lateness
+
+
+def bench_status_round_trip(latency_seconds, samples, supports_idle=True):
+    """
+    STATUS mail delivered -> the service's status listener thread notices it -> reply
+    received by SMTP. Returns the round trips. Without IDLE the listener polls, so
+    its poll interval is shortened to a second for the run.
+    """
+    with StandinSMTPServer(latency_seconds=latency_seconds) as smtp, \
+            StandinIMAPServer(latency_seconds=latency_seconds, supports_idle=supports_idle) as imap:
+        bench = _Bench(smtp, 1, imap=imap)
+        bench.service._status_request_interval_seconds = 1
+        bench.service.start_status_request_listener()
+        round_trips = []
+        try:
+            for i in range(samples):
+                t0 = time.time()
+                imap.deliver(STATUS_SENDER, "STATUS")
+                if not smtp.wait_for_messages(i + 1, WAIT_TIMEOUT_SECONDS):
+                    print(f"Notification Bench: STATUS request {i} was not answered.")
+                    break
+                round_trips.append(smtp.messages[i]['received'] - t0)
+        finally:
+            bench.close()
+    return round_trips
+
+
+def _load_fermvault_notification_manager():
+    """Imports fermvault's notification_manager.py from the sibling app, or returns None."""
+    import importlib.util
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    path = os.path.join(src_dir, "..", "..", "fermvault", "src", "notification_manager.py")
+    if not os.path.exists(path):
+        return None
+    spec = importlib.util.spec_from_file_location("fermvault_notification_manager", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _FermVaultSettings:
+    """Just the settings fermvault's conditional alert check reads."""
+
+    def __init__(self, smtp):
+        self.values = {"conditional_enabled": True, "beer_temp_actual": 80.0,
+                       "conditional_beer_min": 60.0, "conditional_beer_max": 70.0}
+        self.smtp = {"smtp_server": smtp.host, "smtp_port": smtp.port, "server_email": STANDIN_USER,
+                     "server_password": STANDIN_PASSWORD, "email_recipient": ALERT_RECIPIENT}
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def get_all_smtp_settings(self):
+        return dict(self.smtp)
+
+
+class _FermVaultUI:
+    def log_system_message(self, message):
+        pass
+
+
+def bench_fermvault_alerts(latency_seconds, samples):
+    """
+    Times fermvault's conditional alert check, which sends inline on its scheduler
+    thread. Returns (check durations, alert latencies), or None if fermvault is absent.
+    """
+    module = _load_fermvault_notification_manager()
+    if module is None:
+        return None
+    with StandinSMTPServer(latency_seconds=latency_seconds) as smtp:
+        manager = module.NotificationManager(_FermVaultSettings(smtp), _FermVaultUI())
+        durations, latencies = [], []
+        for i in range(samples):
+            manager._alert_cooldowns["beer_temp"] = 0.0
+            t0 = time.time()
+            manager._check_conditional_alerts()
+            durations.append(time.time() - t0)
+            if smtp.wait_for_messages(i + 1, WAIT_TIMEOUT_SECONDS):
+                latencies.append(smtp.messages[i]['received'] - t0)
+    return durations, latencies
+
+
+def run_notification_bench(latency_seconds=0.05, messages=20):
+    print(f"--- Notification Bench (server latency {latency_seconds * 1000:.0f} ms per reply, {messages} messages) ---")
+    with plaintext_mail_clients():
+        latencies, call_times = bench_alert_latency(latency_seconds, messages)
+        print("KegLevel alert latency      median %8.1f ms   p95 %8.1f ms   max %8.1f ms" % _summary(latencies))
+        print("KegLevel report() call      median %8.3f ms   p95 %8.3f ms   max %8.3f ms" % _summary(call_times))
+
+        rate, enqueue_seconds, connections = bench_throughput(latency_seconds, messages)
+        print(f"KegLevel throughput         {rate:8.1f} msg/s   enqueue total {enqueue_seconds * 1000:.1f} ms   "
+              f"SMTP connections {connections}")
+
+        lateness = bench_loop_delay(latency_seconds, min(messages, 10))
+        print("KegLevel 10 ms loop late    median %8.2f ms   p95 %8.2f ms   max %8.2f ms" % _summary(lateness))
+
+        for supports_idle in (True, False):
+            round_trips = bench_status_round_trip(latency_seconds, min(messages, 5), supports_idle)
+            label = "IDLE" if supports_idle else "poll"
+            print(f"KegLevel STATUS ({label})      median %8.1f ms   p95 %8.1f ms   max %8.1f ms" % _summary(round_trips))
+
+        fermvault = bench_fermvault_alerts(latency_seconds, min(messages, 10))
+        if fermvault is None:
+            print("FermVault: notification_manager.py not found; skipped.")
+        else:
+            durations, alert_latencies = fermvault
+            print("FermVault loop blocked      median %8.1f ms   p95 %8.1f ms   max %8.1f ms" % _summary(durations))
+            print("FermVault alert latency     median %8.1f ms   p95 %8.1f ms   max %8.1f ms" % _summary(alert_latencies))
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Notification benchmarks against local SMTP/IMAP stand-ins.")
+    parser.add_argument("--latency", type=float, default=0.05, help="server delay per reply, in seconds")
+    parser.add_argument("--messages", type=int, default=20, help="messages per benchmark")
+    args = parser.parse_args()
+    sys.exit(run_notification_bench(args.latency, args.messages))
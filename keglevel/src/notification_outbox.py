@@ -0,0 +1,322 @@
+# keglevel app
+#
+# notification_outbox.py
+import os
+import json
+import threading
+import time
+import uuid
+
+from settings_writer import write_json_atomic
+
+# NOTE: smtplib is imported by the worker when it first sends, not at startup.
+
+OUTBOX_FILE = "notification_outbox.json"
+OUTBOX_VERSION = 1
+
+# Failed sends are retried after RETRY_BASE_SECONDS, doubling per attempt up to RETRY_MAX_SECONDS
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+MAX_ATTEMPTS = 12
+# A message still undelivered after this long is dropped (a day-old alert is only noise)
+MAX_MESSAGE_AGE_SECONDS = 24 * 3600
+
+# An SMTP session stays open this long after a burst, in case more messages follow
+SESSION_IDLE_SECONDS = 15
+SMTP_TIMEOUT_SECONDS = 30
+
+DIGEST_SEPARATOR = "\n\n" + "-" * 30 + "\n\n"
+
+
+class NotificationOutbox:
+    """
+    Persistent queue of outgoing e-mail/SMS messages, drained by one worker thread.
+
+    enqueue() writes the message to notification_outbox.json and returns at once,
+    so no trigger (sensor loop, scheduler, IMAP listener) ever waits on the network.
+    The worker sends every due message over one authenticated SMTP session, which it
+    keeps for SESSION_IDLE_SECONDS after the queue empties. A message carries all its
+    recipients (e.g. the email address and the SMS gateway for "Both"), sent with a
+    single DATA. Failures are retried with exponential backoff; messages survive a
+    restart.
+
+    Digest messages (enqueue(..., digest_window_seconds=N)) are held until the account's
+    open digest window closes, N seconds after the first of them was queued. The worker
+    then merges them into one message per recipient (recipients that got the same
+    alerts share one), so a burst of alerts costs one message instead of one each.
+
+    Messages name an 'account' ("push" or "status") rather than carrying the SMTP
+    credentials; get_smtp_config(account) resolves it at send time, so passwords
+    never land in the outbox file and fixed settings apply to queued retries.
+    """
+
+    def __init__(self, path, get_smtp_config, status_cb=None):
+        self.path = path
+        self.get_smtp_config = get_smtp_config
+        self.status_cb = status_cb
+
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._running = False
+        self._thread = None
+        self._messages = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            messages = data.get('messages', []) if data.get('version') == OUTBOX_VERSION else []
+            if messages:
+                print(f"NotificationOutbox: Loaded {len(messages)} pending message(s).")
+            return messages
+        except Exception as e:
+            print(f"NotificationOutbox: Could not read {self.path}: {e}. Starting with an empty outbox.")
+            return []
+
+    def _save(self):
+        # Caller holds self._lock
+        try:
+            write_json_atomic(self.path, {"version": OUTBOX_VERSION, "messages": self._messages}, indent=None)
+        except OSError as e:
+            print(f"NotificationOutbox: Could not save outbox: {e}")
+
+    def _report(self, message):
+        print(f"NotificationOutbox: {message}")
+        if self.status_cb:
+            try:
+                self.status_cb(message)
+            except Exception as e:
+                print(f"NotificationOutbox: Status callback failed: {e}")
+
+    # --- PUBLIC API ---
+    def enqueue(self, account, subject, body, recipients, label, digest_window_seconds=0):
+        """
+        Queues one message for 'recipients'. Returns True once it is safely queued.
+        With 'digest_window_seconds' the message joins the account's open digest (see class docs).
+        """
+        recipients = [r for r in recipients if r]
+        if not recipients:
+            return False
+
+        now = time.time()
+        message = {
+            "id": uuid.uuid4().hex,
+            "account": account,
+            "subject": subject,
+            "body": body,
+            "recipients": recipients,
+            "label": label,
+            "created": now,
+            "attempts": 0,
+            "next_attempt": now,
+            "last_error": None,
+            "digest": digest_window_seconds > 0,
+        }
+        with self._lock:
+            if message['digest']:
+                # Join the open window: every undelivered digest message of the account is sent together
+                open_windows = [m['next_attempt'] for m in self._messages
+                                if m.get('digest') and m['account'] == account and not m['attempts']]
+                message['next_attempt'] = min(open_windows) if open_windows else now + digest_window_seconds
+            self._messages.append(message)
+            self._save()
+
+        if message['digest']:
+            self._report(f"Queued {label} for the alert digest (sent in {int(max(0, message['next_attempt'] - now))}s).")
+        else:
+            self._report(f"Queued {label} for {', '.join(recipients)}.")
+        self.start()
+        self._wake_event.set()
+        return True
+
+    def get_pending_count(self):
+        with self._lock:
+            return len(self._messages)
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._wake_event.clear()
+            self._thread = threading.Thread(target=self._worker_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops the worker. Undelivered messages stay in the outbox file for the next start."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+        self._wake_event.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    # --- WORKER ---
+    def _get_due_messages(self, now):
+        with self._lock:
+            due = [m for m in self._messages if m['next_attempt'] <= now]
+            if any(m.get('digest') for m in due):
+                due = self._merge_digests(due)
+            return due
+
+    def _merge_digests(self, due):
+        """
+        Replaces the due digest messages with one merged message per set of recipients
+        that received the same alerts. Caller holds self._lock. Returns the new due list.
+        """
+        digests = [m for m in due if m.get('digest')]
+        merged = []
+        for account in sorted({m['account'] for m in digests}):
+            account_messages = [m for m in digests if m['account'] == account]
+            # recipient -> the alerts it gets, in queue order
+            alerts_by_recipient = {}
+            for m in account_messages:
+                for recipient in m['recipients']:
+                    alerts_by_recipient.setdefault(recipient, []).append(m)
+            # Recipients with the same alerts share one message
+            recipients_by_alerts = {}
+            for recipient, alerts in alerts_by_recipient.items():
+                recipients_by_alerts.setdefault(tuple(a['id'] for a in alerts), []).append(recipient)
+
+            for alert_ids, recipients in recipients_by_alerts.items():
+                alerts = [m for m in account_messages if m['id'] in alert_ids]
+                if len(alerts) == 1:
+                    subject, body, label = alerts[0]['subject'], alerts[0]['body'], alerts[0]['label']
+                else:
+                    subject = f"KegLevel Alerts: {len(alerts)} notifications"
+                    body = DIGEST_SEPARATOR.join(f"{a['subject']}\n\n{a['body']}" for a in alerts)
+                    label = f"Alert Digest ({len(alerts)} alerts)"
+                merged.append({
+                    "id": uuid.uuid4().hex, "account": account, "subject": subject, "body": body,
+                    "recipients": recipients, "label": label, "created": min(a['created'] for a in alerts),
+                    "attempts": 0, "next_attempt": min(a['next_attempt'] for a in alerts),
+                    "last_error": None, "digest": False,
+                })
+
+        digest_ids = {m['id'] for m in digests}
+        self._messages = [m for m in self._messages if m['id'] not in digest_ids] + merged
+        self._save()
+        if merged:
+            print(f"NotificationOutbox: Merged {len(digests)} digest alert(s) into {len(merged)} message(s).")
+        return [m for m in due if m['id'] not in digest_ids] + merged
+
+    def _get_next_due_time(self):
+        with self._lock:
+            return min((m['next_attempt'] for m in self._messages), default=None)
+
+    def _worker_loop(self):
+        print("NotificationOutbox: Worker started.")
+        session = None  # (config key, smtplib.SMTP)
+
+        while self._running:
+            due = self._get_due_messages(time.time())
+            if due:
+                for message in due:
+                    if not self._running:
+                        break
+                    session = self._deliver(message, session)
+                continue
+
+            if session is not None:
+                # Linger with the session open; a message queued meanwhile reuses it
+                if self._wake_event.wait(SESSION_IDLE_SECONDS):
+                    self._wake_event.clear()
+                    continue
+                session = self._close_session(session)
+                continue
+
+            next_due = self._get_next_due_time()
+            timeout = None if next_due is None else max(0.0, next_due - time.time())
+            self._wake_event.wait(timeout)
+            self._wake_event.clear()
+
+        self._close_session(session)
+        print("NotificationOutbox: Worker stopped.")
+
+    def _open_session(self, smtp_cfg):
+        import smtplib
+        server = smtplib.SMTP(smtp_cfg['server'], int(smtp_cfg['port']), timeout=SMTP_TIMEOUT_SECONDS)
+        try:
+            server.starttls()
+            server.login(smtp_cfg['email'], smtp_cfg['password'])
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def _close_session(self, session):
+        if session is not None:
+            try:
+                session[1].quit()
+            except Exception:
+                session[1].close()
+        return None
+
+    def _deliver(self, message, session):
+        """Sends one message, (re)using 'session'. Returns the session to keep for the next message."""
+        import smtplib
+        smtp_cfg = self.get_smtp_config(message['account'])
+        if not smtp_cfg or not all([smtp_cfg.get('server'), smtp_cfg.get('port'), smtp_cfg.get('email'), smtp_cfg.get('password')]):
+            self._fail(message, "SMTP/sender details incomplete.")
+            return session
+
+        key = (smtp_cfg['server'], str(smtp_cfg['port']), smtp_cfg['email'], smtp_cfg['password'])
+        payload = f"Subject: {message['subject']}\n\n{message['body']}".encode('utf-8')
+        try:
+            if session is None or session[0] != key:
+                self._close_session(session)
+                session = (key, self._open_session(smtp_cfg))
+            try:
+                refused = session[1].sendmail(smtp_cfg['email'], message['recipients'], payload)
+            except smtplib.SMTPServerDisconnected:
+                # The server dropped the idle session; log in again once
+                session = (key, self._open_session(smtp_cfg))
+                refused = session[1].sendmail(smtp_cfg['email'], message['recipients'], payload)
+        except smtplib.SMTPAuthenticationError as e:
+            print(f"NotificationOutbox: SMTP auth details: {e}")
+            self._fail(message, "SMTP Auth Error (check email/password/app password).")
+            return self._close_session(session)
+        except smtplib.SMTPRecipientsRefused as e:
+            # Every recipient refused: the session itself is fine
+            self._fail(message, f"Recipients refused: {', '.join(e.recipients)}")
+            return session
+        except Exception as e:
+            self._fail(message, str(e) or type(e).__name__)
+            return self._close_session(session)
+
+        delivered = [r for r in message['recipients'] if r not in refused]
+        if delivered:
+            self._report(f"{message['label']} sent successfully to {', '.join(delivered)}.")
+        if refused:
+            # Only the refused recipients are retried
+            message['recipients'] = list(refused)
+            self._fail(message, f"Recipients refused: {', '.join(refused)}")
+        else:
+            self._complete(message)
+        return session
+
+    def _complete(self, message):
+        with self._lock:
+            self._messages = [m for m in self._messages if m['id'] != message['id']]
+            self._save()
+
+    def _fail(self, message, error):
+        now = time.time()
+        with self._lock:
+            message['attempts'] += 1
+            message['last_error'] = error
+            give_up = message['attempts'] >= MAX_ATTEMPTS or now - message['created'] >= MAX_MESSAGE_AGE_SECONDS
+            if give_up:
+                self._messages = [m for m in self._messages if m['id'] != message['id']]
+            else:
+                delay = min(RETRY_BASE_SECONDS * (2 ** (message['attempts'] - 1)), RETRY_MAX_SECONDS)
+                message['next_attempt'] = now + delay
+            self._save()
+
+        if give_up:
+            self._report(f"Error sending {message['label']}: {error} Giving up after {message['attempts']} attempt(s).")
+        else:
+            self._report(f"Error sending {message['label']}: {error} Retrying in {int(delay)}s.")
@@ -1,22 +1,36 @@
 # keglevel app
 # 
 # notification_service.py
-import smtplib
 import threading
 import time
 import math
 import sys
 from datetime import datetime
-import imaplib
-from email.mime.text import MIMEText
-import email
-import json
 import os
 
+from notification_outbox import NotificationOutbox, OUTBOX_FILE
+from alert_rules import AlertRuleEngine, ALERT_STATE_FILE, KEGERATOR_KEY, build_alert_rules
+from imap_idle import ImapIdleClient, ImapIdleError, IDLE_RENEW_SECONDS
+from job_scheduler import JobScheduler
+
+# NOTE: smtplib and imaplib (and the ssl/email stacks they pull in) are imported
+# inside the send/listen methods. Most installs never configure mail, so they
+# are kept off the startup path.
+
 LITERS_TO_GALLONS = 0.264172
 OZ_TO_LITERS = 0.0295735 # Added constant for oz to liter conversion
 ERROR_DEBOUNCE_INTERVAL_SECONDS = 3600
+UPDATE_CHECK_INTERVAL_SECONDS = 86400
+# The UI already runs a launch-time update check; the daily e-mail check waits
+# this long after the scheduler starts so the two do not race at startup.
+UPDATE_CHECK_INITIAL_DELAY_SECONDS = 600
+INITIAL_NOTIFICATION_DELAY_SECONDS = 60
+# A scheduled push that could not be queued is retried after this long
+PUSH_RETRY_SECONDS = 600
 STATUS_REQUEST_SUBJECT = "STATUS"
+# Backoff between IMAP reconnect attempts for the status request listener
+STATUS_RECONNECT_MIN_SECONDS = 10
+STATUS_RECONNECT_MAX_SECONDS = 600
 
 class NotificationService:
     def __init__(self, settings_manager, ui_manager):
@@ -25,8 +39,10 @@ class NotificationService:
         self.ui_manager_status_update_cb = None 
 
         self._scheduler_running = False
-        self._scheduler_thread = None
-        self._scheduler_event = threading.Event()
+        # --- JOBS: initial push, periodic push and update check share one scheduler ---
+        # (the status listener blocks in IDLE, so it has its own thread; see start_status_request_listener())
+        self.jobs = JobScheduler(name="notify-jobs")
+        self._push_job = None
         self.last_notification_sent_time = 0
         
         # --- NEW: Update Check Timer ---
@@ -34,9 +50,10 @@ class NotificationService:
         # -------------------------------
         
         # Status Request Variables
-        self._status_request_listener_thread = None
+        self._status_request_thread = None
+        self._status_request_state = None
         self._status_request_running = False
-        self._status_request_interval_seconds = 60 
+        self._status_request_interval_seconds = 60 # Poll interval when the server has no IDLE
         
         self._last_error_time = {
             "push": 0.0,
@@ -44,6 +61,46 @@ class NotificationService:
             "temperature": 0.0
         }
         
+        # --- CACHED SETTINGS (refreshed by SettingsManager change callbacks) ---
+        self._push_settings = self.settings_manager.get_push_notification_settings()
+        self._cond_notif_settings = self.settings_manager.get_conditional_notification_settings()
+        self.settings_manager.subscribe("push_notification_settings", self._on_push_settings_changed)
+        self.settings_manager.subscribe("conditional_notification_settings", self._on_conditional_settings_changed)
+        
+        # --- OUTBOX: every message is queued and sent by the outbox worker ---
+        self.outbox = NotificationOutbox(
+            os.path.join(self.settings_manager.get_data_dir(), OUTBOX_FILE),
+            self._get_smtp_config_for_account,
+            status_cb=self._report_status
+        )
+        
+        # --- ALERT RULES: low volume / temperature range, evaluated when the metrics change ---
+        self.alert_engine = AlertRuleEngine(os.path.join(self.settings_manager.get_data_dir(), ALERT_STATE_FILE))
+        if not self.alert_engine.state_loaded:
+            self._migrate_alert_state()
+        # The engine owns this state now; drop the legacy copy from settings.json
+        self.settings_manager.discard_legacy_alert_state()
+        self.alert_engine.register_action(
+            "low_volume", lambda rule, tap_index, liters: self.send_conditional_notification(
+                tap_index, liters, rule['threshold'], critical=rule.get('severity') == "critical")
+        )
+        self.alert_engine.register_action(
+            "temperature", lambda rule, key, temp_f: self.send_temperature_notification(
+                temp_f, critical=rule.get('severity') == "critical")
+        )
+        self.alert_engine.set_rules(build_alert_rules(self._cond_notif_settings))
+        
+    def _on_push_settings_changed(self, changed_paths):
+        self._push_settings = self.settings_manager.get_push_notification_settings()
+        # Re-run the push job so a new type/frequency takes effect immediately
+        if self._push_job is not None:
+            self.jobs.reschedule(self._push_job)
+
+    def _on_conditional_settings_changed(self, changed_paths):
+        self._cond_notif_settings = self.settings_manager.get_conditional_notification_settings()
+        # Thresholds or alert type may have changed
+        self.alert_engine.set_rules(build_alert_rules(self._cond_notif_settings))
+        
     def _get_interval_seconds(self, frequency_str):
         if frequency_str == "Hourly": return 3600
         elif frequency_str == "Daily": return 3600 * 24
@@ -83,22 +140,10 @@ class NotificationService:
     # --- NEW HELPER: Load workflow data from disk directly ---
     def _get_workflow_data_from_disk(self):
         """
-        Loads the process flow data and beverage names directly from JSON files,
-        without relying on the ProcessFlowApp being open.
+        Returns the process flow columns and beverage names without relying on the
+        ProcessFlowApp being open. The file is only re-read when it changed.
         """
-        base_dir = self.settings_manager.get_base_dir()
-        workflow_file = os.path.join(base_dir, "process_flow.json")
-        beverage_library = self.settings_manager.get_beverage_library()
-        beverage_map = {b['id']: b['name'] for b in beverage_library.get('beverages', []) if 'id' in b and 'name' in b}
-        
-        if os.path.exists(workflow_file):
-            try:
-                with open(workflow_file, 'r') as f:
-                    data = json.load(f)
-                    return data.get('columns', {}), beverage_map
-            except Exception:
-                return {}, beverage_map
-        return {}, beverage_map
+        return self.settings_manager.get_workflow_data_with_names()
     # --- END NEW HELPER ---
 
     def _format_message_body(self, tap_index=None, is_conditional=False, trigger_type="volume"):
@@ -203,13 +248,14 @@ class NotificationService:
             body_lines.append("--- Temperature Records ---")
             
             temp_log = self.ui_manager.temp_logic.get_temperature_log() if self.ui_manager.temp_logic else {}
+            keg_log = temp_log.get("keg", {})
             
             # Header
-            body_lines.append("Period | High | Low | Average")
-            body_lines.append("------|-----|----|---------")
+            body_lines.append("Period  | High | Low | Average")
+            body_lines.append("-------|-----|----|---------")
 
-            for period in ["day", "week", "month"]:
-                data = temp_log.get(period, {})
+            for period in ["day", "week", "month", "quarter", "year"]:
+                data = keg_log.get(period, {})
                 
                 # Format to nn.n (or "--")
                 high_val = f"{data.get('high'):.1f}" if data.get('high') is not None else "--"
@@ -218,7 +264,7 @@ class NotificationService:
                 
                 period_name = period.capitalize()
                 
-                body_lines.append(f"{period_name.ljust(6)}| {high_val.center(4)} | {low_val.center(3)} | {avg_val.center(7)}")
+                body_lines.append(f"{period_name.ljust(7)}| {high_val.center(4)} | {low_val.center(3)} | {avg_val.center(7)}")
 
             # --- Workflow Status ---
             body_lines.append("")
@@ -300,27 +346,47 @@ class NotificationService:
             return "\n".join(body_lines)
 
 
-    def _send_email_or_sms(self, subject, body, recipient_address, smtp_cfg, message_type_for_log):
-        status_message = f"Sending {message_type_for_log} to {recipient_address}..."
-        print(f"NotificationService: {status_message}")
-        if self.ui_manager_status_update_cb: self.ui_manager_status_update_cb(status_message)
-        try:
-            with smtplib.SMTP(smtp_cfg['server'], int(smtp_cfg['port'])) as server:
-                server.starttls(); server.login(smtp_cfg['email'], smtp_cfg['password'])
-                message = f"Subject: {subject}\n\n{body}"; server.sendmail(smtp_cfg['email'], recipient_address, message.encode('utf-8'))
-            status_message = f"{message_type_for_log} sent successfully to {recipient_address}."
-            print(f"NotificationService: {status_message}")
-            if self.ui_manager_status_update_cb: self.ui_manager_status_update_cb(status_message)
-            return True
-        except smtplib.SMTPAuthenticationError as e:
-            error_msg = "SMTP Auth Error (check email/password/app password)."
-            print(f"NotificationService: {error_msg} Details: {e}")
-            if self.ui_manager_status_update_cb: self.ui_manager_status_update_cb(f"Error {message_type_for_log}: Auth Failed")
-        except Exception as e:
-            error_msg = f"Error sending {message_type_for_log}: {e}"
-            print(f"NotificationService: {error_msg}")
-            if self.ui_manager_status_update_cb: self.ui_manager_status_update_cb(error_msg)
-        return False
+    def _report_status(self, message):
+        if self.ui_manager_status_update_cb: self.ui_manager_status_update_cb(message)
+
+    def _get_smtp_config_for_account(self, account):
+        """SMTP settings for an outbox account: "status" replies come from the RPi mailbox, everything else from the push settings."""
+        if account == "status":
+            status_settings = self.settings_manager.get_status_request_settings()
+            return {
+                'server': status_settings['smtp_server'], 'port': status_settings['smtp_port'],
+                'email': status_settings['rpi_email_address'], 'password': status_settings['rpi_email_password']
+            }
+        push_notif_settings = self.settings_manager.get_push_notification_settings()
+        return {
+            'server': push_notif_settings.get('smtp_server'), 'port': push_notif_settings.get('smtp_port'),
+            'email': push_notif_settings.get('server_email'), 'password': push_notif_settings.get('server_password')
+        }
+
+    def _queue_email_or_sms(self, subject, body, recipients, message_type_for_log, account="push", digest=False):
+        """
+        Hands a message to the outbox; returns True once queued. Delivery and retries happen on the outbox worker.
+        'digest' alerts wait out the configured digest window and go out merged with the alerts queued meanwhile.
+        """
+        digest_window_seconds = self._cond_notif_settings.get('digest_window_seconds', 0) if digest else 0
+        return self.outbox.enqueue(account, subject, body, recipients, message_type_for_log, digest_window_seconds=digest_window_seconds)
+
+    def _get_recipients(self, notification_type, push_notif_settings, error_type, error_context, is_push_notification):
+        """Returns (recipients, kinds) for "Email"/"Text"/"Both", reporting missing details."""
+        recipients, kinds = [], []
+        if notification_type in ["Email", "Both"]:
+            recipient_email = push_notif_settings.get('email_recipient')
+            if recipient_email:
+                recipients.append(recipient_email); kinds.append("Email")
+            else:
+                self._report_config_error(error_type, f"Email recipient not configured{error_context}.", is_push_notification)
+        if notification_type in ["Text", "Both"]:
+            sms_number, carrier_gateway = push_notif_settings.get('sms_number'), push_notif_settings.get('sms_carrier_gateway')
+            if sms_number and carrier_gateway:
+                recipients.append(f"{sms_number}{carrier_gateway}"); kinds.append("Text")
+            else:
+                self._report_config_error(error_type, f"SMS details not configured{error_context}.", is_push_notification)
+        return recipients, kinds
 
     def send_push_notification(self, is_initial_send=False):
         notif_settings = self.settings_manager.get_push_notification_settings()
@@ -334,46 +400,24 @@ class NotificationService:
 
         subject = "KegLevel Report"
         body = self._format_message_body()
-        smtp_config = {
-            'server': notif_settings.get('smtp_server'), 'port': notif_settings.get('smtp_port'),
-            'email': notif_settings.get('server_email'), 'password': notif_settings.get('server_password')
-        }
+        smtp_config = self._get_smtp_config_for_account("push")
         
         config_ok = all([smtp_config['server'], smtp_config['port'], smtp_config['email'], smtp_config['password']])
         if not config_ok:
             self._report_config_error("push", "SMTP/sender details incomplete.", True)
             return False
 
-        email_ok, sms_ok = None, None
-        
-        if notification_type in ["Email", "Both"]:
-            recipient_email = notif_settings.get('email_recipient')
-            if recipient_email:
-                email_ok = self._send_email_or_sms(subject, body, recipient_email, smtp_config, "Email")
-            else:
-                self._report_config_error("push", "Email recipient not configured.", True)
-                
-        if notification_type in ["Text", "Both"]:
-            sms_number, carrier_gateway = notif_settings.get('sms_number'), notif_settings.get('sms_carrier_gateway')
-            if sms_number and carrier_gateway:
-                sms_ok = self._send_email_or_sms(subject, body, f"{sms_number}{carrier_gateway}", smtp_config, "Text")
-            else:
-                self._report_config_error("push", "SMS details not configured.", True)
-
-        final_status_parts = []
-        if email_ok is not None: final_status_parts.append(f"Email {'OK' if email_ok else 'Failed'}")
-        if sms_ok is not None: final_status_parts.append(f"Text {'OK' if sms_ok else 'Failed'}")
+        # Email and SMS go out as one message with both recipients
+        recipients, kinds = self._get_recipients(notification_type, notif_settings, "push", "", True)
 
-        if final_status_parts:
-            summary_message = f"Last send: {'; '.join(final_status_parts)}"
-            if self.ui_manager_status_update_cb: self.ui_manager_status_update_cb(summary_message)
-            return email_ok or sms_ok
+        if recipients:
+            return self._queue_email_or_sms(subject, body, recipients, " + ".join(kinds))
         elif notification_type != "None":
             if self.ui_manager_status_update_cb:
                 self.ui_manager_status_update_cb("Push notification configured but no valid recipients/details.")
         return False
         
-    def send_conditional_notification(self, tap_index, current_liters, threshold_liters):
+    def send_conditional_notification(self, tap_index, current_liters, threshold_liters, critical=False):
         cond_notif_settings = self.settings_manager.get_conditional_notification_settings()
         notification_type = cond_notif_settings.get('notification_type', 'None')
         if notification_type == 'None':
@@ -386,173 +430,111 @@ class NotificationService:
         body = self._format_message_body(tap_index, is_conditional=True, trigger_type="volume")
         
         push_notif_settings = self.settings_manager.get_push_notification_settings()
-        smtp_config = {
-            'server': push_notif_settings.get('smtp_server'), 'port': push_notif_settings.get('smtp_port'),
-            'email': push_notif_settings.get('server_email'), 'password': push_notif_settings.get('server_password')
-        }
+        smtp_config = self._get_smtp_config_for_account("push")
         
         config_ok = all([smtp_config['server'], smtp_config['port'], smtp_config['email'], smtp_config['password']])
         if not config_ok:
             self._report_config_error("volume", "SMTP/sender details incomplete for Conditional Volume Notification.", False)
             return False
 
-        email_ok, sms_ok = None, None
-        if notification_type in ["Email", "Both"]:
-            recipient_email = push_notif_settings.get('email_recipient')
-            if recipient_email:
-                email_ok = self._send_email_or_sms(subject, body, recipient_email, smtp_config, f"Conditional Email for {tap_name}")
-            else:
-                self._report_config_error("volume", "Email recipient not configured for conditional notification.", False)
-                
-        if notification_type in ["Text", "Both"]:
-            sms_number, carrier_gateway = push_notif_settings.get('sms_number'), push_notif_settings.get('sms_carrier_gateway')
-            if sms_number and carrier_gateway:
-                sms_ok = self._send_email_or_sms(subject, body, f"{sms_number}{carrier_gateway}", smtp_config, f"Conditional Text for {tap_name}")
-            else:
-                self._report_config_error("volume", "SMS details not configured for conditional notification.", False)
+        recipients, kinds = self._get_recipients(notification_type, push_notif_settings, "volume", " for conditional notification", False)
 
-        if email_ok or sms_ok:
-            self.settings_manager.update_conditional_sent_status(tap_index, True)
-            print(f"NotificationService: Conditional notification sent successfully for tap {tap_index+1}.")
+        # Queued messages are retried until delivered, so the alert counts as sent once queued
+        if recipients and self._queue_email_or_sms(subject, body, recipients, f"Conditional {' + '.join(kinds)} for {tap_name}", digest=not critical):
+            print(f"NotificationService: Conditional notification queued for tap {tap_index+1}.")
             return True
         else:
-            print(f"NotificationService: Failed to send conditional notification for tap {tap_index+1}.")
+            print(f"NotificationService: Failed to queue conditional notification for tap {tap_index+1}.")
             return False
 
-    def check_and_send_temp_notification(self):
-        cond_notif_settings = self.settings_manager.get_conditional_notification_settings()
+    def send_temperature_notification(self, current_temp_f, critical=True):
+        """Queues the out-of-range temperature alert (fired by the 'temperature_range' alert rule)."""
+        cond_notif_settings = self._cond_notif_settings
         notification_type = cond_notif_settings.get('notification_type', 'None')
+        if notification_type == 'None':
+            return False
 
-        if notification_type == 'None': return
-
-        low_temp_f = cond_notif_settings.get('low_temp_f')
-        high_temp_f = cond_notif_settings.get('high_temp_f')
-        temp_sent_timestamps = cond_notif_settings.get('temp_sent_timestamps', [])
-
-        current_temp_f = self.ui_manager.temp_logic.last_known_temp_f
-
-        if current_temp_f is None or low_temp_f is None or high_temp_f is None:
-            return
-
-        is_outside_range = current_temp_f < low_temp_f or current_temp_f > high_temp_f
-
-        if is_outside_range:
-            cool_down_period_seconds = 2 * 3600 # 2 hours
-            last_sent_time = temp_sent_timestamps[0] if temp_sent_timestamps else 0
+        subject = "KegLevel Alert: Temperature Out Of Range!"
+        
+        body = self._format_message_body(is_conditional=True, trigger_type="temperature")
 
-            if (time.time() - last_sent_time) >= cool_down_period_seconds:
-                subject = "KegLevel Alert: Temperature Out Of Range!"
-                
-                body = self._format_message_body(is_conditional=True, trigger_type="temperature")
+        push_notif_settings = self._push_settings
+        smtp_config = self._get_smtp_config_for_account("push")
+        
+        config_ok = all([smtp_config['server'], smtp_config['port'], smtp_config['email'], smtp_config['password']])
+        if not config_ok:
+            self._report_config_error("temperature", "SMTP/sender details incomplete for Conditional Temp Notification.", False)
+            return False
 
-                push_notif_settings = self.settings_manager.get_push_notification_settings()
-                smtp_config = {
-                    'server': push_notif_settings.get('smtp_server'), 'port': push_notif_settings.get('smtp_port'),
-                    'email': push_notif_settings.get('server_email'), 'password': push_notif_settings.get('server_password')
-                }
-                
-                config_ok = all([smtp_config['server'], smtp_config['port'], smtp_config['email'], smtp_config['password']])
-                if not config_ok:
-                    self._report_config_error("temperature", "SMTP/sender details incomplete for Conditional Temp Notification.", False)
-                    return
-
-                email_ok, sms_ok = None, None
-                if notification_type in ["Email", "Both"]:
-                    recipient_email = push_notif_settings.get('email_recipient')
-                    if recipient_email:
-                        email_ok = self._send_email_or_sms(subject, body, recipient_email, smtp_config, "Conditional Temperature Email")
-                    else:
-                         self._report_config_error("temperature", "Email recipient not configured for conditional notification.", False)
-                
-                if notification_type in ["Text", "Both"]:
-                    sms_number, carrier_gateway = push_notif_settings.get('sms_number'), push_notif_settings.get('sms_carrier_gateway')
-                    if sms_number and carrier_gateway:
-                        sms_ok = self._send_email_or_sms(subject, body, f"{sms_number}{carrier_gateway}", smtp_config, "Conditional Temperature Text")
-                    else:
-                        self._report_config_error("temperature", "SMS details not configured for conditional notification.", False)
+        recipients, kinds = self._get_recipients(notification_type, push_notif_settings, "temperature", " for conditional notification", False)
 
+        if recipients and self._queue_email_or_sms(subject, body, recipients, f"Conditional Temperature {' + '.join(kinds)}", digest=not critical):
+            print(f"NotificationService: Conditional temperature notification queued ({current_temp_f:.1f} F).")
+            return True
+        return False
 
-                if email_ok or sms_ok:
-                    self.settings_manager.update_temp_sent_timestamp()
-                    print("NotificationService: Conditional temperature notification sent successfully.")
+    # --- ALERT RULES ---
+    def _migrate_alert_state(self):
+        """Carries the legacy sent flags / last temperature alert time from the settings into the alert rule state (first run only)."""
+        sent_notifications, temp_sent_timestamps = self.settings_manager.get_legacy_alert_state()
+        for tap_index, sent in enumerate(sent_notifications):
+            if sent:
+                self.alert_engine.seed_state("low_volume", tap_index, True, 0.0)
+        if temp_sent_timestamps:
+            self.alert_engine.seed_state("temperature_range", KEGERATOR_KEY, False, temp_sent_timestamps[0])
 
     # --- NEW: Status Request Logic ---
     
-    def _send_status_report(self, recipient_email, sender_email, smtp_config):
-        """Generates and sends the detailed status report email."""
+    def _send_status_report(self, recipient_email):
+        """Generates the detailed status report email and queues it (sent from the RPi mailbox)."""
         subject = "KegLevel Monitor Status"
         body = self._format_message_body(is_conditional=True, trigger_type="status_request")
         
-        return self._send_email_or_sms(
+        return self._queue_email_or_sms(
             subject, 
             body, 
-            recipient_email, 
-            smtp_config, 
-            "Status Request Reply"
+            [recipient_email], 
+            "Status Request Reply",
+            account="status"
         )
         
-    def _check_for_status_requests(self):
-        """Connects to IMAP and checks for the 'STATUS' command email."""
-        status_settings = self.settings_manager.get_status_request_settings()
-        
+    def _get_status_request_config(self, status_settings):
+        """Returns the status request settings if the listener can run, else None (reporting why)."""
         if not status_settings['enable_status_request']:
-            # Log only on the first check to reduce console spam
-            if self._status_request_running:
-                 print("NotificationService: Status Request Listener is disabled.")
-            return
+            return None
 
-        rpi_email = status_settings['rpi_email_address']
-        rpi_password = status_settings['rpi_email_password']
-        imap_server = status_settings['imap_server']
-        imap_port = status_settings['imap_port']
-        authorized_sender = status_settings['authorized_sender']
-        
-        required_config = all([rpi_email, rpi_password, imap_server, imap_port, authorized_sender])
+        required_config = all([
+            status_settings['rpi_email_address'], status_settings['rpi_email_password'],
+            status_settings['imap_server'], status_settings['imap_port'], status_settings['authorized_sender']
+        ])
         if not required_config:
             self._report_config_error("status_request", "IMAP/SMTP configuration incomplete for Status Request.", False)
-            return
-
-        try:
-            # Connect to IMAP server
-            mail = imaplib.IMAP4_SSL(imap_server, int(imap_port))
-            mail.login(rpi_email, rpi_password)
-            mail.select('inbox')
-
-            # Search for: UNSEEN messages, sent FROM the authorized sender, AND containing the STATUS string anywhere (TEXT).
-            search_query = f'(UNSEEN FROM "{authorized_sender}" TEXT "{STATUS_REQUEST_SUBJECT}")'
-            status, data = mail.search(None, search_query)
-            email_ids = data[0].split()
-
-            if email_ids:
-                print(f"NotificationService: Found {len(email_ids)} unread STATUS request emails. Replying...")
-                
-                # Process only the latest email
-                latest_email_id = email_ids[-1]
-                
-                smtp_config = {
-                    'server': status_settings['smtp_server'], 
-                    'port': status_settings['smtp_port'],
-                    'email': rpi_email, 
-                    'password': rpi_password
-                }
-
-                # Send the reply
-                send_ok = self._send_status_report(authorized_sender, rpi_email, smtp_config)
-                
-                if send_ok:
-                    # Mark the email as seen to prevent endless loops.
-                    mail.store(latest_email_id, '+FLAGS', '\\Seen')
-                    print("NotificationService: STATUS request processed and email marked as read.")
-                else:
-                    # Do NOT mark as read if reply failed.
-                    print("NotificationService: WARNING: Reply failed. STATUS email not marked as read.")
+            return None
+        return status_settings
 
-            mail.logout()
+    def _process_status_requests(self, mail, status_settings):
+        """Searches the open inbox for the 'STATUS' command email and queues one reply."""
+        authorized_sender = status_settings['authorized_sender']
+        
+        # Search for: UNSEEN messages, sent FROM the authorized sender, AND containing the STATUS string anywhere (TEXT).
+        search_query = f'(UNSEEN FROM "{authorized_sender}" TEXT "{STATUS_REQUEST_SUBJECT}")'
+        status, data = mail.search(None, search_query)
+        email_ids = data[0].split() if status == 'OK' and data and data[0] else []
 
-        except imaplib.IMAP4.error as e:
-            self._report_config_error("status_request", f"IMAP Error: Check IMAP/Port/Password/App Password. Error: {e}", False)
-        except Exception as e:
-            self._report_config_error("status_request", f"Unexpected Status Request Error: {e}", False)
+        if email_ids:
+            print(f"NotificationService: Found {len(email_ids)} unread STATUS request emails. Replying...")
+            
+            # Queue the reply (the outbox retries it until delivered)
+            send_ok = self._send_status_report(authorized_sender)
+            
+            if send_ok:
+                # Mark every request as seen: one reply answers them all, and the
+                # IDLE session would otherwise find the older ones again on the next mail.
+                mail.store(b",".join(email_ids).decode('ascii'), '+FLAGS', '\\Seen')
+                print("NotificationService: STATUS request processed and email marked as read.")
+            else:
+                # Do NOT mark as read if reply failed.
+                print("NotificationService: WARNING: Reply failed. STATUS email not marked as read.")
 
     # --- NEW: Check and Notify Update ---
     def _check_and_notify_update(self):
@@ -579,78 +561,161 @@ class NotificationService:
                 "3. Click 'Install Updates' and wait for the app to restart.\n"
             )
             
-            smtp_config = {
-                'server': notif_settings.get('smtp_server'), 'port': notif_settings.get('smtp_port'),
-                'email': notif_settings.get('server_email'), 'password': notif_settings.get('server_password')
-            }
+            smtp_config = self._get_smtp_config_for_account("push")
             recipient = notif_settings.get('email_recipient')
             
             if recipient and smtp_config['server']:
-                self._send_email_or_sms(subject, body, recipient, smtp_config, "Update Notification")
+                self._queue_email_or_sms(subject, body, [recipient], "Update Notification")
             else:
                 print("NotificationService: Cannot send update notification (Missing Recipient/SMTP).")
     # ------------------------------------
 
-    def _status_request_listener_loop(self):
-        """Dedicated thread loop for checking the status request email every minute."""
-        print("NotificationService: Status Request Listener loop started (1 minute interval).")
-        while self._status_request_running:
-            self._check_for_status_requests()
-            # Use event.wait for non-blocking sleep (allows quick shutdown)
-            self._scheduler_event.wait(self._status_request_interval_seconds) 
+    def _status_request_step(self, state):
+        """
+        One step of the status request listener thread. Returns the delay until the next
+        step, or None once stopped. With IDLE the step waits in IDLE (up to
+        IDLE_RENEW_SECONDS), so STATUS requests are answered within seconds; servers
+        without IDLE are polled every minute on the same session. Dropped sessions
+        reconnect with backoff.
+        """
+        import imaplib
+        status_settings = self._get_status_request_config(self.settings_manager.get_status_request_settings())
+        if status_settings is None:
+            state['client'] = self._close_imap_client(state['client'])
+            return self._status_request_interval_seconds
+        
+        client = state['client']
+        try:
+            if client is None:
+                client = ImapIdleClient(status_settings['imap_server'], status_settings['imap_port'],
+                                        status_settings['rpi_email_address'], status_settings['rpi_email_password'])
+                client.connect()
+                state['client'] = client
+                print(f"NotificationService: IMAP session open ({'IDLE' if client.supports_idle else 'polling'}).")
+                state['reconnect_delay'] = STATUS_RECONNECT_MIN_SECONDS
+                # Catch up on requests that arrived while disconnected
+                self._process_status_requests(client.mail, status_settings)
+                return 0 if client.supports_idle else self._status_request_interval_seconds
+            
+            if client.supports_idle:
+                new_mail = client.idle(IDLE_RENEW_SECONDS, should_stop=lambda: state['stopped'])
+            else:
+                new_mail = True
+            if state['stopped']:
+                return None
+            
+            # Keepalive between IDLE cycles; raises if the session was dropped
+            if client.noop():
+                new_mail = True
+            if new_mail:
+                self._process_status_requests(client.mail, status_settings)
+            return 0 if client.supports_idle else self._status_request_interval_seconds
+        
+        except (ImapIdleError, imaplib.IMAP4.abort, OSError) as e:
+            print(f"NotificationService: IMAP session lost ({e}). Reconnecting in {state['reconnect_delay']}s.")
+        except imaplib.IMAP4.error as e:
+            self._report_config_error("status_request", f"IMAP Error: Check IMAP/Port/Password/App Password. Error: {e}", False)
+        except Exception as e:
+            self._report_config_error("status_request", f"Unexpected Status Request Error: {e}", False)
+        
+        state['client'] = self._close_imap_client(client)
+        reconnect_delay = state['reconnect_delay']
+        state['reconnect_delay'] = min(reconnect_delay * 2, STATUS_RECONNECT_MAX_SECONDS)
+        return reconnect_delay
+
+    def _status_request_loop(self, state):
+        """Status listener thread: runs _status_request_step() until the listener is stopped."""
+        while not state['stopped']:
+            try:
+                next_delay = self._status_request_step(state)
+            except Exception as e:
+                print(f"NotificationService: Status request step failed: {e}")
+                next_delay = STATUS_RECONNECT_MIN_SECONDS
+            if next_delay:
+                state['wake'].wait(next_delay)
+        state['client'] = self._close_imap_client(state['client'])
+        print("NotificationService: Status Request Listener stopped.")
+
+    def _close_imap_client(self, client):
+        if client is not None:
+            client.close()
+        return None
             
     def start_status_request_listener(self):
-        """Starts the dedicated listener thread if enabled in settings."""
+        """Starts the listener thread if enabled in settings."""
         if not self._status_request_running:
             status_settings = self.settings_manager.get_status_request_settings()
             if status_settings['enable_status_request']:
                 self._status_request_running = True
-                self._status_request_listener_thread = threading.Thread(target=self._status_request_listener_loop, daemon=True)
-                self._status_request_listener_thread.start()
+                # Each start gets its own session state; a stopping thread may still be closing the old one
+                state = {"client": None, "reconnect_delay": STATUS_RECONNECT_MIN_SECONDS, "stopped": False,
+                         "wake": threading.Event()}
+                self._status_request_state = state
+                # Daemon thread: an IDLE wait must neither hold a scheduler worker nor delay exit
+                self._status_request_thread = threading.Thread(
+                    target=self._status_request_loop, args=(state,), name="status-requests", daemon=True)
+                self._status_request_thread.start()
                 print("NotificationService: Status Request Listener activated.")
         
     def stop_status_request_listener(self):
-        """Stops the dedicated listener thread."""
+        """Stops the listener thread; it closes its IMAP session when IDLE returns (within a second)."""
         if self._status_request_running:
             print("NotificationService: Stopping Status Request Listener...")
             self._status_request_running = False
-            self._scheduler_event.set()
-            if self._status_request_listener_thread and self._status_request_listener_thread.is_alive():
-                self._status_request_listener_thread.join(timeout=2)
-                print("NotificationService: Status Request Listener stopped.")
+            state = self._status_request_state
+            state['stopped'] = True
+            state['wake'].set()
+            self._status_request_thread = None
     
     # --- END NEW: Status Request Logic ---
 
-    # --- MISSING FUNCTION: Initial Notification Delay ---
-    def _send_initial_notification_after_delay(self):
-        if not self._scheduler_running: return
-
-        print("NotificationService: Initial notification delay started (1 minute)...")
-        woke_early = self._scheduler_event.wait(timeout=60)
-
-        if not self._scheduler_running or (woke_early and not self._scheduler_running):
-            print("NotificationService: Initial notification cancelled; scheduler stopped during delay.")
-            return
+    # --- SCHEDULER JOBS ---
+    def _send_initial_notification(self):
+        print("NotificationService: Initial notification delay complete. Attempting send...")
+        if self.send_push_notification(is_initial_send=True):
+            self.last_notification_sent_time = time.time()
+            print("NotificationService: Initial push notification attempt processed, last_sent_time updated.")
+        return None
+
+    def _push_notification_job(self):
+        """Sends the periodic push notification when due. Returns the delay until the next one."""
+        current_settings = self._push_settings
+        notification_type = current_settings.get('notification_type', 'None')
+        frequency_str = current_settings.get('frequency', 'Daily')
+        if notification_type == 'None':
+            # Re-armed by _on_push_settings_changed() when push is turned on
+            return None
+        
+        interval_seconds = self._get_interval_seconds(frequency_str)
+        now = time.time()
+        if now >= self.last_notification_sent_time + interval_seconds:
+            print(f"NotificationService: Scheduled time to send push notification (Frequency: {frequency_str}).")
+            if self.send_push_notification():
+                self.last_notification_sent_time = now
+            else:
+                return PUSH_RETRY_SECONDS
+        return max(1.0, (self.last_notification_sent_time + interval_seconds) - time.time())
 
-        if self._scheduler_running:
-            print("NotificationService: Initial notification delay complete. Attempting send...")
-            if self.send_push_notification(is_initial_send=True):
-                self.last_notification_sent_time = time.time()
-                print("NotificationService: Initial push notification attempt processed, last_sent_time updated.")
-    # --- END MISSING FUNCTION ---
+    def _update_check_job(self):
+        self.last_update_check_time = time.time()
+        self._check_and_notify_update()
+        return UPDATE_CHECK_INTERVAL_SECONDS
 
     def start_scheduler(self):
         if not self._scheduler_running:
             self._scheduler_running = True
-            self._scheduler_event.clear()
             self.last_notification_sent_time = time.time()
-
-            initial_send_thread = threading.Thread(target=self._send_initial_notification_after_delay, daemon=True)
-            initial_send_thread.start()
-
-            if self._scheduler_thread is None or not self._scheduler_thread.is_alive():
-                self._scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
-                self._scheduler_thread.start()
+            self.jobs.start()
+            
+            if self.last_update_check_time == 0:
+                update_check_delay = UPDATE_CHECK_INITIAL_DELAY_SECONDS
+            else:
+                update_check_delay = max(0.0, self.last_update_check_time + UPDATE_CHECK_INTERVAL_SECONDS - time.time())
+            
+            self.jobs.add_job("initial-push", self._send_initial_notification, INITIAL_NOTIFICATION_DELAY_SECONDS)
+            self._push_job = self.jobs.add_job("push", self._push_notification_job, error_delay=PUSH_RETRY_SECONDS)
+            self.jobs.add_job("update-check", self._update_check_job, update_check_delay,
+                              error_delay=UPDATE_CHECK_INTERVAL_SECONDS)
             print("NotificationService: Scheduler started. Initial notification attempt will be after 1 min if configured.")
         else:
             print("NotificationService: Scheduler already running.")
@@ -659,63 +724,27 @@ class NotificationService:
         # --- NEW: Start Status Request Listener when Scheduler starts ---
         self.start_status_request_listener()
         # --- END NEW ---
-
-    def _scheduler_loop(self):
-        print("NotificationService: Scheduler loop started.")
-        current_settings = {} 
-        notification_type = 'None'
-        frequency_str = 'Daily'
-        
-        while self._scheduler_running:
-            current_settings = self.settings_manager.get_push_notification_settings() 
-            notification_type = current_settings.get('notification_type', 'None')
-            frequency_str = current_settings.get('frequency', 'Daily')
-            
-            now = time.time()
-            
-            # --- NEW: Check for Updates (Every 24h) ---
-            if now - self.last_update_check_time > 86400: # 24 hours
-                # Run in background to avoid blocking
-                threading.Thread(target=self._check_and_notify_update, daemon=True).start()
-                self.last_update_check_time = now
-            # ------------------------------------------
-            
-            if notification_type == 'None':
-                # Even if push is off, we still sleep and loop for the Update Check
-                wait_time = 600
-            else:
-                interval_seconds = self._get_interval_seconds(frequency_str)
-
-                if now >= self.last_notification_sent_time + interval_seconds:
-                    print(f"NotificationService: Scheduled time to send push notification (Frequency: {frequency_str}).")
-                    if self.send_push_notification():
-                        self.last_notification_sent_time = now
-
-                time_to_next_scheduled = (self.last_notification_sent_time + interval_seconds) - time.time()
-                wait_time = max(10.0, min(time_to_next_scheduled if time_to_next_scheduled > 0 else interval_seconds, 600.0))
-
-            woke_early = self._scheduler_event.wait(timeout=wait_time)
-            
-            if woke_early:
-                if not self._scheduler_running: break
-                self._scheduler_event.clear()
-                continue 
-                
-        print("NotificationService: Scheduler loop stopped.")
+        
+        self.alert_engine.start()
+        
+        # Deliver anything left in the outbox by the previous run
+        if self.outbox.get_pending_count():
+            self.outbox.start()
 
     def stop_scheduler(self):
         if self._scheduler_running:
             print("NotificationService: Stopping scheduler...")
             self._scheduler_running = False
-            self._scheduler_event.set()
             
             # --- NEW: Stop Status Request Listener when Scheduler stops ---
             self.stop_status_request_listener()
             # --- END NEW ---
             
-            if self._scheduler_thread and self._scheduler_thread.is_alive():
-                self._scheduler_thread.join(timeout=5)
-                if self._scheduler_thread.is_alive(): print("NotificationService: Scheduler thread did not stop gracefully.")
+            self.alert_engine.stop()
+            self.outbox.stop()
+            # Drops pending jobs; waits briefly for running ones
+            self.jobs.stop()
+            self._push_job = None
             print("NotificationService: Scheduler stopped.")
         else: print("NotificationService: Scheduler not running.")
 
@@ -728,7 +757,8 @@ class NotificationService:
         if self._scheduler_running:
             print("NotificationService: Settings changed. Forcing scheduler to re-evaluate timings.")
             self.last_notification_sent_time = time.time()
-            self._scheduler_event.set()
+            if self._push_job is not None:
+                self.jobs.reschedule(self._push_job)
             
             # --- FIX: Do NOT restart the listener here. ---
             # The listener's state should be managed ONLY by
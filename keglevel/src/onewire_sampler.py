@@ -0,0 +1,162 @@
+# keglevel app
+#
+# onewire_sampler.py
+import glob
+import os
+import threading
+import time
+
+W1_DEVICES_DIR = "/sys/bus/w1/devices"
+DS18B20_PREFIX = "28-"
+
+# A DS18B20 needs up to 750 ms to convert at 12-bit resolution
+CONVERSION_TIMEOUT_SECONDS = 1.5
+BULK_POLL_SECONDS = 0.05
+
+# w1_slave CRC retries (the sensor occasionally answers with a bad CRC)
+READ_RETRIES = 3
+READ_RETRY_DELAY_SECONDS = 0.2
+
+MAX_READ_WORKERS = 4
+
+
+def detect_ds18b20_sensors(devices_dir=W1_DEVICES_DIR):
+    """Returns the IDs of the DS18B20 probes present on the 1-Wire bus."""
+    return sorted(os.path.basename(f) for f in glob.glob(os.path.join(devices_dir, DS18B20_PREFIX + '*')))
+
+
+def parse_w1_slave(lines):
+    """Returns the temperature in C from w1_slave lines, or None if the CRC check failed."""
+    if len(lines) < 2 or lines[0].strip()[-3:] != 'YES':
+        return None
+    equals_pos = lines[1].find('t=')
+    if equals_pos == -1:
+        return None
+    return float(lines[1][equals_pos+2:]) / 1000.0
+
+
+class OneWireSampler:
+    """
+    Samples DS18B20 probes with one bus-wide conversion per sample.
+
+    sample() writes 'trigger' to each bus master's therm_bulk_read (kernel 5.10+), so
+    every probe converts at the same time, then reads the probes' w1_slave files on a
+    small thread pool. Total sampling time stays around one conversion however many
+    probes are attached. Without bulk support each read converts on its own, still
+    in parallel. Results are cached with their timestamp (see get_cached()).
+
+    'devices_dir' can point at a fake sysfs tree (28-*/w1_slave files and optional
+    w1_bus_master*/therm_bulk_read files) for testing off the Pi.
+    """
+
+    def __init__(self, devices_dir=W1_DEVICES_DIR, max_workers=MAX_READ_WORKERS):
+        self.devices_dir = devices_dir
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._cache = {}  # sensor_id -> (epoch, temp_c)
+        # therm_bulk_read files that refused the trigger (root-only 0644 for a normal user);
+        # those masters fall back to per-probe conversions without retrying every sample
+        self._bulk_unsupported = set()
+
+    def detect_sensors(self):
+        return detect_ds18b20_sensors(self.devices_dir)
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Loaded on first use; keeps concurrent.futures off the startup path
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="w1-read")
+        return self._executor
+
+    def _trigger_bulk_conversion(self):
+        """Starts a conversion on every bus master that supports it. Returns the triggered files."""
+        triggered = []
+        for bulk_file in glob.glob(os.path.join(self.devices_dir, "w1_bus_master*", "therm_bulk_read")):
+            if bulk_file in self._bulk_unsupported:
+                continue
+            try:
+                with open(bulk_file, 'w') as f:
+                    f.write("trigger\n")
+                triggered.append(bulk_file)
+            except OSError as e:
+                self._bulk_unsupported.add(bulk_file)
+                print(f"OneWireSampler: Bulk conversion not available on {bulk_file} ({e}); using per-probe reads.")
+        return triggered
+
+    def _wait_for_conversion(self, bulk_files):
+        # therm_bulk_read reads -1 while converting and 1 once results are ready
+        deadline = time.monotonic() + CONVERSION_TIMEOUT_SECONDS
+        pending = list(bulk_files)
+        while pending and time.monotonic() < deadline:
+            still_pending = []
+            for bulk_file in pending:
+                try:
+                    with open(bulk_file, 'r') as f:
+                        if f.read().strip() == "-1":
+                            still_pending.append(bulk_file)
+                except OSError:
+                    pass
+            pending = still_pending
+            if pending:
+                time.sleep(BULK_POLL_SECONDS)
+
+    def _read_sensor(self, sensor_id):
+        """Reads one probe (Returns C), retrying on CRC failures."""
+        device_file = os.path.join(self.devices_dir, sensor_id, 'w1_slave')
+        if not os.path.exists(device_file):
+            print(f"OneWireSampler: Sensor file not found for ID {sensor_id}.")
+            return None
+
+        try:
+            for attempt in range(READ_RETRIES + 1):
+                with open(device_file, 'r') as f:
+                    temp_c = parse_w1_slave(f.readlines())
+                if temp_c is not None:
+                    return temp_c
+                if attempt < READ_RETRIES:
+                    time.sleep(READ_RETRY_DELAY_SECONDS)
+        except Exception as e:
+            print(f"OneWireSampler: Error reading temperature from sensor {sensor_id}: {e}")
+        return None
+
+    def sample(self, sensor_ids):
+        """
+        Converts and reads 'sensor_ids' together. Returns {sensor_id: temp_c or None}
+        and updates the cache for every probe that answered.
+        """
+        sensor_ids = [s for s in sensor_ids if s and s != 'unassigned']
+        if not sensor_ids:
+            return {}
+
+        bulk_files = self._trigger_bulk_conversion()
+        if bulk_files:
+            self._wait_for_conversion(bulk_files)
+
+        if len(sensor_ids) == 1:
+            temps = [self._read_sensor(sensor_ids[0])]
+        else:
+            temps = list(self._get_executor().map(self._read_sensor, sensor_ids))
+
+        now = time.time()
+        results = dict(zip(sensor_ids, temps))
+        with self._lock:
+            for sensor_id, temp_c in results.items():
+                if temp_c is not None:
+                    self._cache[sensor_id] = (now, temp_c)
+        return results
+
+    def get_cached(self, sensor_id, max_age_seconds=None):
+        """Returns (epoch, temp_c) of the last good reading, or None if missing or older than max_age_seconds."""
+        with self._lock:
+            entry = self._cache.get(sensor_id)
+        if entry is None:
+            return None
+        if max_age_seconds is not None and time.time() - entry[0] > max_age_seconds:
+            return None
+        return entry
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
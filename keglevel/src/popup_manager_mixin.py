@@ -1,9 +1,8 @@
 # keglevel app
 #
 # popup_manager_mixin.py
-import shutil # required for recursive Uninstall deletion
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
+from tkinter import ttk, messagebox
 import tkinter.font as tkfont 
 import math
 import time
@@ -14,10 +13,14 @@ import subprocess
 import sys      
 import re
 import threading
-import webbrowser
-import csv
-from main import manage_autostart_file
 
+# --- LAZY IMPORTS ---
+# shutil, csv, webbrowser, scrolledtext, process_flow and main.manage_autostart_file
+# are only needed by rarely opened popups. They are imported inside the methods
+# that use them so they stay off the startup path (see import_budget.py).
+
+
+from asset_cache import AssetCache, parse_help_text
 
 # FIX: Import UNASSIGNED_KEG_ID and UNASSIGNED_BEVERAGE_ID
 try:
@@ -26,16 +29,6 @@ except ImportError:
     UNASSIGNED_KEG_ID = "unassigned_keg_id"
     UNASSIGNED_BEVERAGE_ID = "unassigned_beverage_id"
     
-# --- NEW: Import ProcessFlowApp for in-process hosting ---
-# Removing mock for ProcessFlowApp is not feasible here as it needs to run 
-# in the environment if the import fails, so the conditional import is necessary.
-try:
-    from process_flow import ProcessFlowApp 
-except ImportError:
-    class ProcessFlowApp:
-        def __init__(self, root_window, settings_manager, base_dir, parent_root=None): pass
-        def run(self): print("ProcessFlowApp mock run.")
-
 # --- NEW: Import platform flag from sensor_logic ---\
 # FIX: IS_RASPBERRY_PI_MODE is still needed, keep import.
 from sensor_logic import IS_RASPBERRY_PI_MODE
@@ -45,6 +38,8 @@ LITERS_TO_GALLONS = 0.264172
 KG_TO_LB = 2.20462
 # CONSTANT: Ratio of US Fluid Ounces to Liters
 OZ_TO_LITERS = 0.0295735
+# Alert digest window choices (label, seconds) for conditional notifications
+ALERT_DIGEST_OPTIONS = [("Off (send at once)", 0), ("2 minutes", 120), ("5 minutes", 300), ("15 minutes", 900)]
 
 # --- MIXIN CLASS: Contains all settings/popup logic ---
 class PopupManagerMixin:    
@@ -88,6 +83,7 @@ class PopupManagerMixin:
         self.system_settings_ui_mode_var = tk.StringVar()
         self.system_settings_temp_unit_label = tk.StringVar() 
         self.sensor_ambient_var = tk.StringVar()
+        self.system_settings_temp_sampling_var = tk.StringVar()
         
         self.system_settings_autostart_var = tk.BooleanVar() 
         self.system_settings_launch_workflow_var = tk.BooleanVar() 
@@ -130,6 +126,8 @@ class PopupManagerMixin:
         self.msg_conditional_threshold_label_text = tk.StringVar()
         self.msg_conditional_low_temp_var = tk.StringVar()
         self.msg_conditional_high_temp_var = tk.StringVar()
+        self.msg_conditional_digest_var = tk.StringVar()
+        self.msg_conditional_temp_immediate_var = tk.BooleanVar(value=True)
         
         # --- Flow Calibration Variables ---
         self.flow_cal_current_factors = [tk.StringVar() for _ in range(self.num_sensors)]
@@ -156,6 +154,9 @@ class PopupManagerMixin:
         self.show_eula_checkbox_var = tk.BooleanVar()
         self.support_qr_image = None
         
+        # --- Decoded image / parsed help cache (created on first use) ---
+        self._asset_cache = None
+        
     # --- NEW: Helper for checking git status (Used by UI and NotificationService) ---
     def check_update_available(self):
         """
@@ -249,6 +250,11 @@ class PopupManagerMixin:
             self.msg_conditional_low_temp_var.set(f"{low_temp_c:.1f}" if low_temp_c is not None else "")
             self.msg_conditional_high_temp_var.set(f"{high_temp_c:.1f}" if high_temp_f is not None else "")
 
+        digest_window = cond_notif_settings.get('digest_window_seconds', 0)
+        digest_label = next((label for label, seconds in ALERT_DIGEST_OPTIONS if seconds == digest_window), None)
+        self.msg_conditional_digest_var.set(digest_label or f"{digest_window} seconds")
+        self.msg_conditional_temp_immediate_var.set(cond_notif_settings.get('temp_alert_severity', "critical") == "critical")
+
         # 3. Status Request Logic
         self.status_req_enable_var.set(status_req_settings.get('enable_status_request', False))
         self.status_req_sender_var.set(status_req_settings.get('authorized_sender', ''))
@@ -341,6 +347,16 @@ class PopupManagerMixin:
         self.cond_high_entry.pack(side="left")
         ttk.Label(self.cond_temp_frame, text=f"{unit_char}").pack(side="left", padx=(5, 5))
 
+        # Digest Row (volume alerts, and temperature alerts unless they are sent at once)
+        self.cond_digest_frame = ttk.Frame(cond_options_frame); self.cond_digest_frame.pack(fill="x", pady=2)
+        ttk.Label(self.cond_digest_frame, text="Batch alerts:", width=24).pack(side="left", padx=(5,0))
+        self.cond_digest_dropdown = ttk.Combobox(self.cond_digest_frame, textvariable=self.msg_conditional_digest_var,
+                                                 values=[label for label, _ in ALERT_DIGEST_OPTIONS], state="readonly", width=20)
+        self.cond_digest_dropdown.pack(side="left")
+        self.cond_temp_immediate_check = ttk.Checkbutton(cond_options_frame, text="Send temperature alerts at once (not batched)",
+                                                         variable=self.msg_conditional_temp_immediate_var)
+        self.cond_temp_immediate_check.pack(anchor='w', padx=(5, 0), pady=2)
+
         # 4. Update Notifications (NEW)
         self.update_check = ttk.Checkbutton(outbound_frame, text="Notify when an update is available", variable=self.msg_notify_on_update_var)
         self.update_check.pack(anchor='w', pady=(0, 2))
@@ -464,6 +480,18 @@ class PopupManagerMixin:
 
     # --- Popup Implementations ---
 
+    def _get_process_flow_app_class(self):
+        """Imports ProcessFlowApp on first use so process_flow stays off the startup path."""
+        # Removing mock for ProcessFlowApp is not feasible here as it needs to run 
+        # in the environment if the import fails, so the conditional import is necessary.
+        try:
+            from process_flow import ProcessFlowApp
+        except ImportError:
+            class ProcessFlowApp:
+                def __init__(self, root_window, settings_manager, base_dir, parent_root=None): pass
+                def run(self): print("ProcessFlowApp mock run.")
+        return ProcessFlowApp
+
     def _open_workflow_popup(self):
         try:
             workflow_window = tk.Toplevel(self.root)
@@ -483,6 +511,7 @@ class PopupManagerMixin:
                 workflow_window.geometry(f"{W}x{H}+{X}+{Y}")
                 workflow_window.resizable(False, False)
 
+            ProcessFlowApp = self._get_process_flow_app_class()
             self.workflow_app = ProcessFlowApp(
                 root_window=workflow_window, 
                 settings_manager=self.settings_manager, 
@@ -520,6 +549,7 @@ class PopupManagerMixin:
         status_popup.grab_set()
 
         # Create a ScrolledText widget
+        from tkinter import scrolledtext
         text_area = scrolledtext.ScrolledText(status_popup, wrap=tk.WORD, height=20, width=80)
         text_area.pack(padx=10, pady=10, fill="both", expand=True)
         text_area.insert(tk.END, "Starting update check...\n")
@@ -632,6 +662,7 @@ class PopupManagerMixin:
         status_popup.grab_set()
         
         # 2. Text Area for Logging
+        from tkinter import scrolledtext
         text_area = scrolledtext.ScrolledText(status_popup, wrap=tk.WORD, height=20, width=80)
         text_area.pack(padx=10, pady=10, fill="both", expand=True)
         
@@ -992,6 +1023,7 @@ class PopupManagerMixin:
         
         if os.path.exists(log_file):
             try:
+                import csv
                 with open(log_file, 'r', encoding='utf-8') as f:
                     reader = csv.reader(f)
                     header = next(reader, None) # Skip header
@@ -1117,6 +1149,7 @@ class PopupManagerMixin:
         def clear_log_action():
             if messagebox.askokcancel("Confirm Clear", "This clears the entire log and cannot be undone.\n\nAre you sure?", parent=popup):
                 try:
+                    import csv
                     open(log_file, 'w').close() # Truncate file
                     with open(log_file, 'w', newline='', encoding='utf-8') as f:
                         csv.writer(f).writerow(["Timestamp", "Tap Name", "Keg Title", "Beverage Name", "Volume Poured (L)", "Volume Remaining (L)", "Duration (s)"])
@@ -1235,7 +1268,11 @@ class PopupManagerMixin:
         ttk.Separator(frame, orient='horizontal').pack(fill='x', pady=5)
 
         # --- MOVED: Support / Donation Section ---
-        self._load_support_image()
+        self._load_support_image(owner=str(popup))
+        
+        def on_about_destroy():
+            self.support_qr_image = None
+        self._bind_asset_release(popup, on_release=on_about_destroy)
         
         support_frame = ttk.Frame(frame)
         support_frame.pack(fill="x", pady=10)
@@ -1320,6 +1357,7 @@ class PopupManagerMixin:
         eula_frame = ttk.LabelFrame(main_frame, text="Terms and Conditions", padding=10)
         eula_frame.pack(fill="both", expand=True, pady=(0, 15))
         
+        from tkinter import scrolledtext
         eula_text_widget = scrolledtext.ScrolledText(eula_frame, height=10, wrap="word", relief="flat")
         eula_text_widget.pack(fill="both", expand=True)
         
@@ -1578,17 +1616,12 @@ class PopupManagerMixin:
         default_bev = {'id': str(uuid.uuid4()), 'name': '', 'bjcp': '', 'abv': '', 'ibu': '', 'srm': '', 'description': ''}
         data = bev_data.copy() if bev_data else default_bev
         
-        # Pre-load BJCP
-        styles = self.settings_manager.load_bjcp_styles()
-        style_list = []
-        style_map = {}
-        for s in styles:
-            display = f"{s.get('code')} {s.get('name')}"
-            style_list.append(display)
-            style_map[display] = s
+        # Pre-load BJCP (indexed; see beverage_search.py)
+        style_index = self.settings_manager.get_beverage_search_index()
+        style_list = [s['label'] for s in style_index.get_styles()]
             
         current_bjcp = data.get('bjcp', '')
-        if current_bjcp and current_bjcp not in style_map: current_bjcp = "" # Strict check
+        if current_bjcp and style_index.get_style(current_bjcp) is None: current_bjcp = "" # Strict check
         
         temp_vars = {
             'id': tk.StringVar(value=data.get('id')),
@@ -1609,8 +1642,12 @@ class PopupManagerMixin:
         
         f_style = ttk.Frame(form_frame); f_style.pack(fill="x", pady=5)
         ttk.Label(f_style, text="BJCP Style:", width=15, anchor="w").pack(side="left")
-        cb = ttk.Combobox(f_style, textvariable=temp_vars['bjcp'], values=style_list, state="readonly")
+        cb = ttk.Combobox(f_style, textvariable=temp_vars['bjcp'], values=style_list)
         cb.pack(side="left", padx=5, fill="x", expand=True)
+        # --- NEW: As-you-type filtering (code, name prefix or near spelling); Save checks the pick ---
+        from beverage_search import attach_combobox_filter
+        attach_combobox_filter(cb, lambda text: [s['label'] for s in style_index.search(text, kinds=("style",))],
+                               lambda: style_list)
         
         # --- REWORKED VITAL STATISTICS ROW ---
         f_stats = ttk.Frame(form_frame); f_stats.pack(fill="x", pady=5)
@@ -1643,9 +1680,9 @@ class PopupManagerMixin:
         
         # Auto-fill Desc
         def on_style(e):
-            sel = cb.get()
-            if sel in style_map and not txt.get("1.0", "end").strip():
-                txt.insert("1.0", style_map[sel].get('impression', ''))
+            style = style_index.get_style(cb.get())
+            if style and not txt.get("1.0", "end").strip():
+                txt.insert("1.0", style.get('impression', ''))
         cb.bind("<<ComboboxSelected>>", on_style)
 
         # Footer
@@ -1666,10 +1703,19 @@ class PopupManagerMixin:
             ibu = int(vars['ibu'].get()) if vars['ibu'].get().strip() else None
             srm = int(vars['srm'].get()) if vars['srm'].get().strip() else None
             
+            # The style box accepts typing; keep only real BJCP styles (strict check)
+            bjcp = vars['bjcp'].get().strip()
+            if bjcp:
+                style = self.settings_manager.get_beverage_search_index().resolve(bjcp, kinds=("style",))
+                if style is None:
+                    messagebox.showerror("Error", f"'{bjcp}' does not match a single BJCP style.\nPick one from the list.")
+                    return
+                bjcp = style['label']
+            
             new_data = {
                 'id': vars['id'].get(),
                 'name': name,
-                'bjcp': vars['bjcp'].get(),
+                'bjcp': bjcp,
                 'abv': vars['abv'].get(),
                 'ibu': ibu,
                 'srm': srm,
@@ -3149,6 +3195,13 @@ class PopupManagerMixin:
         self.sensor_ambient_var.set(self.settings_manager.get_system_settings().get('ds18b20_ambient_sensor', ''))
         ttk.Combobox(form_frame, textvariable=self.sensor_ambient_var, values=sensor_options, state="readonly", width=30).grid(row=row_idx, column=1, padx=5, pady=5, sticky="ew"); row_idx += 1
 
+        # --- NEW: Sampling Mode ---
+        sampling = self.settings_manager.get_temp_sampling_settings()
+        sampling_options = ["Standard (every 5 min)", f"Fast (every {sampling['temp_fast_interval_seconds']} s, smoothed)"]
+        ttk.Label(form_frame, text="Temperature Sampling:").grid(row=row_idx, column=0, padx=5, pady=5, sticky="w")
+        self.system_settings_temp_sampling_var.set(sampling_options[1] if sampling['temp_sampling_mode'] == "fast" else sampling_options[0])
+        ttk.Combobox(form_frame, textvariable=self.system_settings_temp_sampling_var, values=sampling_options, state="readonly", width=30).grid(row=row_idx, column=1, padx=5, pady=5, sticky="ew"); row_idx += 1
+
         form_frame.grid_columnconfigure(1, weight=1)
 
         buttons_frame = ttk.Frame(popup, padding="10"); buttons_frame.pack(fill="x", side="bottom")
@@ -3157,7 +3210,7 @@ class PopupManagerMixin:
         ttk.Button(buttons_frame, text="Help", width=8, command=lambda: self._open_help_popup("system_settings")).pack(side="right", padx=5)
         ttk.Button(buttons_frame, text="Dev Tools", width=10, command=lambda: self._open_dev_warning_popup(popup)).pack(side="left", padx=5)
 
-        self._center_popup(popup, 450, 480)
+        self._center_popup(popup, 450, 510)
         popup.grab_set()
         if ui_mode_dropdown: ui_mode_dropdown.focus_set()
 
@@ -3189,11 +3242,13 @@ class PopupManagerMixin:
         self.settings_manager.save_display_units(new_unit_setting)
         self.settings_manager.save_ui_mode(new_ui_mode_setting) 
         self.settings_manager.set_ds18b20_ambient_sensor(new_ambient_sensor_id)
+        self.settings_manager.save_temp_sampling_mode("fast" if self.system_settings_temp_sampling_var.get().startswith("Fast") else "standard")
         
         old_autostart_enabled = self.settings_manager.get_autostart_enabled()
         self.settings_manager.save_autostart_enabled(new_autostart_enabled)
         
         if IS_RASPBERRY_PI_MODE and old_autostart_enabled != new_autostart_enabled:
+            from main import manage_autostart_file
             action = 'add' if new_autostart_enabled else 'remove'
             manage_autostart_file(action)
         
@@ -3465,6 +3520,8 @@ class PopupManagerMixin:
             if hasattr(self, 'cond_vol_entry'): self.cond_vol_entry.config(state=cond_state)
             if hasattr(self, 'cond_low_entry'): self.cond_low_entry.config(state=cond_state)
             if hasattr(self, 'cond_high_entry'): self.cond_high_entry.config(state=cond_state)
+            if hasattr(self, 'cond_digest_dropdown'): self.cond_digest_dropdown.config(state='readonly' if cond_enabled else 'disabled')
+            if hasattr(self, 'cond_temp_immediate_check'): self.cond_temp_immediate_check.config(state=cond_state)
 
             # 4. Inbound Control Section
             req_state = 'normal' if req_enabled else 'disabled'
@@ -3557,8 +3614,8 @@ class PopupManagerMixin:
                 "threshold_liters": cond_threshold_liters,
                 "low_temp_f": low_temp_f, 
                 "high_temp_f": high_temp_f,
-                "sent_notifications": self.settings_manager.get_conditional_notification_settings().get("sent_notifications", [False] * self.num_sensors),
-                "temp_sent_timestamps": self.settings_manager.get_conditional_notification_settings().get("temp_sent_timestamps", []),
+                "digest_window_seconds": dict(ALERT_DIGEST_OPTIONS).get(self.msg_conditional_digest_var.get(), self.settings_manager.get_conditional_notification_settings().get("digest_window_seconds", 0)),
+                "temp_alert_severity": "critical" if self.msg_conditional_temp_immediate_var.get() else "normal",
                 "error_reported_times": self.settings_manager.get_conditional_notification_settings().get("error_reported_times", {})
             }
             
@@ -3607,6 +3664,7 @@ class PopupManagerMixin:
         
         if os.path.exists(log_file):
             try:
+                import csv
                 with open(log_file, 'r', encoding='utf-8') as f:
                     reader = csv.reader(f)
                     header = next(reader, None) # Skip header
@@ -3712,7 +3770,7 @@ class PopupManagerMixin:
             else: messagebox.showerror("Error", "Temperature logic service is not available.", parent=popup_window)
 
     def _open_temperature_log_popup(self):
-        popup = tk.Toplevel(self.root); popup.title("Temperature Log"); popup.geometry("450x450"); popup.transient(self.root); popup.grab_set()
+        popup = tk.Toplevel(self.root); popup.title("Temperature Log"); popup.geometry("450x550"); popup.transient(self.root); popup.grab_set()
 
         # Get Data
         log_data = self.temp_logic.get_temperature_log() if hasattr(self, 'temp_logic') and self.temp_logic else {"keg": {}, "rpi": {}}
@@ -3729,7 +3787,8 @@ class PopupManagerMixin:
         ttk.Label(headers_frame, text="Low", font=('TkDefaultFont', 10, 'bold')).grid(row=0, column=2, padx=5, pady=2, sticky='w')
         ttk.Label(headers_frame, text="Average", font=('TkDefaultFont', 10, 'bold')).grid(row=0, column=3, padx=5, pady=2, sticky='w')
 
-        keg_periods = [("Day", log_data["keg"].get("day", {})), ("Week", log_data["keg"].get("week", {})), ("Month", log_data["keg"].get("month", {}))]
+        period_keys = ["day", "week", "month", "quarter", "year"]
+        keg_periods = [(key.capitalize(), log_data["keg"].get(key, {})) for key in period_keys]
 
         for i, (period_name, data) in enumerate(keg_periods):
             row = i + 1
@@ -3755,7 +3814,7 @@ class PopupManagerMixin:
         ttk.Label(rpi_headers_frame, text="Low", font=('TkDefaultFont', 10, 'bold')).grid(row=0, column=2, padx=5, pady=2, sticky='w')
         ttk.Label(rpi_headers_frame, text="Average", font=('TkDefaultFont', 10, 'bold')).grid(row=0, column=3, padx=5, pady=2, sticky='w')
 
-        rpi_periods = [("Day", log_data["rpi"].get("day", {})), ("Week", log_data["rpi"].get("week", {})), ("Month", log_data["rpi"].get("month", {}))]
+        rpi_periods = [(key.capitalize(), log_data["rpi"].get(key, {})) for key in period_keys]
 
         for i, (period_name, data) in enumerate(rpi_periods):
             row = i + 1
@@ -3807,6 +3866,7 @@ class PopupManagerMixin:
         
         autostart_was_enabled = self.settings_manager.get_autostart_enabled()
         if IS_RASPBERRY_PI_MODE and autostart_was_enabled:
+            from main import manage_autostart_file
             manage_autostart_file('remove')
         
         if self.settings_manager: self.settings_manager.reset_all_settings_to_defaults()
@@ -3859,22 +3919,60 @@ class PopupManagerMixin:
             main_frame.pack(expand=True, fill="both")
 
             # --- IMAGE AREA ---
+            # Pages are shown 1:1, centered, and scroll when larger than the area
             image_container = ttk.Frame(main_frame)
             image_container.pack(expand=True, fill="both", padx=10, pady=10)
-            
-            image_label = ttk.Label(image_container)
-            image_label.pack(anchor="center", expand=True)
+            image_container.grid_rowconfigure(0, weight=1)
+            image_container.grid_columnconfigure(0, weight=1)
+            
+            image_canvas = tk.Canvas(image_container, highlightthickness=0, borderwidth=0)
+            v_scroll = ttk.Scrollbar(image_container, orient="vertical", command=image_canvas.yview)
+            h_scroll = ttk.Scrollbar(image_container, orient="horizontal", command=image_canvas.xview)
+            image_canvas.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
+            image_canvas.grid(row=0, column=0, sticky="nsew")
+            v_scroll.grid(row=0, column=1, sticky="ns")
+            h_scroll.grid(row=1, column=0, sticky="ew")
+            
+            image_label = ttk.Label(image_canvas)
+            image_window = image_canvas.create_window(0, 0, window=image_label, anchor="center")
+            
+            def layout_image(event=None):
+                area_w, area_h = image_canvas.winfo_width(), image_canvas.winfo_height()
+                img_w, img_h = image_label.winfo_reqwidth(), image_label.winfo_reqheight()
+                full_w, full_h = max(area_w, img_w), max(area_h, img_h)
+                image_canvas.coords(image_window, full_w / 2, full_h / 2)
+                image_canvas.configure(scrollregion=(0, 0, full_w, full_h))
+            image_canvas.bind("<Configure>", layout_image)
+            image_label.bind("<Configure>", layout_image)
             
             self._current_wiring_image_obj = None 
+            
+            # Decoded pages are cached for the life of this popup (paging back and forth
+            # does not re-decode) and released when it closes.
+            asset_cache = self._get_asset_cache()
+            asset_owner = str(popup)
+            
+            def on_wiring_destroy():
+                self._current_wiring_image_obj = None
+            self._bind_asset_release(popup, on_release=on_wiring_destroy)
+            
+            # Only a screen smaller than the popup asks for a subsampled variant (small Pi displays);
+            # otherwise pages are shown full size and scroll if needed
+            screen_w, screen_h = popup.winfo_screenwidth(), popup.winfo_screenheight()
+            max_image_size = None
+            if screen_w < 800 or screen_h < 600:
+                max_image_size = (min(800, screen_w) - 40, min(600, screen_h) - 160)
 
             def load_image(index):
                 try:
                     file_name = wiring_images[index]
-                    full_path = os.path.join(assets_dir, file_name)
-                    img_obj = tk.PhotoImage(file=full_path)
+                    img_obj = asset_cache.get_image(file_name, asset_owner, max_size=max_image_size)
                     image_label.configure(image=img_obj)
                     image_label.image = img_obj 
                     self._current_wiring_image_obj = img_obj 
+                    image_canvas.xview_moveto(0)
+                    image_canvas.yview_moveto(0)
+                    layout_image()
                     
                     # Update Label
                     page_label.config(text=f"Page {index + 1} of {total_images}")
@@ -3992,6 +4090,7 @@ class PopupManagerMixin:
 
         else:
             try:
+                import webbrowser
                 webbrowser.open_new(url)
             except Exception as e:
                 print(f"Error opening link: {e}")
@@ -4002,20 +4101,11 @@ class PopupManagerMixin:
         Sections are defined by [SECTION: section_name].
         """
         try:
-            # Path is src/assets/help.md
-            help_file_path = os.path.join(self.base_dir, "assets", "help.md")
-            
-            with open(help_file_path, 'r', encoding='utf-8') as f:
-                full_help_text = f.read()
-            
-            # Use regex to find the section
-            # Pattern: [SECTION: section_name] ...content... [SECTION: ...or EOF
-            # re.S (DOTALL) makes '.' match newlines
-            pattern = re.compile(r'\[SECTION:\s*' + re.escape(section_name) + r'\](.*?)(?=\[SECTION:|\Z)', re.S)
-            match = pattern.search(full_help_text)
+            # Path is src/assets/help.md (parsed once, re-read only when the file changes)
+            section_text = self._get_asset_cache().get_help_section(section_name)
             
-            if match:
-                return match.group(1).strip() # Return the content
+            if section_text is not None:
+                return section_text
             else:
                 return f"## ERROR ##\nSection '[SECTION: {section_name}]' not found in help.md."
                 
@@ -4024,9 +4114,11 @@ class PopupManagerMixin:
         except Exception as e:
             return f"## ERROR ##\nAn error occurred loading the help file:\n{e}"
 
-    def _display_help_content(self, title, help_text):
+    def _display_help_content(self, title, help_text, segments=None):
         """
         Smart function to display help text.
+        - 'segments' are pre-parsed (text, tags, link_url) tuples from the asset cache;
+          if omitted, help_text is parsed here.
         - Reuses existing window if open.
         - Temporarily releases the 'grab' (lock) of the parent popup so user can type.
         - Restores the 'grab' to the parent popup when Help closes.
@@ -4141,65 +4233,29 @@ class PopupManagerMixin:
             default_family = "TkDefaultFont"
             default_size = 10
 
-        link_regex = r'\[(.*?)\]\((.*?)\)'
-        bold_regex = r'(\*\*.*?\*\*)'
-        
         # Helper to handle dynamic link tags
         link_counter = 0 
         
-        def parse_line_content(line_str, base_tags=()):
-            nonlocal link_counter
-            parts = re.split(r'(\[.*?\]\(.*?\))', line_str) 
-            
-            for part in parts:
-                link_match = re.match(link_regex, part)
-                
-                if link_match:
-                    link_text = link_match.group(1)
-                    link_url = link_match.group(2)
-                    
-                    # Create a unique tag for this specific link
-                    tag_name = f"dynamic_link_{link_counter}"
-                    link_counter += 1
-                    
-                    all_tags = base_tags + (tag_name,)
-                    
-                    # Configure the tag behavior
-                    text_widget.tag_configure(tag_name, font=(default_family, default_size, 'underline'), foreground="blue")
-                    text_widget.tag_bind(tag_name, "<Button-1>", lambda e, url=link_url: self._on_link_click(url))
-                    text_widget.tag_bind(tag_name, "<Enter>", lambda e: text_widget.config(cursor="hand2"))
-                    text_widget.tag_bind(tag_name, "<Leave>", lambda e: text_widget.config(cursor=""))
-                    
-                    text_widget.insert("end", link_text, all_tags)
-                
-                else:
-                    bold_parts = re.split(bold_regex, part)
-                    for bold_part in bold_parts:
-                        if bold_part.startswith("**") and bold_part.endswith("**"):
-                            all_tags = base_tags + ("bold",)
-                            text_widget.insert("end", bold_part[2:-2], all_tags)
-                        else:
-                            text_widget.insert("end", bold_part, base_tags)
-
-        # Process lines
         try:
-            for line in help_text.strip().splitlines():
-                line_stripped = line.strip()
+            if segments is None:
+                segments = parse_help_text(help_text)
                 
-                if line_stripped.startswith("##") and line_stripped.endswith("##"):
-                    text_widget.insert("end", line_stripped[2:-2].strip() + "\n", "heading")
+            for text, tags, link_url in segments:
+                if link_url is None:
+                    text_widget.insert("end", text, tags)
+                    continue
+                    
+                # Create a unique tag for this specific link
+                tag_name = f"dynamic_link_{link_counter}"
+                link_counter += 1
                 
-                elif line_stripped.startswith("* "):
-                    text_widget.insert("end", "• ", ("bullet",)) 
-                    parse_line_content(line_stripped[2:], base_tags=("bullet",))
-                    text_widget.insert("end", "\n") 
+                # Configure the tag behavior
+                text_widget.tag_configure(tag_name, font=(default_family, default_size, 'underline'), foreground="blue")
+                text_widget.tag_bind(tag_name, "<Button-1>", lambda e, url=link_url: self._on_link_click(url))
+                text_widget.tag_bind(tag_name, "<Enter>", lambda e: text_widget.config(cursor="hand2"))
+                text_widget.tag_bind(tag_name, "<Leave>", lambda e: text_widget.config(cursor=""))
                 
-                elif not line_stripped:
-                    text_widget.insert("end", "\n")
-                    
-                else:
-                    parse_line_content(line_stripped, base_tags=())
-                    text_widget.insert("end", "\n") 
+                text_widget.insert("end", text, tags + (tag_name,))
                     
         except Exception as e:
             text_widget.insert("end", f"An error occurred while parsing help text: {e}")
@@ -4214,6 +4270,12 @@ class PopupManagerMixin:
         """
         help_text = self._get_help_section(section_name)
         
+        segments = None
+        try:
+            segments = self._get_asset_cache().get_help_segments(section_name)
+        except Exception:
+            pass # Error text from _get_help_section is parsed by _display_help_content
+        
         # Map internal section names to human-readable window titles
         titles = {
             "main": "KegLevel Monitor - Help",
@@ -4230,22 +4292,33 @@ class PopupManagerMixin:
         title = titles.get(section_name, "KegLevel Help")
         
         # Call the smart display function that reuses the window
-        self._display_help_content(title, help_text)
+        self._display_help_content(title, help_text, segments=segments)
         
     # --- EULA / SUPPORT POPUP ---
 
-    def _load_support_image(self):
-        """Loads the QR code image and stores it."""
-        if self.support_qr_image:
-            return # Already loaded
-            
+    def _get_asset_cache(self):
+        """Returns the shared AssetCache for src/assets, creating it on first use."""
+        if self._asset_cache is None:
+            self._asset_cache = AssetCache(self.root, os.path.join(self.base_dir, "assets"))
+        return self._asset_cache
+
+    def _bind_asset_release(self, popup, on_release=None):
+        """Releases the popup's cached images (and runs on_release) when the popup is destroyed."""
+        def on_destroy(event):
+            # <Destroy> also fires for every child widget; only react to the popup itself
+            if event.widget is not popup:
+                return
+            if on_release:
+                on_release()
+            self._get_asset_cache().release_owner(str(popup))
+        popup.bind("<Destroy>", on_destroy, add="+")
+
+    def _load_support_image(self, owner="support"):
+        """Loads the QR code image (decoded once via the asset cache) and stores it."""
         try:
             # base_dir is self.base_dir, which is ~/keglevel/src/
             # Path is now src/assets/support.gif
-            image_path = os.path.join(self.base_dir, "assets", "support.gif")
-            
-            # Use tk.PhotoImage directly, which supports GIF natively
-            self.support_qr_image = tk.PhotoImage(file=image_path)
+            self.support_qr_image = self._get_asset_cache().get_image("support.gif", owner)
             
         except FileNotFoundError:
             print("Error: support.gif image not found.")
@@ -4396,6 +4469,8 @@ class PopupManagerMixin:
         if not delete_app and not delete_data:
             return # Should be blocked by UI, but safety check
 
+        import shutil # required for recursive Uninstall deletion
+
         try:
             print("Uninstall: Starting uninstallation process...")
             
@@ -4412,6 +4487,7 @@ class PopupManagerMixin:
                 if IS_RASPBERRY_PI_MODE:
                     try:
                         # remove from autostart using main.py utility
+                        from main import manage_autostart_file
                         manage_autostart_file('remove')
                         print("Uninstall: Autostart entry removed.")
                     except Exception as e:
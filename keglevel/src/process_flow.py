@@ -3,7 +3,6 @@
 # process_flow.py
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
 import uuid
 import math
@@ -18,6 +17,7 @@ from sensor_logic import IS_RASPBERRY_PI_MODE
 # as SettingsManager is complex. The real SettingsManager object is injected when run via main.
 # FIX: Removing mock as requested, relying on successful import.
 from settings_manager import SettingsManager
+from beverage_search import attach_combobox_filter
 
 class InventoryManager:
     # To run standalone, we need base_dir passed to find config files reliably.
@@ -73,19 +73,16 @@ class InventoryManager:
         defaults = self._get_default_workflow_data()
         data_loaded_from_file = False
         
-        # --- MODIFIED: Reference process_flow.json ---
-        if os.path.exists(self.workflow_file_path):
-            try:
-                with open(self.workflow_file_path, 'r') as f:
-                    data = json.load(f)
-                    if isinstance(data.get('columns'), dict):
-                        # Filter to include only the new valid keys
-                        valid_columns = {k: v for k, v in data['columns'].items() if k in defaults['columns']}
-                        self.columns = valid_columns
-                        data_loaded_from_file = True
-                        print("WorkflowManager: Workflow data loaded successfully.")
-            except Exception as e:
-                print(f"WorkflowManager: Error loading/decoding process_flow JSON: {e}. Reverting to in-memory defaults.")
+        # --- MODIFIED: process_flow.json via the SettingsManager cache (re-read only when it changed) ---
+        data = self.settings_manager.get_workflow_data()
+        if isinstance(data, dict) and isinstance(data.get('columns'), dict):
+            # Filter to include only the new valid keys; copy the lists, the cached data is shared
+            valid_columns = {k: list(v) for k, v in data['columns'].items() if k in defaults['columns'] and isinstance(v, list)}
+            self.columns = valid_columns
+            data_loaded_from_file = True
+            print("WorkflowManager: Workflow data loaded successfully.")
+        elif os.path.exists(self.workflow_file_path):
+            print("WorkflowManager: Error loading/decoding process_flow JSON. Reverting to in-memory defaults.")
         # -----------------------------------------------
         
         for key in defaults['columns']:
@@ -118,8 +115,8 @@ class InventoryManager:
         """Saves the current workflow state to JSON."""
         try:
             data_to_save = {"columns": self.columns}
-            with open(self.workflow_file_path, 'w') as f:
-                json.dump(data_to_save, f, indent=4)
+            # Shared with the other keglevel process: locked, atomic, recorded in the change feed; updates the cache
+            self.settings_manager.save_workflow_data(data_to_save)
             print("WorkflowManager: Workflow data saved.")
         except Exception as e:
             print(f"WorkflowManager Error: Could not save data: {e}")
@@ -376,6 +373,8 @@ class ProcessFlowApp:
             is_dashboard = False
 
         self.column_frames = {}; self.column_canvases = {}; self.inner_frames = {}
+        # col_name -> {card key: card}; see _reconcile_column()
+        self._column_cards = {}
         self.column_comboboxes = {}
         
         # Iterate over columns (using the logic defined above)
@@ -413,10 +412,12 @@ class ProcessFlowApp:
             combobox = ttk.Combobox(header_container, 
                                     textvariable=self.column_combobox_vars[col_name],
                                     values=self.beverage_names,
-                                    state="readonly",
                                     width=20)
             combobox.pack(fill="x", pady=(2, 5))
             self.column_comboboxes[col_name] = combobox
+            # --- NEW: Type to filter the beverage list (prefix or near spelling) ---
+            attach_combobox_filter(combobox, self._search_beverage_names, lambda: self.beverage_names)
+            combobox.bind("<FocusIn>", lambda e, cn=col_name: self._clear_add_placeholder(cn))
 
             # 2. Scrollable Content Setup
             canvas = tk.Canvas(col_frame, borderwidth=0, background="#D9D9D9")
@@ -436,8 +437,7 @@ class ProcessFlowApp:
             self.column_canvases[col_name] = canvas
             self.inner_frames[col_name] = inner_frame
             
-            inner_frame.grid_columnconfigure(0, weight=1)
-            inner_frame.grid_columnconfigure(1, weight=0)
+            self._column_cards[col_name] = {}
             
     # --- REMOVED: All Beverage Library Editor Popup Logic ---
     # The dedicated functions for the library editor (_open_beverage_library_popup,
@@ -451,6 +451,8 @@ class ProcessFlowApp:
         main_script_path = os.path.join(self.settings_manager.get_base_dir(), "main.py")
         # --- END FIX ---
         try:
+            # The child process reads settings.json from disk; hand it the latest state
+            self.settings_manager.flush_settings()
             # Launch main.py with a flag indicating it should open the Beverage Library immediately.
             subprocess.Popen([sys.executable, main_script_path, "--open-beverage-library"])
             print("WorkflowApp: Launched Beverage Library editor via subprocess.")
@@ -458,9 +460,22 @@ class ProcessFlowApp:
             print(f"WorkflowApp Error: Could not launch Beverage Library via subprocess: {e}")
             messagebox.showerror("Error", f"Could not launch Beverage Library: {e}", parent=self.popup)
 
+    def _search_beverage_names(self, text):
+        index = self.settings_manager.get_beverage_search_index()
+        return [e['label'] for e in index.search(text, kinds=("beverage",))]
+
+    def _clear_add_placeholder(self, col_name):
+        if self.column_combobox_vars[col_name].get() == "-- Add Beverage --":
+            self.column_combobox_vars[col_name].set("")
+
     def _handle_add_button(self, col_name):
         """Handles clicking the 'Add V' button next to the column title."""
-        selected_name = self.column_combobox_vars[col_name].get() 
+        selected_name = self.column_combobox_vars[col_name].get().strip()
+        if selected_name and selected_name not in self.name_to_id_map:
+            # Typed text: accept it if it names exactly one beverage
+            match = self.settings_manager.get_beverage_search_index().resolve(selected_name, kinds=("beverage",))
+            if match:
+                selected_name = match['label']
         
         if selected_name in self.name_to_id_map:
             item_id = self.name_to_id_map[selected_name]
@@ -475,7 +490,7 @@ class ProcessFlowApp:
                 # ----------------------------------------------------
         else:
             # Show a simple error since the validation is done client-side
-            messagebox.showwarning("Selection Required", "Please select a beverage from the dropdown list.", parent=self.popup)
+            messagebox.showwarning("Selection Required", "Please select a beverage from the dropdown list (type to filter it).", parent=self.popup)
 
 
     def _handle_reset_data(self):
@@ -490,6 +505,15 @@ class ProcessFlowApp:
             except Exception as e:
                 messagebox.showerror("Error", f"An error occurred during reset: {e}", parent=self.popup)
 
+    def apply_external_changes(self, sections):
+        """Called when another keglevel process saved 'sections' (see SettingsManager.check_for_external_changes)."""
+        if not self.popup.winfo_exists():
+            return
+        if "process_flow" in sections:
+            self.manager._load_workflow_data()
+        if "process_flow" in sections or "beverage_library" in sections:
+            self._refresh_columns()
+
     def _refresh_columns(self, columns_to_update=None):
         """
         Refreshes the UI for specific columns. 
@@ -516,29 +540,124 @@ class ProcessFlowApp:
                  if current_value not in self.name_to_id_map:
                     self.column_combobox_vars[col_name].set("-- Add Beverage --")
 
-            # Rebuild Beverage Cards
+            # Update only the beverage cards that changed
             if col_name in self.inner_frames:
-                inner_frame = self.inner_frames[col_name]
-                
-                # Clear old widgets in this column
-                for widget in inner_frame.winfo_children():
-                    widget.destroy()
-                    
-                # Recreate widgets for this column
-                item_list = self.manager.columns[col_name]
-                for index, item_id in enumerate(item_list):
-                    beverage_data = self.manager.get_beverage_data(item_id)
-                    self._create_beverage_item_widget(inner_frame, col_name, item_id, beverage_data, index)
-                    
-                inner_frame.update_idletasks()
-
-    def _create_beverage_item_widget(self, parent_frame, col_name, item_id, data, index):
+                if self._reconcile_column(col_name, self.manager.columns[col_name]):
+                    self.inner_frames[col_name].update_idletasks()
+
+    # --- KEYED CARD RECONCILIATION ---
+    def _get_card_keys(self, item_list):
+        """Card keys for a column: (item_id, n) for the n-th copy of item_id (duplicates are allowed)."""
+        seen = {}
+        keys = []
+        for item_id in item_list:
+            n = seen.get(item_id, 0)
+            seen[item_id] = n + 1
+            keys.append((item_id, n))
+        return keys
+
+    def _get_card_signature(self, data):
+        """The beverage fields a card shows; a card is rebuilt when they change."""
+        return (data.get('name'), data.get('abv'), data.get('ibu'), data.get('bjcp'))
+
+    def _reconcile_column(self, col_name, item_list):
+        """
+        Brings a column's cards in line with 'item_list'. Cards are keyed by beverage
+        (see _get_card_keys), so only cards that were added, removed or edited are
+        built or destroyed. Cards are packed rows; those whose order changed are
+        re-packed next to their new predecessor, while the longest run of cards
+        already in order stays untouched. A move or add costs O(changed cards).
+        Returns True if any widget changed.
+        """
+        inner_frame = self.inner_frames[col_name]
+        cards = self._column_cards[col_name]
+        new_keys = self._get_card_keys(item_list)
+        new_key_set = set(new_keys)
+        changed = False
+
+        # 1. Destroy cards that left the column
+        for key in [k for k in cards if k not in new_key_set]:
+            cards.pop(key)['frame'].destroy()
+            changed = True
+
+        # 2. Build new cards, rebuild edited ones
+        for key in new_keys:
+            data = self.manager.get_beverage_data(key[0])
+            signature = self._get_card_signature(data)
+            card = cards.get(key)
+            if card is not None and card['signature'] == signature:
+                continue
+            if card is not None:
+                card['frame'].destroy()
+            cards[key] = {
+                'frame': self._create_beverage_item_widget(inner_frame, col_name, key[0], data),
+                'signature': signature,
+                'packed': False,
+            }
+            changed = True
+
+        # 3. Keep the cards already in order in place; re-pack the rest after their predecessor
+        packed_order = [key for key in self._get_packed_order(inner_frame, cards) if key in new_key_set]
+        in_place = self._longest_ordered_run(packed_order, {key: i for i, key in enumerate(new_keys)})
+        previous = None
+        for key in new_keys:
+            card = cards[key]
+            if not card['packed'] or key not in in_place:
+                if previous is not None:
+                    card['frame'].pack(fill="x", after=previous)
+                elif packed_order:
+                    card['frame'].pack(fill="x", before=cards[packed_order[0]]['frame'])
+                else:
+                    card['frame'].pack(fill="x")
+                card['packed'] = True
+                changed = True
+            previous = card['frame']
+        return changed
+
+    def _get_packed_order(self, inner_frame, cards):
+        """Keys of the packed cards, in their current on-screen order."""
+        key_by_frame = {str(card['frame']): key for key, card in cards.items() if card['packed']}
+        return [key_by_frame[str(w)] for w in inner_frame.pack_slaves() if str(w) in key_by_frame]
+
+    def _longest_ordered_run(self, packed_order, new_positions):
+        """
+        The largest set of packed cards whose current order already matches the new
+        order (longest increasing subsequence of their new positions, O(n log n)).
+        """
+        import bisect
+        positions = [new_positions[key] for key in packed_order]
+        tails, tail_indexes = [], []
+        parents = [-1] * len(positions)
+        for i, position in enumerate(positions):
+            j = bisect.bisect_left(tails, position)
+            if j > 0:
+                parents[i] = tail_indexes[j - 1]
+            if j == len(tails):
+                tails.append(position)
+                tail_indexes.append(i)
+            else:
+                tails[j] = position
+                tail_indexes[j] = i
+
+        in_place = set()
+        i = tail_indexes[-1] if tail_indexes else -1
+        while i != -1:
+            in_place.add(packed_order[i])
+            i = parents[i]
+        return in_place
+
+    def _create_beverage_item_widget(self, parent_frame, col_name, item_id, data):
+        """Builds one beverage card (unpacked) and returns its row frame."""
+        row_frame = ttk.Frame(parent_frame)
+        row_frame.grid_columnconfigure(0, weight=1)
+        row_frame.grid_columnconfigure(1, weight=0)
+        
         # Item frame background is set to the lighter gray: #EAEAEA
-        item_frame = tk.Frame(parent_frame, background="#EAEAEA", padx=5, pady=5)
-        item_frame.grid(row=index, column=0, sticky="ew", padx=(0, 5), pady=2)
+        item_frame = tk.Frame(row_frame, background="#EAEAEA", padx=5, pady=5)
+        item_frame.grid(row=0, column=0, sticky="ew", padx=(0, 5), pady=2)
         
-        button_frame = ttk.Frame(parent_frame, padding=2, style="Button.TFrame")
-        button_frame.grid(row=index, column=1, sticky="ns", padx=(0, 2), pady=2)
+        button_frame = ttk.Frame(row_frame, padding=2, style="Button.TFrame")
+        button_frame.grid(row=0, column=1, sticky="ns", padx=(0, 2), pady=2)
         
         # Configure the grid WITHIN the item_frame for two columns (Name/BJCP area and ABV/IBU area)
         item_frame.grid_columnconfigure(0, weight=1)  # Left column (Name/BJCP label)
@@ -627,6 +746,8 @@ class ProcessFlowApp:
 
         ttk.Button(button_inner_frame, text="x", style="Condensed.TButton", 
                    command=lambda c=col_name, i_id=item_id: self._handle_remove(i_id, c)).grid(row=1, column=1, padx=1, pady=1, sticky="ew")
+        
+        return row_frame
 
     def _handle_add(self, item_id, target_col):
         pass
@@ -8,6 +8,8 @@ import csv
 import os
 from datetime import datetime
 
+from alert_rules import METRIC_TAP_REMAINING_LITERS
+
 ''' GPIO PINOUT FOR REFERENCE
 Label ------------ Pin - Pin ------------ Label
 3V3 power---------  1     2  ------------ 5V power
@@ -129,6 +131,9 @@ class SensorLogic:
         self.ui_callbacks = ui_callbacks
         self.settings_manager = settings_manager
         self.notification_service = notification_service
+        
+        # Optional WebDashboard (set by main.py when enabled); receives debounced tap state
+        self.dashboard = None
 
         if self.num_sensors > len(FLOW_SENSOR_PINS):
             self.num_sensors = len(FLOW_SENSOR_PINS)
@@ -166,6 +171,19 @@ class SensorLogic:
         self.last_known_remaining_liters = [None] * self.num_sensors
         
         self.sensor_thread = None 
+        
+        # --- CACHED SETTINGS ---
+        # The sensor loop runs every 0.5s; instead of re-reading settings each tick it uses
+        # these copies, which SettingsManager change callbacks refresh when they are saved.
+        self._displayed_taps = self.settings_manager.get_displayed_taps()
+        self._k_factors = self.settings_manager.get_flow_calibration_factors()
+        self.settings_manager.subscribe(
+            ["system_settings.displayed_taps", "system_settings.flow_calibration_factors"],
+            self._on_flow_settings_changed
+        )
+        
+        # Low-volume alerts: remaining volumes are reported to the alert rule engine when they change
+        self.alert_engine = notification_service.alert_engine if notification_service else None
 
         # --- NEW: Tap Log Initialization ---
         # Use SettingsManager's resolved data_dir for the log file
@@ -175,6 +193,10 @@ class SensorLogic:
         
         self._load_initial_volumes()
 
+    def _on_flow_settings_changed(self, changed_paths):
+        self._displayed_taps = self.settings_manager.get_displayed_taps()
+        self._k_factors = self.settings_manager.get_flow_calibration_factors()
+
     def _ensure_log_header(self):
         """Creates the CSV log file with headers if it doesn't exist."""
         if not os.path.exists(self.pour_log_file):
@@ -506,6 +528,12 @@ class SensorLogic:
             
         self.last_sent_ui_state[sensor_index] = current_state
 
+        if self.dashboard:
+            self.dashboard.publish_tap(sensor_index, flow_rate_lpm, remaining_liters, status_string, last_pour_vol)
+
+        if self.alert_engine:
+            self.alert_engine.report(METRIC_TAP_REMAINING_LITERS, sensor_index, remaining_liters)
+
         if self.ui_callbacks.get("update_sensor_data_cb"):
             self.ui_callbacks.get("update_sensor_data_cb")(
                 sensor_index, flow_rate_lpm, remaining_liters, status_string, last_pour_vol
@@ -570,8 +598,8 @@ class SensorLogic:
                  
             # --- BEGIN STANDARD MONITORING LOGIC ---
             current_time = time.time()
-            displayed_taps_count = self.settings_manager.get_displayed_taps()
-            k_factors = self.settings_manager.get_flow_calibration_factors()
+            displayed_taps_count = self._displayed_taps
+            k_factors = self._k_factors
             
             new_active_sensor_index = -1
             if not self._is_calibrating and self.active_sensor_index == -1:
@@ -672,43 +700,20 @@ class SensorLogic:
                 elif not self.tap_is_active[i]:
                     # IDLE LOOP: Send stored values
                     self._update_ui_data(i, self.last_pour_averages[i], self.last_known_remaining_liters[i], "Idle", self.last_pour_volumes[i])
-                    self._check_conditional_notification(i)
 
                 self.last_pulse_count[i] = global_pulse_counts[i]
                 last_check_time[i] = current_time
 
-            self.notification_service.check_and_send_temp_notification()
             time.sleep(READING_INTERVAL_SECONDS)
 
         print("SensorLogic: Sensor loop ended.")
 
     def _process_flow_data(self, sensor_index, pulses, time_interval, k_factor, status_override="Nominal", persist_data=True):
-        """Wrapper for calculating metrics and checking alerts."""
+        """Wrapper for calculating metrics (low-volume alerts follow from the volume reported by _update_ui_data)."""
         flow_rate_lpm, dispensed_liters_interval, remaining_liters = self._calculate_flow_metrics(
             sensor_index, pulses, time_interval, k_factor, status_override=status_override, persist_data=persist_data
         )
-        self._check_conditional_notification(sensor_index, force_check=True)
-
-    def _check_conditional_notification(self, sensor_index, force_check=False):
-        """Checks if the remaining volume is below the threshold and triggers notification."""
-        remaining_liters = self.last_known_remaining_liters[sensor_index]
-        if remaining_liters is None: return
-
-        cond_notif_settings = self.settings_manager.get_conditional_notification_settings()
-        cond_notif_type = cond_notif_settings.get('notification_type', 'None')
-        cond_notif_threshold_liters = cond_notif_settings.get('threshold_liters', 4.0)
-        sent_status_list = cond_notif_settings.get('sent_notifications', [])
-        
-        if cond_notif_type != 'None':
-            # Low Volume Notification
-            if remaining_liters <= cond_notif_threshold_liters and not sent_status_list[sensor_index] and force_check:
-                self.notification_service.send_conditional_notification(sensor_index, remaining_liters, cond_notif_threshold_liters)
-
-            # Refill/Reset Notification Status
-            reset_threshold = cond_notif_threshold_liters * 1.25
-            if sent_status_list[sensor_index] and remaining_liters > reset_threshold:
-                self.settings_manager.update_conditional_sent_status(sensor_index, False)
-                
+
     def simulate_pour(self, sensor_index, volume_liters, flow_rate_lpm, deduct_volume=True):
         """
         Starts a background thread to simulate a pour.
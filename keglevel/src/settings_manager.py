@@ -8,10 +8,16 @@ import uuid
 import sys 
 import hmac
 import hashlib
+import copy
+import threading
 from datetime import datetime, timedelta
 # Import pathlib for safe path expansion
 from pathlib import Path
 
+from settings_writer import DebouncedJsonWriter, write_json_atomic
+from settings_sync import InterProcessLock, ChangeFeed, JsonFileCache, LOCK_FILE, CHANGE_FEED_FILE
+from settings_schema import SETTINGS_SCHEMA_VERSION, build_settings_schema, compile_schema, migrate_settings
+
 SETTINGS_FILE = "settings.json"
 BEVERAGES_FILE = "beverages_library.json"
 PROCESS_FLOW_FILE = "process_flow.json" 
@@ -20,6 +26,10 @@ KEG_LIBRARY_FILE = "keg_library.json"
 # OBSOLETE LOCAL TRIAL FILE
 TRIAL_RECORD_FILE = "trial_record.dat" 
 
+# Change-feed section names for the shared files other than settings.json
+# (settings.json itself is tracked per top-level key, e.g. "system_settings").
+SHARED_FILE_SECTIONS = frozenset(["beverage_library", "keg_library", "process_flow"])
+
 
 # DEFINE the constants directly. No try/except needed.
 UNASSIGNED_KEG_ID = "unassigned_keg_id"
@@ -89,9 +99,13 @@ class SettingsManager:
         
     def _get_default_conditional_notification_settings(self):
         return {
-            "notification_type": "None", "threshold_liters": 4.0, "sent_notifications": [False] * self.num_sensors, 
-            "low_temp_f": 35.0, "high_temp_f": 45.0, "temp_sent_timestamps": [], 
-            "error_reported_times": {"push": 0, "volume": 0, "temperature": 0}
+            "notification_type": "None", "threshold_liters": 4.0,
+            "low_temp_f": 35.0, "high_temp_f": 45.0,
+            "error_reported_times": {"push": 0, "volume": 0, "temperature": 0},
+            # --- NEW: Alert digest (0 = send each alert at once) ---
+            "digest_window_seconds": 0,
+            # 'critical' temperature alerts skip the digest; 'normal' ones are batched with volume alerts
+            "temp_alert_severity": "critical"
         }
     
     def _get_default_system_settings(self):
@@ -114,9 +128,42 @@ class SettingsManager:
             "workflow_view_mode": "paged",
             "workflow_window_geometry": None,
             # --- NEW: Pour Log Enable ---
-            "enable_pour_log": True
+            "enable_pour_log": True,
+            # --- NEW: Read-only Web Dashboard ---
+            "web_dashboard_enabled": False,
+            "web_dashboard_port": 8080,
+            # --- NEW: Kegerator temperature sampling ---
+            # 'standard' samples every 5 minutes; 'fast' samples every temp_fast_interval_seconds,
+            # smooths with temp_filter ('ewma' or 'median') and only publishes changes beyond temp_deadband_f
+            "temp_sampling_mode": "standard",
+            "temp_fast_interval_seconds": 10,
+            "temp_filter": "ewma",
+            "temp_deadband_f": 0.2
         }
 
+    # --- NEW METHODS for Web Dashboard ---
+    def get_web_dashboard_enabled(self):
+        return self.get_system_settings().get('web_dashboard_enabled', False)
+
+    def get_web_dashboard_port(self):
+        try:
+            return int(self.get_system_settings().get('web_dashboard_port', 8080))
+        except (TypeError, ValueError):
+            return 8080
+
+    # --- NEW METHODS for Temperature Sampling ---
+    def get_temp_sampling_settings(self):
+        defaults = self._get_default_system_settings()
+        sys_set = self.get_system_settings()
+        return {key: sys_set.get(key, defaults[key]) for key in
+                ('temp_sampling_mode', 'temp_fast_interval_seconds', 'temp_filter', 'temp_deadband_f')}
+
+    def save_temp_sampling_mode(self, mode):
+        if mode in ["standard", "fast"]:
+            self.settings.setdefault('system_settings', self._get_default_system_settings())['temp_sampling_mode'] = mode
+            self._save_all_settings()
+            print(f"SettingsManager: Temperature sampling mode saved as {mode}.")
+
     # --- NEW METHODS for Pour Log ---
     def get_enable_pour_log(self):
         return self.settings.get('system_settings', {}).get('enable_pour_log', True)
@@ -246,12 +293,13 @@ class SettingsManager:
         liquid_weight_kg = volume_liters * density
         return empty_weight_kg + liquid_weight_kg
     
-    def __init__(self, num_sensors_expected):
+    def __init__(self, num_sensors_expected, data_dir=None):
         base_dir = os.path.dirname(os.path.abspath(__file__))
         print(f"SettingsManager: Using script path: {base_dir}")
         self.base_dir = base_dir 
         
-        self.data_dir = os.path.abspath(os.path.join(self.base_dir, "..", "..", "keglevel-data"))
+        # data_dir overrides the install's keglevel-data folder (used by notification_bench.py)
+        self.data_dir = os.path.abspath(data_dir or os.path.join(self.base_dir, "..", "..", "keglevel-data"))
         print(f"SettingsManager: Using data path: {self.data_dir}")
         
         if not os.path.exists(self.data_dir):
@@ -270,9 +318,73 @@ class SettingsManager:
 
         self.num_sensors = num_sensors_expected
         
+        # --- CROSS-PROCESS SYNC (see check_for_external_changes()) ---
+        # The main app and the --open-beverage-library window share these files. Writes
+        # hold the file lock and are recorded in the change feed by section.
+        self._file_lock = InterProcessLock(os.path.join(self.data_dir, LOCK_FILE))
+        self._change_feed = ChangeFeed(os.path.join(self.data_dir, CHANGE_FEED_FILE))
+        self._sync_lock = threading.RLock()
+        self._feed_seq = self._change_feed.get_sequence()
+        self._pending_external_sections = set()
+        self._adopted_external_sections = set()
+        self._external_change_listeners = []
+        # process_flow.json is read for every status message and workflow refresh
+        self._workflow_cache = JsonFileCache(self.process_flow_file_path)
+        # BJCP/beverage search index, built on first use (see get_beverage_search_index())
+        self._search_index = None
+        
+        # --- DEBOUNCED SETTINGS WRITER ---
+        # Setters only mark settings.json dirty; the writer thread flushes at most
+        # every couple of seconds (atomically) and flush_settings() forces it.
+        self._settings_writer = DebouncedJsonWriter(
+            self.settings_file_path, name="settings", lock=self._file_lock,
+            before_write=self._before_settings_write, after_write=self._after_settings_write
+        )
+        
+        # --- SINGLE-PASS COLD START ---
+        # settings.json is read exactly once and shared by the keg library migration
+        # and the settings validation below. Per-phase timings are kept for diagnostics.
+        self.startup_timings_ms = {}
+        self._keg_library_signature = None
+        self._settings_validator = None
+        
+        # --- CHANGE SUBSCRIPTIONS (see subscribe()) ---
+        self._subscriptions = {}
+        self._next_subscription_id = 1
+        self._subscription_lock = threading.RLock()
+        
+        phase_start = time.perf_counter()
+        raw_settings = self._read_settings_file()
+        # What settings.json holds on disk, per section; writes publish only the sections that differ
+        self._written_settings = copy.deepcopy(raw_settings)
+        phase_start = self._record_startup_phase("read_settings", phase_start)
+        
         self.beverage_library = self._load_beverage_library()
-        self.keg_library, self.keg_map = self._load_keg_library()
-        self.settings = self._load_settings()
+        phase_start = self._record_startup_phase("beverage_library", phase_start)
+        
+        self.keg_library, self.keg_map = self._load_keg_library(raw_settings=raw_settings)
+        phase_start = self._record_startup_phase("keg_library", phase_start)
+        
+        self.settings = self._load_settings(raw_settings=raw_settings)
+        self._record_startup_phase("validate_settings", phase_start)
+        
+        total_ms = sum(self.startup_timings_ms.values())
+        phase_report = ", ".join(f"{name} {ms:.1f} ms" for name, ms in self.startup_timings_ms.items())
+        print(f"SettingsManager: Startup load {total_ms:.1f} ms ({phase_report})")
+
+    def _record_startup_phase(self, phase_name, phase_start):
+        """Stores the elapsed time for a startup phase and returns the start time for the next one."""
+        now = time.perf_counter()
+        self.startup_timings_ms[phase_name] = (now - phase_start) * 1000.0
+        return now
+
+    def _get_file_signature(self, path):
+        """Returns (mtime_ns, size) for change detection, or None if the file is missing."""
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
 
     def get_base_dir(self):
         return self.base_dir
@@ -280,7 +392,15 @@ class SettingsManager:
     def get_data_dir(self):
         return self.data_dir
 
-    def _load_keg_library(self):
+    def _load_keg_library(self, raw_settings=None):
+        """
+        Loads and migrates the keg library.
+        raw_settings: the already-parsed settings.json (used for the beverage_id migration).
+        If None, the in-memory settings are used instead of re-reading the file.
+        """
+        if raw_settings is None:
+            raw_settings = getattr(self, 'settings', {})
+        
         defaults = self._get_default_keg_definitions()
         if os.path.exists(self.keg_library_file_path):
             try:
@@ -296,16 +416,10 @@ class SettingsManager:
                     default_keg_profile = self._get_default_keg_definitions()[0]
                     library_was_modified = False 
                     
-                    # Load RAW settings to avoid circular dependency for migration check
-                    raw_settings = {}
-                    if os.path.exists(self.settings_file_path):
-                        try:
-                            with open(self.settings_file_path, 'r') as sf:
-                                raw_settings = json.load(sf)
-                        except Exception: pass
-                    
-                    current_keg_assignments = raw_settings.get('sensor_keg_assignments', [])
-                    current_bev_assignments = raw_settings.get('sensor_beverage_assignments', [])
+                    # Copy the assignment lists: padding below must not leak into raw_settings,
+                    # which _load_settings validates afterwards.
+                    current_keg_assignments = list(raw_settings.get('sensor_keg_assignments', []) or [])
+                    current_bev_assignments = list(raw_settings.get('sensor_beverage_assignments', []) or [])
                     
                     while len(current_keg_assignments) < self.num_sensors: current_keg_assignments.append(UNASSIGNED_KEG_ID)
                     while len(current_bev_assignments) < self.num_sensors: current_bev_assignments.append(UNASSIGNED_BEVERAGE_ID)
@@ -360,11 +474,15 @@ class SettingsManager:
                     if library_was_modified:
                         print("SettingsManager: Keg library migration detected. Updating file on disk.")
                         self._save_keg_library(library)
+                    else:
+                        self._keg_library_signature = self._get_file_signature(self.keg_library_file_path)
 
                     keg_map = {k['id']: k for k in migrated_list if 'id' in k}
                     return library, keg_map
             except Exception as e:
                 print(f"Keg Library: Error loading or decoding JSON: {e}. Using default.") 
+                # Remember the broken file's signature so it is not re-read until it changes
+                self._keg_library_signature = self._get_file_signature(self.keg_library_file_path)
                 return {"kegs": defaults}, {k['id']: k for k in defaults}
         else:
             print(f"{KEG_LIBRARY_FILE} not found. Creating with defaults.") 
@@ -374,14 +492,20 @@ class SettingsManager:
 
     def _save_keg_library(self, library):
         try:
-            with open(self.keg_library_file_path, 'w') as f: 
-                json.dump(library, f, indent=4) 
+            self.write_shared_json(self.keg_library_file_path, library, "keg_library")
+            self._keg_library_signature = self._get_file_signature(self.keg_library_file_path)
             print(f"Keg Library saved to {self.keg_library_file_path}.") 
         except Exception as e:
             print(f"Error saving keg library: {e}")
 
     def get_keg_definitions(self):
-        self.keg_library, self.keg_map = self._load_keg_library()
+        # Only re-read the file if another process (e.g. the beverage library window) changed it.
+        # A missing or unreadable file keeps its signature (None for missing), so it is not
+        # re-read on every call either; a load that rewrites the file stores the new one.
+        current_signature = self._get_file_signature(self.keg_library_file_path)
+        if current_signature != self._keg_library_signature:
+            self._keg_library_signature = current_signature
+            self.keg_library, self.keg_map = self._load_keg_library()
         return self.keg_library.get('kegs', [])
     
     def save_keg_definitions(self, definitions_list):
@@ -439,6 +563,16 @@ class SettingsManager:
         if keg_id == UNASSIGNED_KEG_ID:
             return {"id": UNASSIGNED_KEG_ID, "title": "Offline", "starting_volume_liters": 0.0, "current_dispensed_liters": 0.0}
         return self.keg_map.get(keg_id)
+
+    def get_keg_fill_percent(self, keg_id, remaining_liters):
+        """Fill level (0-100) of a keg against its maximum full volume, or None if unassigned/unknown."""
+        keg = self.get_keg_by_id(keg_id)
+        if remaining_liters is None or not keg or keg.get('id') == UNASSIGNED_KEG_ID:
+            return None
+        full_liters = float(keg.get('maximum_full_volume_liters', 0) or 0)
+        if full_liters <= 0:
+            return None
+        return max(0.0, min(remaining_liters / full_liters * 100.0, 100.0))
         
     def _load_beverage_library(self):
         if os.path.exists(self.beverages_file_path):
@@ -475,8 +609,7 @@ class SettingsManager:
             
     def _save_beverage_library(self, library):
         try:
-            with open(self.beverages_file_path, 'w') as f: 
-                json.dump(library, f, indent=4) 
+            self.write_shared_json(self.beverages_file_path, library, "beverage_library")
             print(f"Beverage Library saved to {self.beverages_file_path}.") 
         except Exception as e:
             print(f"Error saving beverage library: {e}")
@@ -488,31 +621,28 @@ class SettingsManager:
         self.beverage_library['beverages'] = new_library_list
         self._save_beverage_library(self.beverage_library)
 
+    def get_beverage_search_index(self):
+        """
+        The BJCP style and beverage search index (beverage_search.py). The BJCP part is
+        loaded from its on-disk cache on first use; the beverage part follows the library.
+        """
+        if self._search_index is None:
+            from beverage_search import BeverageSearchIndex, SEARCH_INDEX_FILE
+            self._search_index = BeverageSearchIndex(os.path.join(self.get_base_dir(), "assets"),
+                                                     os.path.join(self.data_dir, SEARCH_INDEX_FILE))
+        self._search_index.set_beverages(self.beverage_library.get('beverages', []))
+        return self._search_index
+
     def load_bjcp_styles(self):
-        """Loads the strict BJCP styles from the central JSON file."""
-        bjcp_file = os.path.join(self.get_base_dir(), "assets", "bjcp_styles.json")
-        try:
-            with open(bjcp_file, 'r', encoding='utf-8') as f:
-                styles = json.load(f)
-                return styles
-        except Exception as e:
-            print(f"SettingsManager Error: Could not load BJCP styles: {e}")
-            return []
+        """Returns the strict BJCP styles (parsed once, via the search index)."""
+        return self.get_beverage_search_index().get_styles()
 
     # --- Load/Reset Settings ---
 
-    def _load_settings(self, force_defaults=False):
+    def _read_settings_file(self):
+        """Reads settings.json from disk. Returns {} if it is missing or unreadable."""
         settings = {}
-
-        default_sensor_labels = self._get_default_sensor_labels()
-        default_sensor_keg_assignments = self._get_default_sensor_keg_assignments() 
-        default_sensor_beverage_assignments = self._get_default_beverage_assignments() 
-        default_system_settings_val = self._get_default_system_settings() 
-        default_push_notification_settings_val = self._get_default_push_notification_settings() 
-        default_status_request_settings_val = self._get_default_status_request_settings()
-        default_conditional_notification_settings_val = self._get_default_conditional_notification_settings() 
-
-        if not force_defaults and os.path.exists(self.settings_file_path):
+        if os.path.exists(self.settings_file_path):
             try:
                 with open(self.settings_file_path, 'r') as f: 
                     settings = json.load(f) 
@@ -521,226 +651,89 @@ class SettingsManager:
                 print(f"Error loading or decoding JSON from {self.settings_file_path}: {e}. Using all defaults.") 
                 settings = {}
         else:
-            if force_defaults: print("Forcing reset to default settings.")
-            else: print(f"{self.settings_file_path} not found. Creating with defaults.")
+            print(f"{self.settings_file_path} not found. Creating with defaults.")
+        
+        if not isinstance(settings, dict):
             settings = {}
+        return settings
+
+    def _get_settings_defaults(self):
+        """Default value for every top-level settings.json section."""
+        return {
+            'sensor_labels': self._get_default_sensor_labels(), 
+            'sensor_keg_assignments': self._get_default_sensor_keg_assignments(), 
+            'sensor_beverage_assignments': self._get_default_beverage_assignments(), 
+            'system_settings': self._get_default_system_settings(), 
+            'push_notification_settings': self._get_default_push_notification_settings(), 
+            'status_request_settings': self._get_default_status_request_settings(),
+            'conditional_notification_settings': self._get_default_conditional_notification_settings(), 
+        }
+
+    def _get_settings_validator(self):
+        """Compiles the declarative schema (settings_schema.py) once per SettingsManager."""
+        if self._settings_validator is None:
+            defaults = self._get_settings_defaults()
+            self._settings_validator = compile_schema(build_settings_schema(self.num_sensors, defaults), defaults)
+        return self._settings_validator
+
+    def _load_settings(self, force_defaults=False, raw_settings=None):
+        if force_defaults:
+            print("Forcing reset to default settings.")
+            settings = {}
+        elif raw_settings is not None:
+            # Already read once by the cold-start loader
+            settings = raw_settings
+        else:
+            settings = self._read_settings_file()
 
         is_new_file_or_major_corruption = not os.path.exists(self.settings_file_path) or not settings
         
-        if 'sensor_labels' not in settings or not isinstance(settings.get('sensor_labels',[]), list) or len(settings.get('sensor_labels',[])) != self.num_sensors: 
-            settings['sensor_labels'] = default_sensor_labels 
-        
-        if 'sensor_beverage_assignments' not in settings or not isinstance(settings.get('sensor_beverage_assignments', []), list) or len(settings.get('sensor_beverage_assignments', [])) != self.num_sensors: 
-            settings['sensor_beverage_assignments'] = default_sensor_beverage_assignments 
-            if not is_new_file_or_major_corruption: print("Settings: sensor_beverage_assignments initialized/adjusted.") 
+        # 1. One-time migrations: only those newer than the stored schema_version run
+        if is_new_file_or_major_corruption:
+            settings['schema_version'] = SETTINGS_SCHEMA_VERSION
+            migrated = []
         else:
-            assignments = settings['sensor_beverage_assignments'] 
-            valid_ids = [b['id'] for b in self.beverage_library.get('beverages', []) if 'id' in b] 
-            valid_ids.append(UNASSIGNED_BEVERAGE_ID)
-            for i in range(len(assignments)):
-                if assignments[i] not in valid_ids: 
-                    assignments[i] = default_sensor_beverage_assignments[i] 
-            settings['sensor_beverage_assignments'] = assignments 
-            
-        if 'keg_definitions' in settings:
-             del settings['keg_definitions']
+            migrated = migrate_settings(settings, {'unassigned_keg_id': UNASSIGNED_KEG_ID})
+            if migrated:
+                print(f"Settings: Migrated settings to schema version {SETTINGS_SCHEMA_VERSION} (applied: {migrated}).")
         
-        default_keg_assignment_id = UNASSIGNED_KEG_ID
+        # 2. Compiled schema validation (fast path: one type/range check per field)
+        repaired = self._get_settings_validator()(settings)
+        if repaired and not is_new_file_or_major_corruption:
+            repaired_sections = sorted({path.split('.', 1)[0] for path in repaired})
+            print(f"Settings: {len(repaired)} value(s) initialized/adjusted in {', '.join(repaired_sections)}.")
         
-        if 'sensor_keg_assignments' not in settings or not isinstance(settings.get('sensor_keg_assignments', []), list) or len(settings.get('sensor_keg_assignments', [])) != self.num_sensors: 
-            settings['sensor_keg_assignments'] = default_sensor_keg_assignments 
-            if not is_new_file_or_major_corruption: print("Settings: sensor_keg_assignments initialized/adjusted.") 
-        else:
-            assignments = settings['sensor_keg_assignments'] 
-            valid_keg_ids = self.keg_map.keys()
-            for i_assign in range(len(assignments)): 
-                if assignments[i_assign] != UNASSIGNED_KEG_ID and assignments[i_assign] not in valid_keg_ids:
-                    assignments[i_assign] = default_keg_assignment_id
-            settings['sensor_keg_assignments'] = assignments 
-
-        if 'system_settings' not in settings or not isinstance(settings.get('system_settings'), dict): 
-            settings['system_settings'] = default_system_settings_val 
-            if not is_new_file_or_major_corruption: print("Settings: system_settings initialized/adjusted.") 
-        else:
-            # FIX: Check for legacy migration BEFORE merging with defaults
-            # If 'setup_complete' is MISSING in the file, we need to detect if it's an existing user
-            raw_sys_settings = settings.get('system_settings', {})
-            needs_migration_check = 'setup_complete' not in raw_sys_settings
-            
-            sys_set = default_system_settings_val.copy() 
-            sys_set.update(settings['system_settings']) 
-            
-            if 'velocity_mode' in sys_set: del sys_set['velocity_mode']
-            if 'user_temp_input_c' in sys_set: del sys_set['user_temp_input_c']
-            
-            settings['system_settings'] = sys_set 
-            
-            # --- MIGRATION: UI MODE (Full/Lite -> Detailed/Basic) ---
-            current_mode = settings['system_settings'].get('ui_mode')
-            if current_mode == 'full':
-                settings['system_settings']['ui_mode'] = 'detailed'
-                print("Settings: Migrated UI Mode 'full' -> 'detailed'")
-            elif current_mode == 'lite':
-                settings['system_settings']['ui_mode'] = 'basic'
-                print("Settings: Migrated UI Mode 'lite' -> 'basic'")
-            elif current_mode not in ["detailed", "basic"]:
-                 settings['system_settings']['ui_mode'] = default_system_settings_val['ui_mode']
-            
-            # --- MIGRATION: DETECT LEGACY INSTALL ---
-            if needs_migration_check:
-                # Heuristic: If we have valid keg assignments (not default unassigned)
-                assignments = settings.get('sensor_keg_assignments', [])
-                has_active_kegs = any(k != UNASSIGNED_KEG_ID for k in assignments)
-                
-                # Also check for non-default labels if they customized them
-                labels = settings.get('sensor_labels', [])
-                has_custom_labels = any(l != f"Tap {i+1}" for i, l in enumerate(labels))
-                
-                # If it looks like a configured system, mark setup as complete
-                if has_active_kegs or has_custom_labels:
-                    print("Settings: Legacy installation detected. Auto-completing setup.")
-                    settings['system_settings']['setup_complete'] = True
-                else:
-                    # Otherwise it's effectively a new install (or reset state)
-                    settings['system_settings']['setup_complete'] = False
-            # -----------------------------------------------------------------
-
-            if settings['system_settings'].get('display_units') not in ["imperial", "metric"]: 
-                settings['system_settings']['display_units'] = default_system_settings_val['display_units'] 
-            current_displayed_taps = settings['system_settings'].get('displayed_taps', self.num_sensors) 
-            try: current_displayed_taps = int(current_displayed_taps) 
-            except ValueError: current_displayed_taps = self.num_sensors 
-            if not (1 <= current_displayed_taps <= self.num_sensors): 
-                settings['system_settings']['displayed_taps'] = default_system_settings_val['displayed_taps'] 
-            else: 
-                settings['system_settings']['displayed_taps'] = current_displayed_taps 
-            if 'ds18b20_ambient_sensor' not in settings['system_settings']: 
-                settings['system_settings']['ds18b20_ambient_sensor'] = default_system_settings_val['ds18b20_ambient_sensor'] 
-            if 'ui_mode' not in settings['system_settings'] or settings['system_settings']['ui_mode'] not in ["detailed", "basic"]:
-                 settings['system_settings']['ui_mode'] = default_system_settings_val['ui_mode']
-            
-            if 'flow_calibration_factors' not in settings['system_settings'] or not isinstance(settings.get('flow_calibration_factors', []), list) or len(settings['system_settings'].get('flow_calibration_factors', [])) != self.num_sensors:
-                 settings['system_settings']['flow_calibration_factors'] = default_system_settings_val['flow_calibration_factors']
-            else:
-                 try:
-                      settings['system_settings']['flow_calibration_factors'] = [float(f) for f in settings['system_settings']['flow_calibration_factors']]
-                 except (ValueError, TypeError):
-                      settings['system_settings']['flow_calibration_factors'] = default_system_settings_val['flow_calibration_factors']
+        # 3. Cross-file references (beverage/keg libraries can change independently)
+        references_changed = self._validate_library_references(settings)
 
-            if 'metric_pour_ml' not in settings['system_settings']:
-                settings['system_settings']['metric_pour_ml'] = default_system_settings_val['metric_pour_ml']
-            else:
-                try: settings['system_settings']['metric_pour_ml'] = int(settings['system_settings']['metric_pour_ml'])
-                except (ValueError, TypeError): settings['system_settings']['metric_pour_ml'] = default_system_settings_val['metric_pour_ml']
-            
-            if 'imperial_pour_oz' not in settings['system_settings']:
-                settings['system_settings']['imperial_pour_oz'] = default_system_settings_val['imperial_pour_oz']
-            else:
-                try: settings['system_settings']['imperial_pour_oz'] = int(settings['system_settings']['imperial_pour_oz'])
-                except (ValueError, TypeError): settings['system_settings']['imperial_pour_oz'] = default_system_settings_val['imperial_pour_oz']
-            
-            if 'flow_calibration_notes' not in settings['system_settings'] or not isinstance(settings['system_settings']['flow_calibration_notes'], str):
-                 settings['system_settings']['flow_calibration_notes'] = default_system_settings_val['flow_calibration_notes']
-            
-            if 'flow_calibration_to_be_poured' not in settings['system_settings']:
-                 settings['system_settings']['flow_calibration_to_be_poured'] = default_system_settings_val['flow_calibration_to_be_poured']
-            else:
-                try: 
-                    settings['system_settings']['flow_calibration_to_be_poured'] = float(settings['system_settings']['flow_calibration_to_be_poured'])
-                except (ValueError, TypeError): 
-                    settings['system_settings']['flow_calibration_to_be_poured'] = default_system_settings_val['flow_calibration_to_be_poured']
-
-            if 'eula_agreed' not in settings['system_settings']:
-                settings['system_settings']['eula_agreed'] = default_system_settings_val['eula_agreed']
-            if 'show_eula_on_launch' not in settings['system_settings']:
-                settings['system_settings']['show_eula_on_launch'] = default_system_settings_val['show_eula_on_launch']
-            
-            # Validation for Window Geometry
-            if 'window_geometry' not in settings['system_settings']:
-                settings['system_settings']['window_geometry'] = default_system_settings_val['window_geometry']
+        if force_defaults or is_new_file_or_major_corruption or migrated or repaired or references_changed:
+             self._save_all_settings(current_settings=settings)
+        return settings
 
-            # Validation for Update Check
-            if 'check_updates_on_launch' not in settings['system_settings']:
-                settings['system_settings']['check_updates_on_launch'] = default_system_settings_val['check_updates_on_launch']
-                
-            # Validation for Setup Complete
-            if 'setup_complete' not in settings['system_settings']:
-                settings['system_settings']['setup_complete'] = default_system_settings_val['setup_complete']
-
-        loaded_notif_settings = {}
-        if 'notification_settings' in settings: 
-            print("Settings: Migrating old 'notification_settings' to 'push_notification_settings'.") 
-            loaded_notif_settings = settings.pop('notification_settings') 
-        elif 'push_notification_settings' in settings:
-            loaded_notif_settings = settings.pop('push_notification_settings') 
-        
-        notif_set = default_push_notification_settings_val.copy() 
-        notif_set.update(loaded_notif_settings) 
-        settings['push_notification_settings'] = notif_set 
-        if notif_set.get('notification_type') not in ["None", "Email", "Text", "Both"]: notif_set['notification_type'] = default_push_notification_settings_val['notification_type'] 
-        if notif_set.get('frequency') not in ["Hourly", "Daily", "Weekly", "Monthly"]: notif_set['frequency'] = default_push_notification_settings_val['frequency'] 
-        
-        port_val = notif_set.get('smtp_port', default_push_notification_settings_val['smtp_port'])
-        notif_set.setdefault('smtp_server', default_push_notification_settings_val['smtp_server'])
-        try:
-            port_str = str(port_val).strip()
-            if port_str.isdigit():
-                notif_set['smtp_port'] = int(port_str)
-            else:
-                notif_set['smtp_port'] = "" 
-        except Exception: 
-            notif_set['smtp_port'] = ""
-        
-        loaded_status_request_settings = settings.pop('status_request_settings', {})
-        status_req_set = default_status_request_settings_val.copy()
-        status_req_set.update(loaded_status_request_settings)
-        settings['status_request_settings'] = status_req_set
-        
-        for key in ['imap_port', 'smtp_port']:
-            port_val = status_req_set.get(key)
-            try:
-                port_str = str(port_val).strip()
-                if port_str.isdigit():
-                    status_req_set[key] = int(port_str)
-                else:
-                    status_req_set[key] = ""
-            except Exception:
-                status_req_set[key] = ""
-        
-        if 'conditional_notification_settings' not in settings or not isinstance(settings.get('conditional_notification_settings'), dict):
-            settings['conditional_notification_settings'] = default_conditional_notification_settings_val 
-            if not is_new_file_or_major_corruption: print("Settings: conditional_notification_settings initialized/adjusted.") 
-        cond_set = default_conditional_notification_settings_val.copy()
-        if 'conditional_notification_settings' in settings:
-            cond_set.update(settings['conditional_notification_settings'])
+    def _validate_library_references(self, settings):
+        """Resets tap assignments that point at beverages or kegs that no longer exist. Returns True if any changed."""
+        changed = False
         
-        settings['conditional_notification_settings'] = cond_set
+        # Fall back to the first beverage actually in the library so the fix sticks
+        # (the generated defaults carry fresh random IDs on every call).
+        library_ids = [b['id'] for b in self.beverage_library.get('beverages', []) if 'id' in b]
+        fallback_beverage_id = library_ids[0] if library_ids else UNASSIGNED_BEVERAGE_ID
+        valid_beverage_ids = set(library_ids)
+        valid_beverage_ids.add(UNASSIGNED_BEVERAGE_ID)
+        beverage_assignments = settings['sensor_beverage_assignments']
+        for i in range(len(beverage_assignments)):
+            if beverage_assignments[i] not in valid_beverage_ids:
+                beverage_assignments[i] = fallback_beverage_id
+                changed = True
         
-        if len(settings['conditional_notification_settings'].get('sent_notifications', [])) != self.num_sensors:
-            settings['conditional_notification_settings']['sent_notifications'] = [False] * self.num_sensors 
-        if 'temp_sent_timestamps' not in settings['conditional_notification_settings'] or not isinstance(settings['conditional_notification_settings']['temp_sent_timestamps'], list): 
-            settings['conditional_notification_settings']['temp_sent_timestamps'] = [] 
-        
-        if 'error_reported_times' not in settings['conditional_notification_settings'] or not isinstance(settings.get('conditional_notification_settings', {}).get('error_reported_times'), dict):
-             settings['conditional_notification_settings']['error_reported_times'] = default_conditional_notification_settings_val['error_reported_times']
-        else:
-             merged_errors = default_conditional_notification_settings_val['error_reported_times'].copy()
-             merged_errors.update(cond_set.get('error_reported_times', {}))
-             settings['conditional_notification_settings']['error_reported_times'] = merged_errors
+        valid_keg_ids = self.keg_map.keys()
+        keg_assignments = settings['sensor_keg_assignments']
+        for i in range(len(keg_assignments)):
+            if keg_assignments[i] != UNASSIGNED_KEG_ID and keg_assignments[i] not in valid_keg_ids:
+                keg_assignments[i] = UNASSIGNED_KEG_ID
+                changed = True
         
-        try:
-            settings['conditional_notification_settings']['threshold_liters'] = float(settings['conditional_notification_settings']['threshold_liters']) 
-            settings['conditional_notification_settings']['low_temp_f'] = float(settings['conditional_notification_settings']['low_temp_f']) 
-            settings['conditional_notification_settings']['high_temp_f'] = float(settings['conditional_notification_settings']['high_temp_f']) 
-        except (ValueError, TypeError):
-            print("Settings: Conditional notification thresholds corrupted. Resetting to defaults.") 
-            settings['conditional_notification_settings']['threshold_liters'] = default_conditional_notification_settings_val['threshold_liters'] 
-            settings['conditional_notification_settings']['low_temp_f'] = default_conditional_notification_settings_val['low_temp_f'] 
-            settings['conditional_notification_settings']['high_temp_f'] = default_conditional_notification_settings_val['high_temp_f'] 
-
-        if force_defaults or is_new_file_or_major_corruption:
-             self._save_all_settings(current_settings=settings)
-        return settings
+        return changed
         
     def reset_all_settings_to_defaults(self):
         print("SettingsManager: Resetting all settings to their default values.") 
@@ -752,32 +745,27 @@ class SettingsManager:
         self.keg_map = {k['id']: k for k in self.keg_library['kegs']}
         self._save_keg_library(self.keg_library)
         
-        self.settings = {
-            'sensor_labels': self._get_default_sensor_labels(), 
-            'sensor_keg_assignments': self._get_default_sensor_keg_assignments(), 
-            'sensor_beverage_assignments': self._get_default_beverage_assignments(), 
-            'system_settings': self._get_default_system_settings(), 
-            'push_notification_settings': self._get_default_push_notification_settings(), 
-            'status_request_settings': self._get_default_status_request_settings(),
-            'conditional_notification_settings': self._get_default_conditional_notification_settings(), 
-        }
+        self.settings = self._get_settings_defaults()
+        self.settings['schema_version'] = SETTINGS_SCHEMA_VERSION
         self._save_all_settings() 
         print("SettingsManager: All settings have been reset to defaults and saved.")
         
-    # --- NEW HELPER: Load workflow data from disk directly ---
-    def _get_workflow_data_from_disk(self):
-        base_dir = self.get_data_dir()
-        workflow_file = os.path.join(base_dir, "process_flow.json")
+    # --- WORKFLOW DATA (process_flow.json, cached until the file changes) ---
+    def get_workflow_data(self):
+        """Returns the parsed process_flow.json (shared, read-only), or None if missing/unreadable."""
+        return self._workflow_cache.get()
+
+    def save_workflow_data(self, data):
+        self.write_shared_json(self.process_flow_file_path, data, "process_flow", cache=self._workflow_cache)
+
+    def get_workflow_data_with_names(self):
+        """Returns (columns, {beverage_id: name}) for status messages."""
         beverage_library = self.get_beverage_library()
         beverage_map = {b['id']: b['name'] for b in beverage_library.get('beverages', []) if 'id' in b and 'name' in b}
         
-        if os.path.exists(workflow_file):
-            try:
-                with open(workflow_file, 'r') as f:
-                    data = json.load(f)
-                    return data.get('columns', {}), beverage_map
-            except Exception:
-                return {}, beverage_map
+        data = self.get_workflow_data()
+        if isinstance(data, dict) and isinstance(data.get('columns'), dict):
+            return data['columns'], beverage_map
         return {}, beverage_map
 
     def get_ui_mode(self): return self.settings.get('system_settings', {}).get('ui_mode', 'basic')
@@ -911,12 +899,6 @@ class SettingsManager:
         
         settings = cond_set 
         
-        if 'sent_notifications' not in settings or len(settings['sent_notifications']) != self.num_sensors: 
-            settings['sent_notifications'] = defaults['sent_notifications'] 
-            
-        if 'temp_sent_timestamps' not in settings or not isinstance(settings['temp_sent_timestamps'], list): 
-            settings['temp_sent_timestamps'] = [] 
-        
         if 'error_reported_times' not in settings:
              settings['error_reported_times'] = defaults['error_reported_times']
         else:
@@ -934,29 +916,24 @@ class SettingsManager:
         self._save_all_settings() 
         print("SettingsManager: Conditional notification settings saved.") 
     
-    def update_conditional_sent_status(self, tap_index, status):
-        cond_notif_settings = self.settings.get('conditional_notification_settings', {}).copy() 
-        sent_status_list = cond_notif_settings.get('sent_notifications', []) 
-        
-        if len(sent_status_list) != self.num_sensors: 
-            sent_status_list = [False] * self.num_sensors 
-
-        if 0 <= tap_index < len(sent_status_list): 
-            sent_status_list[tap_index] = status 
-            cond_notif_settings['sent_notifications'] = sent_status_list 
-            self.settings['conditional_notification_settings'] = cond_notif_settings 
-            self._save_all_settings() 
-            print(f"SettingsManager: Updated conditional notification sent status for tap {tap_index+1} to {status}.") 
-        else:
-            print(f"SettingsManager Error: Invalid tap index {tap_index} for updating conditional sent status.") 
-
-    def update_temp_sent_timestamp(self, timestamp=None):
-        cond_notif_settings = self.settings.get('conditional_notification_settings', {}).copy() 
-        timestamps = [timestamp if timestamp is not None else time.time()] 
-        cond_notif_settings['temp_sent_timestamps'] = timestamps 
-        self.settings['conditional_notification_settings'] = cond_notif_settings 
-        self._save_all_settings() 
-        print("SettingsManager: Updated conditional temperature sent timestamp.") 
+    # --- LEGACY ALERT BOOKKEEPING ---
+    # 'sent_notifications' / 'temp_sent_timestamps' in conditional_notification_settings predate
+    # the alert rule engine (alert_state.json). They are only read once, as input for
+    # NotificationService._migrate_alert_state(), and then removed.
+    def get_legacy_alert_state(self):
+        """Returns (sent_notifications, temp_sent_timestamps) from older settings, or ([], [])."""
+        cond = self.settings.get('conditional_notification_settings', {})
+        sent = cond.get('sent_notifications')
+        timestamps = cond.get('temp_sent_timestamps')
+        return (sent if isinstance(sent, list) else []), (timestamps if isinstance(timestamps, list) else [])
+
+    def discard_legacy_alert_state(self):
+        cond = self.settings.get('conditional_notification_settings', {})
+        if 'sent_notifications' in cond or 'temp_sent_timestamps' in cond:
+            cond.pop('sent_notifications', None)
+            cond.pop('temp_sent_timestamps', None)
+            self._save_all_settings()
+            print("SettingsManager: Removed legacy alert bookkeeping (now in the alert rule state).")
         
     def update_error_reported_time(self, error_type, timestamp):
         cond_notif_settings = self.settings.get('conditional_notification_settings', {}).copy()
@@ -1155,8 +1132,188 @@ class SettingsManager:
         }
 
     def _save_all_settings(self, current_settings=None):
+        """Marks settings.json dirty. The background writer persists it (see flush_settings)."""
         settings_to_save = current_settings if current_settings is not None else self.settings
+        self._settings_writer.mark_dirty(settings_to_save)
+        
+        # Every setter funnels through here, so this is where subscribers learn about changes
+        if settings_to_save is getattr(self, 'settings', None):
+            self._dispatch_setting_changes()
+
+    # --- CHANGE SUBSCRIPTIONS ---
+    def subscribe(self, paths, callback):
+        """
+        Registers callback(changed_paths) for changes to settings 'paths'.
+        A path is a top-level section ("push_notification_settings") or "section.key"
+        ("system_settings.displayed_taps"). The callback runs on the thread that saved
+        the setting, right after the save, so keep it short (cache values / set an Event).
+        Returns a subscription id for unsubscribe().
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        with self._subscription_lock:
+            subscription_id = self._next_subscription_id
+            self._next_subscription_id += 1
+            snapshot = {path: copy.deepcopy(self._get_setting_path(path)) for path in paths}
+            self._subscriptions[subscription_id] = (callback, snapshot)
+        return subscription_id
+
+    def unsubscribe(self, subscription_id):
+        with self._subscription_lock:
+            self._subscriptions.pop(subscription_id, None)
+
+    def _get_setting_path(self, path):
+        section_name, _, key = path.partition('.')
+        section = getattr(self, 'settings', {}).get(section_name)
+        if not key:
+            return section
+        return section.get(key) if isinstance(section, dict) else None
+
+    def _dispatch_setting_changes(self):
+        """Compares each subscription's last-seen values with the current settings and fires callbacks."""
+        to_notify = []
+        with self._subscription_lock:
+            for callback, snapshot in self._subscriptions.values():
+                changed_paths = []
+                for path, last_value in snapshot.items():
+                    current_value = self._get_setting_path(path)
+                    if current_value != last_value:
+                        snapshot[path] = copy.deepcopy(current_value)
+                        changed_paths.append(path)
+                if changed_paths:
+                    to_notify.append((callback, changed_paths))
+
+        for callback, changed_paths in to_notify:
+            try:
+                callback(changed_paths)
+            except Exception as e:
+                print(f"SettingsManager: Error in settings change callback for {changed_paths}: {e}")
+
+    # --- CROSS-PROCESS SYNC ---
+    def write_shared_json(self, path, data, section, cache=None):
+        """
+        Atomically writes a data file shared with the other keglevel process and records
+        'section' in the change feed. 'cache' (a JsonFileCache for 'path') is updated in place.
+        """
+        with self._file_lock, self._sync_lock:
+            self._poll_change_feed()
+            write_json_atomic(path, data, indent=4)
+            if cache is not None:
+                cache.store(data)
+            self._feed_seq = self._change_feed.publish([section])
+
+    def add_external_change_listener(self, callback):
+        """callback(sections) runs from check_for_external_changes() after another process changed 'sections'."""
+        self._external_change_listeners.append(callback)
+
+    def _poll_change_feed(self):
+        """Adds the sections other processes wrote since our last look to the pending set. Caller holds _sync_lock."""
+        seq, sections = self._change_feed.read_since(self._feed_seq)
+        if seq == self._feed_seq:
+            return
+        self._feed_seq = seq
+        if sections is None:
+            # Fell behind the feed (or it was reset): assume everything changed
+            sections = set(getattr(self, 'settings', {}).keys()) | SHARED_FILE_SECTIONS
+        self._pending_external_sections.update(sections)
+
+    def _merge_external_settings(self):
+        """
+        Adopts the settings.json sections another process wrote. If this process also
+        changed a section since its own last write, dict sections are merged key by key
+        (keys changed locally win); other values keep the local copy.
+        Caller holds _file_lock and _sync_lock.
+        """
+        pending = [section for section in self._pending_external_sections if section not in SHARED_FILE_SECTIONS]
+        if not pending:
+            return
+        self._pending_external_sections.difference_update(pending)
+        
         try:
-            with open(self.settings_file_path, 'w') as f: json.dump(settings_to_save, f, indent=4) 
-            print(f"Settings saved to {self.settings_file_path}.") 
-        except Exception as e: print(f"Error saving all settings to {self.settings_file_path}: {e}")
+            with open(self.settings_file_path, 'r') as f:
+                disk_settings = json.load(f)
+        except Exception as e:
+            print(f"SettingsManager: Could not read settings changed by another process: {e}")
+            return
+        
+        for section in pending:
+            if section not in disk_settings:
+                continue
+            remote = disk_settings[section]
+            local = self.settings.get(section)
+            base = self._written_settings.get(section)
+            
+            if local == base:
+                self.settings[section] = remote
+            elif isinstance(local, dict) and isinstance(remote, dict) and isinstance(base, dict):
+                for key, value in remote.items():
+                    if local.get(key) == base.get(key):
+                        local[key] = value
+            else:
+                print(f"SettingsManager: Keeping local '{section}' over the copy saved by another process.")
+                continue
+            
+            self._written_settings[section] = copy.deepcopy(remote)
+            self._adopted_external_sections.add(section)
+
+    def _before_settings_write(self, data):
+        # Runs on the writer thread with the file lock held: pick up the other process's
+        # sections first so this write does not overwrite them with stale copies.
+        if data is self.settings:
+            with self._sync_lock:
+                self._poll_change_feed()
+                self._merge_external_settings()
+        return data
+
+    def _after_settings_write(self, text):
+        written = json.loads(text)
+        with self._sync_lock:
+            changed = [key for key in set(written) | set(self._written_settings)
+                       if written.get(key) != self._written_settings.get(key)]
+            self._written_settings = written
+            if changed:
+                self._feed_seq = self._change_feed.publish(changed)
+
+    def check_for_external_changes(self):
+        """
+        Reloads whatever another keglevel process saved since the last call and returns
+        the set of changed sections (empty in the common case, which costs one stat()).
+        Subscriptions and external change listeners are notified. Call from the Tk thread.
+        """
+        if not self._change_feed.has_changed() and not self._adopted_external_sections:
+            return set()
+        
+        with self._file_lock, self._sync_lock:
+            self._poll_change_feed()
+            self._merge_external_settings()
+            
+            changed = set(self._adopted_external_sections)
+            self._adopted_external_sections.clear()
+            
+            file_sections = self._pending_external_sections & SHARED_FILE_SECTIONS
+            self._pending_external_sections.clear()
+            if "beverage_library" in file_sections:
+                self.beverage_library = self._load_beverage_library()
+            if "keg_library" in file_sections:
+                self.keg_library, self.keg_map = self._load_keg_library()
+            changed |= file_sections
+        
+        if not changed:
+            return changed
+        
+        print(f"SettingsManager: Reloaded sections saved by another process: {', '.join(sorted(changed))}")
+        self._dispatch_setting_changes()
+        for listener in list(self._external_change_listeners):
+            try:
+                listener(changed)
+            except Exception as e:
+                print(f"SettingsManager: Error in external change listener: {e}")
+        return changed
+
+    def flush_settings(self):
+        """Writes any pending settings.json changes now. Call before exit/restart or handing off to another process."""
+        return self._settings_writer.flush()
+
+    def stop_settings_writer(self):
+        """Final flush on shutdown; stops the background writer thread."""
+        self._settings_writer.stop()
@@ -0,0 +1,250 @@
+# keglevel app
+#
+# settings_schema.py
+import copy
+
+# Bump when a migration is added below. Stored in settings.json as "schema_version";
+# files without it are treated as version 0 (pre-schema).
+SETTINGS_SCHEMA_VERSION = 1
+
+
+# --- FIELD SPECS ---
+# Each field has a cheap 'check' (the fast path, run on every load) and an optional
+# 'coerce' used only when the check fails. If coerce is missing or raises, the
+# field is reset to its default.
+
+class FieldSpec:
+    __slots__ = ("check", "coerce")
+
+    def __init__(self, check, coerce=None):
+        self.check = check
+        self.coerce = coerce
+
+
+def Any():
+    return FieldSpec(lambda v: True)
+
+def Choice(*options):
+    return FieldSpec(lambda v: v in options)
+
+def Str():
+    return FieldSpec(lambda v: isinstance(v, str))
+
+def Int():
+    return FieldSpec(lambda v: type(v) is int, int)
+
+def Float():
+    return FieldSpec(lambda v: type(v) is float, float)
+
+def IntRange(low, high):
+    def coerce(v):
+        v = int(v)
+        if not (low <= v <= high):
+            raise ValueError(v)
+        return v
+    return FieldSpec(lambda v: type(v) is int and low <= v <= high, coerce)
+
+def Port():
+    """A TCP port stored as int, or "" when unset/invalid."""
+    def coerce(v):
+        port_str = str(v).strip()
+        return int(port_str) if port_str.isdigit() else ""
+    return FieldSpec(lambda v: v == "" or type(v) is int, coerce)
+
+def ListOf(length=None):
+    return FieldSpec(lambda v: isinstance(v, list) and (length is None or len(v) == length))
+
+def FloatList(length):
+    def coerce(v):
+        if not isinstance(v, list) or len(v) != length:
+            raise ValueError(v)
+        return [float(x) for x in v]
+    return FieldSpec(lambda v: isinstance(v, list) and len(v) == length and all(type(x) is float for x in v), coerce)
+
+def DictWithKeys(default):
+    """A dict that must contain at least the keys of 'default' (missing ones are merged in)."""
+    def coerce(v):
+        if not isinstance(v, dict):
+            raise ValueError(v)
+        merged = copy.deepcopy(default)
+        merged.update(v)
+        return merged
+    return FieldSpec(lambda v: isinstance(v, dict) and all(k in v for k in default), coerce)
+
+
+class Section:
+    """A dict section: missing keys are filled from defaults, listed fields are validated."""
+
+    def __init__(self, fields):
+        self.fields = fields
+
+
+def build_settings_schema(num_sensors, defaults):
+    """Declarative schema for settings.json. 'defaults' is the dict of per-section defaults."""
+    return {
+        "sensor_labels": ListOf(num_sensors),
+        "sensor_beverage_assignments": ListOf(num_sensors),
+        "sensor_keg_assignments": ListOf(num_sensors),
+        "system_settings": Section({
+            "display_units": Choice("imperial", "metric"),
+            "displayed_taps": IntRange(1, num_sensors),
+            "ui_mode": Choice("detailed", "basic"),
+            "flow_calibration_factors": FloatList(num_sensors),
+            "metric_pour_ml": Int(),
+            "imperial_pour_oz": Int(),
+            "flow_calibration_notes": Str(),
+            "flow_calibration_to_be_poured": Float(),
+            "temp_sampling_mode": Choice("standard", "fast"),
+            "temp_fast_interval_seconds": IntRange(2, 300),
+            "temp_filter": Choice("ewma", "median"),
+            "temp_deadband_f": Float(),
+        }),
+        "push_notification_settings": Section({
+            "notification_type": Choice("None", "Email", "Text", "Both"),
+            "frequency": Choice("Hourly", "Daily", "Weekly", "Monthly"),
+            "smtp_port": Port(),
+        }),
+        "status_request_settings": Section({
+            "imap_port": Port(),
+            "smtp_port": Port(),
+        }),
+        "conditional_notification_settings": Section({
+            "error_reported_times": DictWithKeys(defaults["conditional_notification_settings"]["error_reported_times"]),
+            "threshold_liters": Float(),
+            "low_temp_f": Float(),
+            "high_temp_f": Float(),
+            "digest_window_seconds": IntRange(0, 3600),
+            "temp_alert_severity": Choice("critical", "normal"),
+        }),
+    }
+
+
+def compile_schema(schema, defaults):
+    """
+    Flattens the schema into a list of validation steps and returns validate(settings).
+    validate() fixes 'settings' in place and returns the list of repaired paths
+    (empty when the file was already valid, which is the common case).
+    """
+    steps = []
+    for key, spec in schema.items():
+        default = defaults[key]
+        if isinstance(spec, Section):
+            field_steps = [(field_key, field_spec, default[field_key]) for field_key, field_spec in spec.fields.items()]
+            steps.append((key, default, frozenset(default.keys()), field_steps))
+        else:
+            steps.append((key, default, None, spec))
+
+    def repair(container, key, spec, default, path, repaired):
+        value = container[key]
+        if spec.coerce is not None:
+            try:
+                container[key] = spec.coerce(value)
+                if spec.check(container[key]):
+                    repaired.append(path)
+                    return
+            except (ValueError, TypeError):
+                pass
+        container[key] = copy.deepcopy(default)
+        repaired.append(path)
+
+    def validate(settings):
+        repaired = []
+        for key, default, default_keys, spec in steps:
+            if default_keys is None:
+                # Top-level plain field
+                if key not in settings:
+                    settings[key] = copy.deepcopy(default)
+                    repaired.append(key)
+                elif not spec.check(settings[key]):
+                    repair(settings, key, spec, default, key, repaired)
+                continue
+
+            section = settings.get(key)
+            if not isinstance(section, dict):
+                settings[key] = copy.deepcopy(default)
+                repaired.append(key)
+                continue
+
+            if not default_keys.issubset(section.keys()):
+                for missing_key in default_keys - section.keys():
+                    section[missing_key] = copy.deepcopy(default[missing_key])
+                    repaired.append(f"{key}.{missing_key}")
+
+            for field_key, field_spec, field_default in spec:
+                if not field_spec.check(section[field_key]):
+                    repair(section, field_key, field_spec, field_default, f"{key}.{field_key}", repaired)
+        return repaired
+
+    return validate
+
+
+# --- MIGRATIONS ---
+# Each migration upgrades settings in place from (version - 1) to 'version'.
+# They run once: the resulting schema_version is saved with the settings.
+
+def _migrate_to_v1(settings, context):
+    """Folds the ad-hoc load-time migrations that predate the schema."""
+    # Keg definitions moved to keg_library.json (already imported by the keg library loader)
+    settings.pop('keg_definitions', None)
+
+    # 'notification_settings' was renamed to 'push_notification_settings'
+    if 'notification_settings' in settings:
+        print("Settings: Migrating old 'notification_settings' to 'push_notification_settings'.")
+        legacy = settings.pop('notification_settings')
+        if isinstance(legacy, dict):
+            merged = settings.get('push_notification_settings') if isinstance(settings.get('push_notification_settings'), dict) else {}
+            legacy.update(merged)
+            settings['push_notification_settings'] = legacy
+
+    sys_set = settings.get('system_settings')
+    if not isinstance(sys_set, dict):
+        return
+
+    sys_set.pop('velocity_mode', None)
+    sys_set.pop('user_temp_input_c', None)
+
+    # UI mode rename: Full/Lite -> Detailed/Basic
+    if sys_set.get('ui_mode') == 'full':
+        sys_set['ui_mode'] = 'detailed'
+        print("Settings: Migrated UI Mode 'full' -> 'detailed'")
+    elif sys_set.get('ui_mode') == 'lite':
+        sys_set['ui_mode'] = 'basic'
+        print("Settings: Migrated UI Mode 'lite' -> 'basic'")
+
+    # Installs from before the setup wizard: treat a configured system as set up
+    if 'setup_complete' not in sys_set:
+        assignments = settings.get('sensor_keg_assignments')
+        labels = settings.get('sensor_labels')
+        has_active_kegs = isinstance(assignments, list) and any(k != context['unassigned_keg_id'] for k in assignments)
+        has_custom_labels = isinstance(labels, list) and any(l != f"Tap {i+1}" for i, l in enumerate(labels))
+
+        if has_active_kegs or has_custom_labels:
+            print("Settings: Legacy installation detected. Auto-completing setup.")
+            sys_set['setup_complete'] = True
+        else:
+            sys_set['setup_complete'] = False
+
+
+MIGRATIONS = [
+    (1, _migrate_to_v1),
+]
+
+
+def migrate_settings(settings, context):
+    """
+    Runs only the migrations newer than the stored schema_version.
+    Returns the list of versions applied (empty when already current).
+    """
+    try:
+        stored_version = int(settings.get('schema_version', 0))
+    except (TypeError, ValueError):
+        stored_version = 0
+
+    applied = []
+    for version, migration in MIGRATIONS:
+        if version > stored_version:
+            migration(settings, context)
+            applied.append(version)
+
+    settings['schema_version'] = SETTINGS_SCHEMA_VERSION
+    return applied
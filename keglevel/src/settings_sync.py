@@ -0,0 +1,199 @@
+# keglevel app
+#
+# settings_sync.py
+import copy
+import json
+import os
+import threading
+
+from settings_writer import write_text_atomic
+
+try:
+    import fcntl
+except ImportError:
+    # Windows development machines: only threads are serialized
+    fcntl = None
+
+LOCK_FILE = ".keglevel.lock"
+CHANGE_FEED_FILE = "change_feed.json"
+
+# Entries kept in the feed. A process that falls further behind than this
+# (or finds the feed reset) reloads every section instead.
+MAX_FEED_ENTRIES = 64
+
+
+class InterProcessLock:
+    """
+    Exclusive lock shared by every keglevel process on the same data directory
+    (the main app and the --open-beverage-library window). Re-entrant within a
+    process. Uses fcntl.flock where available; the OS drops it if a process dies.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except OSError as e:
+                print(f"InterProcessLock: Could not lock {self.path}: {e}")
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class ChangeFeed:
+    """
+    Small journal of which sections were written, and by which process:
+
+        {"seq": 12, "entries": [{"seq": 12, "pid": 4242, "sections": ["system_settings"]}, ...]}
+
+    Writers call publish() while holding the InterProcessLock. Readers call
+    read_since(last_seq); when the feed file is unchanged this is a single stat().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._signature = None
+        self._feed = {"seq": 0, "entries": []}
+
+    def _get_signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def has_changed(self):
+        """True if the feed file changed since it was last read or written by this process."""
+        return self._get_signature() != self._signature
+
+    def _read(self):
+        signature = self._get_signature()
+        if signature == self._signature:
+            return self._feed
+
+        feed = {"seq": 0, "entries": []}
+        if signature is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    loaded = json.load(f)
+                if isinstance(loaded.get('seq'), int) and isinstance(loaded.get('entries'), list):
+                    feed = loaded
+            except Exception as e:
+                print(f"ChangeFeed: Could not read {self.path}: {e}. Treating as empty.")
+
+        self._feed = feed
+        self._signature = signature
+        return feed
+
+    def get_sequence(self):
+        return self._read()['seq']
+
+    def read_since(self, last_seq):
+        """
+        Returns (seq, sections): the current sequence number and the set of sections
+        other processes wrote after 'last_seq'. sections is None when the entries
+        needed are no longer in the feed; the caller should then reload everything.
+        """
+        feed = self._read()
+        seq = feed['seq']
+        if seq == last_seq:
+            return seq, set()
+
+        entries = [e for e in feed['entries'] if e.get('seq', 0) > last_seq]
+        if seq < last_seq or not entries or entries[0].get('seq') != last_seq + 1:
+            return seq, None
+
+        own_pid = os.getpid()
+        sections = set()
+        for entry in entries:
+            if entry.get('pid') != own_pid:
+                sections.update(entry.get('sections', []))
+        return seq, sections
+
+    def publish(self, sections):
+        """Appends an entry for 'sections' and returns its sequence number. Hold the InterProcessLock."""
+        feed = self._read()
+        seq = feed['seq'] + 1
+        entries = feed['entries'][-(MAX_FEED_ENTRIES - 1):]
+        entries.append({"seq": seq, "pid": os.getpid(), "sections": sorted(sections)})
+        new_feed = {"seq": seq, "entries": entries}
+
+        write_text_atomic(self.path, json.dumps(new_feed))
+        self._feed = new_feed
+        self._signature = self._get_signature()
+        return seq
+
+
+class JsonFileCache:
+    """
+    The parsed contents of one shared JSON data file (e.g. process_flow.json).
+
+    get() re-reads the file only when its (mtime, size) signature changed, so
+    callers that need the data on every status message or refresh pay a single
+    stat() otherwise. Writers call store() with the data they just wrote, while
+    still holding the InterProcessLock, so their own write is never read back.
+    The returned object is shared: treat it as read-only.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None
+        self._data = None
+
+    def _get_signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def get(self):
+        """Returns the parsed file, or None if it is missing or unreadable."""
+        signature = self._get_signature()
+        if signature is None:
+            return None
+        with self._lock:
+            if signature != self._signature:
+                try:
+                    with open(self.path, 'r') as f:
+                        self._data = json.load(f)
+                except Exception as e:
+                    print(f"JsonFileCache: Could not read {self.path}: {e}")
+                    self._data = None
+                # A bad file is not re-parsed until it changes again
+                self._signature = signature
+            return self._data
+
+    def store(self, data):
+        """Write-through: records 'data' as the current contents of the just-written file."""
+        signature = self._get_signature()
+        with self._lock:
+            self._data = copy.deepcopy(data)
+            self._signature = signature
@@ -0,0 +1,168 @@
+# keglevel app
+#
+# settings_writer.py
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Minimum time between two writes of the same file. Setters that fire in bursts
+# (e.g. pour end saves averages, volumes and keg dispensed volume back to back)
+# are coalesced into a single write.
+DEFAULT_FLUSH_INTERVAL_SECONDS = 2.0
+
+
+def write_json_atomic(path, data, indent=4):
+    """Serializes 'data' and writes it with write_text_atomic()."""
+    write_text_atomic(path, json.dumps(data, indent=indent))
+
+
+def write_text_atomic(path, text):
+    """
+    Writes 'text' to 'path' so that a power cut leaves either the old or the new
+    file, never a truncated one: write to a temp file in the same directory,
+    fsync it, then os.replace() over the target.
+    """
+    directory = os.path.dirname(path) or "."
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+
+    try:
+        with open(temp_path, 'w') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except Exception:
+        try:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    # Persist the rename itself (best effort; not supported on every platform)
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except (OSError, AttributeError):
+        pass
+
+
+class DebouncedJsonWriter:
+    """
+    Background writer that coalesces repeated saves of one JSON file.
+
+    mark_dirty(data) only records the latest data and wakes the writer thread; the
+    thread writes at most once every 'interval_seconds' using write_json_atomic().
+    flush() writes any pending data synchronously and is also registered with atexit.
+
+    Optional hooks for sharing the file with another process: 'lock' (a context
+    manager) is held around each write, before_write(data) runs first and returns
+    the data to write, and after_write(text) receives exactly what was written.
+    """
+
+    def __init__(self, path, interval_seconds=DEFAULT_FLUSH_INTERVAL_SECONDS, indent=4, name="settings",
+                 lock=None, before_write=None, after_write=None):
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self.indent = indent
+        self.name = name
+        self.lock = lock
+        self.before_write = before_write
+        self.after_write = after_write
+
+        self._lock = threading.Lock()       # Guards _pending_data / _dirty
+        self._write_lock = threading.Lock() # Serializes actual file writes
+        self._pending_data = None
+        self._dirty = False
+        self._last_write_time = 0.0
+
+        self._wake_event = threading.Event()
+        self._running = False
+        self._thread = None
+
+        atexit.register(self.flush)
+
+    def _ensure_thread(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self, data):
+        with self._lock:
+            self._pending_data = data
+            self._dirty = True
+        self._ensure_thread()
+        self._wake_event.set()
+
+    def is_dirty(self):
+        with self._lock:
+            return self._dirty
+
+    def _writer_loop(self):
+        while self._running:
+            self._wake_event.wait()
+            self._wake_event.clear()
+            if not self._running:
+                break
+
+            # Hold off until the interval since the last write has passed; further
+            # mark_dirty() calls in the meantime are folded into this write.
+            delay = (self._last_write_time + self.interval_seconds) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            self.flush()
+
+    def flush(self):
+        """Writes pending data now (if any). Safe to call from any thread."""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return True
+                data = self._pending_data
+                self._dirty = False
+
+            try:
+                with (self.lock if self.lock is not None else contextlib.nullcontext()):
+                    if self.before_write is not None:
+                        data = self.before_write(data)
+                    text = self._serialize(data)
+                    write_text_atomic(self.path, text)
+                    if self.after_write is not None:
+                        self.after_write(text)
+                self._last_write_time = time.monotonic()
+                print(f"Settings saved to {self.path}.")
+                return True
+            except Exception as e:
+                print(f"Error saving {self.name} to {self.path}: {e}")
+                with self._lock:
+                    # Keep newer data if a setter ran meanwhile; otherwise retry this data later
+                    if not self._dirty:
+                        self._pending_data = data
+                        self._dirty = True
+                return False
+
+    def _serialize(self, data):
+        # Other threads may mutate the settings dict while it is serialized; retry
+        # if a dict changed size mid-dump (the setter will mark dirty again anyway).
+        for attempt in range(3):
+            try:
+                return json.dumps(data, indent=self.indent)
+            except RuntimeError:
+                if attempt == 2:
+                    raise
+                time.sleep(0.01)
+
+    def stop(self):
+        """Flushes pending data and stops the writer thread."""
+        self._running = False
+        self._wake_event.set()
+        self.flush()
@@ -6,7 +6,6 @@ from tkinter import ttk, messagebox
 import tkinter.font as tkfont
 import os
 import sys
-import glob
 
 # Try to import platform flag, default to False if module missing (e.g. dev PC)
 try:
@@ -309,9 +308,8 @@ class SetupWizard:
         
         sensors = []
         try:
-            base_dir = '/sys/bus/w1/devices/'
-            device_folders = glob.glob(base_dir + '28-*')
-            sensors = [os.path.basename(f) for f in device_folders]
+            from onewire_sampler import detect_ds18b20_sensors
+            sensors = detect_ds18b20_sensors()
         except: pass
         
         self.sensor_var = tk.StringVar()
@@ -0,0 +1,81 @@
+# keglevel app
+#
+# temperature_filter.py
+import math
+from collections import deque
+
+# Smoothing time constant for the EWMA filter: a step change is ~63% through after this long
+EWMA_TIME_CONSTANT_SECONDS = 30.0
+# Number of samples in the running median window
+MEDIAN_WINDOW = 5
+
+
+class EWMAFilter:
+    """Exponentially weighted moving average with a fixed time constant, whatever the sample interval."""
+
+    def __init__(self, interval_seconds, time_constant_seconds=EWMA_TIME_CONSTANT_SECONDS):
+        self.alpha = 1.0 - math.exp(-float(interval_seconds) / time_constant_seconds)
+        self.value = None
+
+    def update(self, sample):
+        if self.value is None:
+            self.value = sample
+        else:
+            self.value += self.alpha * (sample - self.value)
+        return self.value
+
+    def reset(self):
+        self.value = None
+
+
+class MedianFilter:
+    """Running median of the last 'window' samples; rejects single-sample spikes outright."""
+
+    def __init__(self, window=MEDIAN_WINDOW):
+        self._samples = deque(maxlen=window)
+        self.value = None
+
+    def update(self, sample):
+        self._samples.append(sample)
+        ordered = sorted(self._samples)
+        middle = len(ordered) // 2
+        if len(ordered) % 2:
+            self.value = ordered[middle]
+        else:
+            self.value = (ordered[middle - 1] + ordered[middle]) / 2.0
+        return self.value
+
+    def reset(self):
+        self._samples.clear()
+        self.value = None
+
+
+def create_filter(filter_name, interval_seconds):
+    """Returns the filter for the 'temp_filter' setting ('ewma' or 'median')."""
+    if filter_name == "median":
+        return MedianFilter()
+    return EWMAFilter(interval_seconds)
+
+
+class DeadbandPublisher:
+    """
+    Decides when a filtered value is worth publishing: the first value, any change
+    of at least 'deadband', or a status change (e.g. reading -> sensor error).
+    """
+
+    def __init__(self, deadband):
+        self.deadband = deadband
+        self.last_value = None
+        self.last_status = None
+
+    def should_publish(self, value, status):
+        if status != self.last_status or (value is None) != (self.last_value is None):
+            publish = True
+        elif value is None:
+            publish = False
+        else:
+            publish = abs(value - self.last_value) >= self.deadband
+        if publish:
+            self.last_value = value
+            self.last_status = status
+        return publish
@@ -0,0 +1,426 @@
+# keglevel app
+#
+# temperature_history.py
+import time
+from array import array
+from datetime import date
+from collections import deque
+
+HOUR_SECONDS = 3600
+DAY_SECONDS = 24 * HOUR_SECONDS
+WEEK_SECONDS = 7 * DAY_SECONDS
+MONTH_SECONDS = 30 * DAY_SECONDS
+QUARTER_SECONDS = 91 * DAY_SECONDS
+YEAR_SECONDS = 365 * DAY_SECONDS
+
+# --- TIERS ---
+# Raw samples are kept for a day, hourly aggregates for a month and daily aggregates
+# for ten years, so memory and file size stay bounded while longer periods stay cheap.
+# TemperatureLogic samples every 5 minutes; the raw ring has room for twice that rate.
+RAW_CAPACITY = (DAY_SECONDS // 300) * 2
+HOURLY_CAPACITY = 31 * 24
+DAILY_CAPACITY = 10 * 366
+
+# Periods reported on the Temperature Log popup and in status reports, in display order.
+# Each is answered by the finest tier that covers it.
+STAT_PERIODS = (
+    ("day", DAY_SECONDS),
+    ("week", WEEK_SECONDS),
+    ("month", MONTH_SECONDS),
+    ("quarter", QUARTER_SECONDS),
+    ("year", YEAR_SECONDS),
+)
+RAW_PERIODS = ("day",)
+HOURLY_PERIODS = ("week", "month")
+DAILY_PERIODS = ("quarter", "year")
+
+# Tiers a range query can be served from, finest first, with their bucket size (raw: none)
+QUERY_TIERS = (("raw", 0), ("hourly", HOUR_SECONDS), ("daily", DAY_SECONDS))
+
+
+class RingBuffer:
+    """
+    Fixed-size ring of records with 'fields' floats each, stored in float arrays.
+    Records are addressed by an ever-increasing sequence number; when the ring is
+    full, appending overwrites the oldest record.
+    """
+
+    def __init__(self, capacity, fields=2):
+        self.capacity = capacity
+        self._columns = [array('d', [0.0]) * capacity for _ in range(fields)]
+        self.first_seq = 0  # Oldest sequence number still stored
+        self.next_seq = 0   # Sequence number the next append gets
+
+    def __len__(self):
+        return self.next_seq - self.first_seq
+
+    def is_full(self):
+        return len(self) == self.capacity
+
+    def append(self, *record):
+        if self.is_full():
+            self.first_seq += 1
+        seq = self.next_seq
+        slot = seq % self.capacity
+        for column, value in zip(self._columns, record):
+            column[slot] = value
+        self.next_seq += 1
+        return seq
+
+    def get(self, seq):
+        slot = seq % self.capacity
+        return tuple(column[slot] for column in self._columns)
+
+    def items(self, start_seq=None):
+        """Yields records from oldest (or 'start_seq') to newest."""
+        if start_seq is None or start_seq < self.first_seq:
+            start_seq = self.first_seq
+        for seq in range(start_seq, self.next_seq):
+            yield self.get(seq)
+
+    def find_seq(self, value):
+        """First sequence number whose first field is >= value; records must be in ascending order of it."""
+        column = self._columns[0]
+        low, high = self.first_seq, self.next_seq
+        while low < high:
+            middle = (low + high) // 2
+            if column[middle % self.capacity] < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def clear(self):
+        self.first_seq = 0
+        self.next_seq = 0
+
+
+class WindowStats:
+    """
+    High/low/avg over the records of the last 'window_seconds'. A record is an
+    aggregate (low, high, total, count); a raw reading v is (v, v, v, 1).
+    The average uses running sums; high and low use monotonic deques of
+    (seq, value), so adding or expiring a record is O(1) amortized.
+    """
+
+    def __init__(self, window_seconds):
+        self.window_seconds = window_seconds
+        self.start_seq = 0  # Oldest record still inside the window
+        self.total = 0.0
+        self.count = 0
+        self._max = deque()
+        self._min = deque()
+
+    def add(self, seq, low, high, total, count):
+        self.total += total
+        self.count += count
+        while self._max and self._max[-1][1] <= high:
+            self._max.pop()
+        self._max.append((seq, high))
+        while self._min and self._min[-1][1] >= low:
+            self._min.pop()
+        self._min.append((seq, low))
+
+    def drop_oldest(self, total, count):
+        """Removes the record at start_seq; 'total' and 'count' are that record's."""
+        self.count -= count
+        self.total = self.total - total if self.count else 0.0 # Reset to shed float drift
+        if self._max and self._max[0][0] == self.start_seq:
+            self._max.popleft()
+        if self._min and self._min[0][0] == self.start_seq:
+            self._min.popleft()
+        self.start_seq += 1
+
+    def get_aggregate(self):
+        """Returns (low, high, total, count), or None when the window is empty."""
+        if not self.count:
+            return None
+        return self._min[0][1], self._max[0][1], self.total, self.count
+
+    def reset(self, start_seq=0):
+        self.start_seq = start_seq
+        self.total = 0.0
+        self.count = 0
+        self._max.clear()
+        self._min.clear()
+
+
+def _merge_aggregates(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return min(first[0], second[0]), max(first[1], second[1]), first[2] + second[2], first[3] + second[3]
+
+
+def _aggregate_to_stats(aggregate):
+    """(low, high, total, count) -> (high, low, avg)."""
+    if aggregate is None or not aggregate[3]:
+        return None, None, None
+    return aggregate[1], aggregate[0], aggregate[2] / aggregate[3]
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _local_midnight(year, month, day):
+    # tm_isdst=-1 lets mktime pick the offset in force on that date
+    return int(time.mktime((year, month, day, 0, 0, 0, 0, 0, -1)))
+
+
+def _local_bucket_start(epoch, bucket_seconds):
+    # Align buckets to local time so daily aggregates run midnight to midnight. Whole-day
+    # buckets start at a local midnight (so a 23 or 25 hour DST-change day stays one
+    # bucket); shorter ones count from the day's midnight.
+    t = time.localtime(epoch)
+    if bucket_seconds % DAY_SECONDS == 0:
+        days = bucket_seconds // DAY_SECONDS
+        day_number = date(t.tm_year, t.tm_mon, t.tm_mday).toordinal() - _EPOCH_ORDINAL
+        start_day = date.fromordinal(_EPOCH_ORDINAL + (day_number // days) * days)
+        return _local_midnight(start_day.year, start_day.month, start_day.day)
+    if bucket_seconds < DAY_SECONDS:
+        midnight = _local_midnight(t.tm_year, t.tm_mon, t.tm_mday)
+        return midnight + ((epoch - midnight) // bucket_seconds) * bucket_seconds
+    offset = t.tm_gmtoff
+    return ((epoch + offset) // bucket_seconds) * bucket_seconds - offset
+
+
+def _local_bucket_end(bucket_start, bucket_seconds):
+    """Start of the bucket after the one starting at 'bucket_start'."""
+    if bucket_seconds % DAY_SECONDS == 0:
+        t = time.localtime(bucket_start)
+        # mktime normalizes the day overflow
+        return _local_midnight(t.tm_year, t.tm_mon, t.tm_mday + bucket_seconds // DAY_SECONDS)
+    return bucket_start + bucket_seconds
+
+
+class RollupTier:
+    """
+    Aggregates readings into fixed buckets (bucket_start, low, high, total, count).
+    Closed buckets go into a RingBuffer with a WindowStats per period; the open
+    bucket is merged in when stats are read.
+    """
+
+    def __init__(self, bucket_seconds, capacity, periods):
+        self.bucket_seconds = bucket_seconds
+        self.ring = RingBuffer(capacity, fields=5)
+        self.windows = {name: WindowStats(seconds) for name, seconds in periods}
+        self.open_bucket = None  # [bucket_start, low, high, total, count]
+
+    def add(self, epoch, value):
+        bucket_start = _local_bucket_start(epoch, self.bucket_seconds)
+        bucket = self.open_bucket
+        if bucket is not None and bucket[0] == bucket_start:
+            bucket[1] = min(bucket[1], value)
+            bucket[2] = max(bucket[2], value)
+            bucket[3] += value
+            bucket[4] += 1
+            return
+
+        if bucket is not None:
+            self._close_bucket(bucket)
+        self.open_bucket = [bucket_start, value, value, value, 1]
+
+    def _close_bucket(self, bucket):
+        if self.ring.is_full():
+            # The oldest bucket is about to be overwritten; it leaves every window first
+            oldest_seq = self.ring.first_seq
+            oldest = self.ring.get(oldest_seq)
+            for window in self.windows.values():
+                if window.start_seq == oldest_seq:
+                    window.drop_oldest(oldest[3], oldest[4])
+
+        seq = self.ring.append(*bucket)
+        for window in self.windows.values():
+            window.add(seq, bucket[1], bucket[2], bucket[3], bucket[4])
+
+    def expire(self, now):
+        # An open bucket whose time span is over is closed even if no reading followed it
+        if self.open_bucket is not None and _local_bucket_end(self.open_bucket[0], self.bucket_seconds) <= now:
+            self._close_bucket(self.open_bucket)
+            self.open_bucket = None
+
+        for window in self.windows.values():
+            cutoff = now - window.window_seconds
+            while window.start_seq < self.ring.next_seq:
+                bucket = self.ring.get(window.start_seq)
+                if _local_bucket_end(bucket[0], self.bucket_seconds) > cutoff:
+                    break
+                window.drop_oldest(bucket[3], bucket[4])
+
+    def get_earliest(self):
+        """Start of the oldest bucket held, or None."""
+        if len(self.ring):
+            return self.ring.get(self.ring.first_seq)[0]
+        return self.open_bucket[0] if self.open_bucket is not None else None
+
+    def iter_range(self, start, end):
+        """Yields (bucket_start, low, high, total, count) for buckets starting in [start, end), open bucket included."""
+        for bucket in self.ring.items(self.ring.find_seq(start)):
+            if bucket[0] >= end:
+                return
+            yield bucket
+        if self.open_bucket is not None and start <= self.open_bucket[0] < end:
+            yield tuple(self.open_bucket)
+
+    def get_stats(self, period):
+        aggregate = self.windows[period].get_aggregate()
+        if self.open_bucket is not None:
+            aggregate = _merge_aggregates(aggregate, tuple(self.open_bucket[1:]))
+        return _aggregate_to_stats(aggregate)
+
+    def to_dict(self):
+        return {"closed": [list(bucket) for bucket in self.ring.items()], "open": self.open_bucket}
+
+    def load(self, data):
+        self.clear()
+        for bucket in data.get("closed", []):
+            self._close_bucket([float(x) for x in bucket])
+        open_bucket = data.get("open")
+        self.open_bucket = [float(x) for x in open_bucket] if open_bucket else None
+
+    def clear(self):
+        self.ring.clear()
+        for window in self.windows.values():
+            window.reset()
+        self.open_bucket = None
+
+
+class TemperatureSeries:
+    """
+    One sensor's history: raw readings for a day (exact day stats), plus hourly
+    and daily RollupTiers for the longer periods.
+    """
+
+    def __init__(self):
+        self.raw = RingBuffer(RAW_CAPACITY, fields=2)
+        self.raw_windows = {name: WindowStats(seconds) for name, seconds in STAT_PERIODS if name in RAW_PERIODS}
+        self.hourly = RollupTier(HOUR_SECONDS, HOURLY_CAPACITY, [p for p in STAT_PERIODS if p[0] in HOURLY_PERIODS])
+        self.daily = RollupTier(DAY_SECONDS, DAILY_CAPACITY, [p for p in STAT_PERIODS if p[0] in DAILY_PERIODS])
+        self.last_updated = None
+
+    def add(self, epoch, value):
+        if self.raw.is_full():
+            oldest_seq = self.raw.first_seq
+            _, oldest_value = self.raw.get(oldest_seq)
+            for window in self.raw_windows.values():
+                if window.start_seq == oldest_seq:
+                    window.drop_oldest(oldest_value, 1)
+
+        seq = self.raw.append(epoch, value)
+        for window in self.raw_windows.values():
+            window.add(seq, value, value, value, 1)
+
+        self.hourly.add(epoch, value)
+        self.daily.add(epoch, value)
+
+    def expire(self, now):
+        """Drops readings and buckets older than each window. Call once per sample, with or without a new reading."""
+        for window in self.raw_windows.values():
+            cutoff = now - window.window_seconds
+            while window.start_seq < self.raw.next_seq:
+                epoch, value = self.raw.get(window.start_seq)
+                if epoch >= cutoff:
+                    break
+                window.drop_oldest(value, 1)
+        self.hourly.expire(now)
+        self.daily.expire(now)
+        self.last_updated = now
+
+    def get_stats(self, period):
+        """Returns (high, low, avg) for a period in STAT_PERIODS, or (None, None, None)."""
+        if period in self.raw_windows:
+            return _aggregate_to_stats(self.raw_windows[period].get_aggregate())
+        if period in self.hourly.windows:
+            return self.hourly.get_stats(period)
+        return self.daily.get_stats(period)
+
+    def _get_tier_earliest(self, tier_name):
+        if tier_name == "raw":
+            return self.raw.get(self.raw.first_seq)[0] if len(self.raw) else None
+        return getattr(self, tier_name).get_earliest()
+
+    def _iter_tier(self, tier_name, start, end):
+        # Every tier as (start, low, high, total, count) records
+        if tier_name != "raw":
+            yield from getattr(self, tier_name).iter_range(start, end)
+            return
+        for epoch, value in self.raw.items(self.raw.find_seq(start)):
+            if epoch >= end:
+                return
+            yield epoch, value, value, value, 1
+
+    def query(self, start, end, bucket_seconds):
+        """
+        Returns (bucket_seconds, source, points) for readings in [start, end), grouped into
+        buckets of 'bucket_seconds' (aligned to local time). points is a list of
+        (bucket_start, low, high, avg, count), oldest first, with empty buckets omitted.
+
+        The coarsest tier no coarser than the request is used, so a month of hourly
+        points comes from the hourly rollups, not from raw readings. When that tier does
+        not reach back to 'start' a coarser one that does is used instead, and the
+        returned bucket_seconds is raised to its bucket size. 'source' names the tier.
+        """
+        candidates = [tier for tier in QUERY_TIERS if tier[1] <= bucket_seconds]
+        index = len(candidates) - 1
+        while index + 1 < len(QUERY_TIERS):
+            earliest = self._get_tier_earliest(QUERY_TIERS[index][0])
+            coarser_earliest = self._get_tier_earliest(QUERY_TIERS[index + 1][0])
+            if earliest is not None and earliest <= start:
+                break
+            if coarser_earliest is None or (earliest is not None and coarser_earliest >= earliest):
+                break
+            index += 1
+        source, tier_seconds = QUERY_TIERS[index]
+        bucket_seconds = max(bucket_seconds, tier_seconds)
+
+        points = []
+        current = None  # [bucket_start, low, high, total, count]
+        for record in self._iter_tier(source, start, end):
+            bucket_start = _local_bucket_start(record[0], bucket_seconds)
+            if current is not None and current[0] == bucket_start:
+                current[1] = min(current[1], record[1])
+                current[2] = max(current[2], record[2])
+                current[3] += record[3]
+                current[4] += record[4]
+                continue
+            if current is not None:
+                points.append((current[0], current[1], current[2], current[3] / current[4], current[4]))
+            current = list(record)
+            current[0] = bucket_start
+        if current is not None:
+            points.append((current[0], current[1], current[2], current[3] / current[4], current[4]))
+        return bucket_seconds, source, points
+
+    def to_dict(self):
+        return {
+            "raw": [list(reading) for reading in self.raw.items()],
+            "hourly": self.hourly.to_dict(),
+            "daily": self.daily.to_dict(),
+        }
+
+    def load(self, data, now):
+        """Restores a to_dict() snapshot, then expires against 'now'."""
+        self.clear()
+        for epoch, value in data.get("raw", []):
+            seq = self.raw.append(float(epoch), float(value))
+            for window in self.raw_windows.values():
+                window.add(seq, value, value, value, 1)
+        self.hourly.load(data.get("hourly", {}))
+        self.daily.load(data.get("daily", {}))
+        self.expire(now)
+
+    def load_readings(self, pairs, now):
+        """Rebuilds every tier by replaying raw (epoch, value) readings, oldest first (log migration)."""
+        self.clear()
+        for epoch, value in pairs:
+            self.add(float(epoch), float(value))
+        self.expire(now)
+
+    def clear(self):
+        self.raw.clear()
+        for window in self.raw_windows.values():
+            window.reset()
+        self.hourly.clear()
+        self.daily.clear()
+        self.last_updated = None
@@ -0,0 +1,101 @@
+# keglevel app
+#
+# temperature_journal.py
+import os
+import struct
+
+JOURNAL_MAGIC = b"KLTJ"
+JOURNAL_FORMAT_VERSION = 1
+
+# Header: magic, format version, record size, generation
+HEADER_STRUCT = struct.Struct('<4sHHI')
+# Record: epoch (float64), value (float64), channel (uint8) - 17 bytes per reading
+RECORD_STRUCT = struct.Struct('<ddB')
+
+# Channels stored in the journal
+CHANNEL_KEG = 0
+CHANNEL_RPI = 1
+
+
+class TemperatureJournal:
+    """
+    Append-only file of the raw temperature readings taken since the last compaction.
+
+    Each reading is one fixed-size record appended to the end of the file, so
+    logging never rewrites existing data. The header's generation ties the journal
+    to the snapshot it extends: compaction writes a snapshot with generation N+1
+    and then resets the journal to N+1. A journal from an older generation is
+    therefore already contained in the snapshot and is discarded on load.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def load(self, generation):
+        """
+        Scans the journal and returns its readings as (channel, epoch, value) tuples,
+        oldest first, leaving the file open for appends. A missing, unreadable or
+        stale journal is reset to 'generation' and yields no readings.
+        """
+        self.close()
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        except OSError as e:
+            print(f"TemperatureJournal: Could not read {self.path}: {e}")
+            data = b""
+
+        if len(data) >= HEADER_STRUCT.size:
+            magic, version, record_size, file_generation = HEADER_STRUCT.unpack_from(data, 0)
+            is_current = (magic == JOURNAL_MAGIC and version == JOURNAL_FORMAT_VERSION
+                          and record_size == RECORD_STRUCT.size and file_generation == generation)
+        else:
+            is_current = False
+
+        if not is_current:
+            if data:
+                print("TemperatureJournal: Journal does not extend the current snapshot; starting a new one.")
+            self.reset(generation)
+            return []
+
+        # A power cut can leave a partial record at the end; drop it
+        end = HEADER_STRUCT.size + ((len(data) - HEADER_STRUCT.size) // RECORD_STRUCT.size) * RECORD_STRUCT.size
+        readings = [(channel, epoch, value) for epoch, value, channel
+                    in RECORD_STRUCT.iter_unpack(memoryview(data)[HEADER_STRUCT.size:end])]
+
+        self._file = open(self.path, 'r+b')
+        if end != len(data):
+            print(f"TemperatureJournal: Dropped {len(data) - end} bytes of a partial record.")
+            self._file.truncate(end)
+        self._file.seek(end)
+        return readings
+
+    def append(self, channel, epoch, value):
+        if self._file is None:
+            return
+        self._file.write(RECORD_STRUCT.pack(epoch, value, channel))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def reset(self, generation):
+        """Replaces the journal with an empty one for 'generation' (atomically)."""
+        self.close()
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER_STRUCT.pack(JOURNAL_MAGIC, JOURNAL_FORMAT_VERSION, RECORD_STRUCT.size, generation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, 'r+b')
+        self._file.seek(0, os.SEEK_END)
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
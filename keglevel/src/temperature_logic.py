@@ -5,8 +5,36 @@ import time
 import threading
 import json
 import os
-import glob
-from datetime import datetime, timedelta
+import math
+from datetime import datetime
+
+from settings_writer import write_json_atomic
+from temperature_history import TemperatureSeries, STAT_PERIODS, HOUR_SECONDS, DAY_SECONDS
+from temperature_journal import TemperatureJournal, CHANNEL_KEG, CHANNEL_RPI
+from onewire_sampler import OneWireSampler
+from temperature_filter import create_filter, DeadbandPublisher
+from alert_rules import METRIC_KEGERATOR_TEMP_F, KEGERATOR_KEY
+
+# temperature_log.json layout: {"version": 3, "keg": <series>, "rpi": <series>} where a series is
+# TemperatureSeries.to_dict() (raw readings for a day, hourly and daily aggregates).
+# Version 2 stored a month of raw [epoch, value] pairs per sensor; version 1 (no "version"
+# key) kept daily/weekly/monthly lists of ISO-timestamped dicts. Both are migrated on load.
+# Since the journal was added this file is only the compacted snapshot; readings taken
+# after it are appended to temperature_log.journal (see TemperatureJournal).
+TEMPERATURE_LOG_VERSION = 3
+
+# How often the journal is folded into a fresh snapshot
+COMPACTION_INTERVAL_SECONDS = DAY_SECONDS
+
+# Readings are logged (and rolled up) every 5 minutes in every sampling mode.
+# 'fast' mode samples more often in between; see SettingsManager.get_temp_sampling_settings().
+LOG_INTERVAL_SECONDS = 300
+LOG_INTERVAL_SLACK_SECONDS = 1
+MIN_FAST_INTERVAL_SECONDS = 2
+DEFAULT_FAST_INTERVAL_SECONDS = 10
+
+# Bucket count query_temperature_history() aims for when no resolution is given
+DEFAULT_QUERY_POINTS = 300
 
 class TemperatureLogic:
     
@@ -18,56 +46,51 @@ class TemperatureLogic:
         self._temp_thread = None
         self._running = False
         self._stop_event = threading.Event()
+        # Wakes the monitor loop early (stop request or sampling settings change)
+        self._wake_event = threading.Event()
         self.last_known_temp_f = None
         self.last_update_time = None
         
+        # Optional WebDashboard (set by main.py when enabled)
+        self.dashboard = None
+        
+        # AlertRuleEngine fed with every published reading (set by main.py)
+        self.alert_engine = None
+        
+        # DS18B20 access: one bulk conversion per sample, probes read in parallel
+        self.sampler = OneWireSampler()
+        
+        # Sampling mode, filter and deadband (see _apply_sampling_config)
+        self._fast_sampling = False
+        self._temp_filter = None
+        self._publisher = None
+        self._sampling_config_changed = False
+        self.settings_manager.subscribe(
+            ["system_settings.temp_sampling_mode", "system_settings.temp_fast_interval_seconds",
+             "system_settings.temp_filter", "system_settings.temp_deadband_f"],
+            self._on_sampling_settings_changed
+        )
+        
         # Use SettingsManager's resolved data_dir
         base_dir = self.settings_manager.get_data_dir()
         self.log_file = os.path.join(base_dir, "temperature_log.json")
+        self.journal = TemperatureJournal(os.path.join(base_dir, "temperature_log.journal"))
+        self._snapshot_generation = 0
+        self._last_compaction_time = 0.0
         
-        # Initialize full log structure including RPi keys
-        self.log_data = {
-            "daily_log": [],      
-            "weekly_log": [],     
-            "monthly_log": [],    
-            "high_low_avg": {
-                "day": {"high": None, "low": None, "avg": None, "last_updated": None},
-                "week": {"high": None, "low": None, "avg": None, "last_updated": None},
-                "month": {"high": None, "low": None, "avg": None, "last_updated": None},
-            },
-            # --- NEW: RPi Internal Temp Logs (Source: Celsius) ---
-            "rpi_daily_log": [],
-            "rpi_weekly_log": [],
-            "rpi_monthly_log": [],
-            "rpi_high_low_avg": {
-                "day": {"high": None, "low": None, "avg": None, "last_updated": None},
-                "week": {"high": None, "low": None, "avg": None, "last_updated": None},
-                "month": {"high": None, "low": None, "avg": None, "last_updated": None},
-            }
-        }
+        # Readings live in fixed-size tiers (raw day, hourly month, daily years); the
+        # high/low/avg of every period is maintained incrementally as readings arrive and expire.
+        self._history_lock = threading.Lock()
+        self.keg_history = TemperatureSeries()  # Source: F
+        self.rpi_history = TemperatureSeries()  # Source: C
         self._load_log_data()
 
     def reset_log(self):
         """Clears all in-memory log data and saves the reset log to file."""
-        self.log_data = {
-            "daily_log": [],
-            "weekly_log": [],
-            "monthly_log": [],
-            "high_low_avg": {
-                "day": {"high": None, "low": None, "avg": None, "last_updated": None},
-                "week": {"high": None, "low": None, "avg": None, "last_updated": None},
-                "month": {"high": None, "low": None, "avg": None, "last_updated": None},
-            },
-            "rpi_daily_log": [],
-            "rpi_weekly_log": [],
-            "rpi_monthly_log": [],
-            "rpi_high_low_avg": {
-                "day": {"high": None, "low": None, "avg": None, "last_updated": None},
-                "week": {"high": None, "low": None, "avg": None, "last_updated": None},
-                "month": {"high": None, "low": None, "avg": None, "last_updated": None},
-            }
-        }
-        self._save_log_data()
+        with self._history_lock:
+            self.keg_history.clear()
+            self.rpi_history.clear()
+        self._compact_log()
         print("TemperatureLogic: Temperature log has been reset.")
 
     def get_assigned_sensor(self):
@@ -79,46 +102,20 @@ class TemperatureLogic:
             
     def detect_ds18b20_sensors(self):
         """Finds all available DS18B20 sensors and returns their IDs by reading the filesystem."""
-        base_dir = '/sys/bus/w1/devices/'
-        device_folders = glob.glob(base_dir + '28-*')
-        return [os.path.basename(f) for f in device_folders]
+        return self.sampler.detect_sensors()
 
     def _read_temp_from_id(self, sensor_id):
         """Reads the temperature from a sensor given its ID (Returns F)."""
-        if not sensor_id or sensor_id == 'unassigned':
-            return None
-
-        device_folder = f'/sys/bus/w1/devices/{sensor_id}/'
-        device_file = device_folder + 'w1_slave'
-
-        if not os.path.exists(device_file):
-            print(f"TemperatureLogic: Sensor file not found for ID {sensor_id}.")
-            return None
+        return self.sample_probes([sensor_id]).get(sensor_id)
 
-        try:
-            with open(device_file, 'r') as f:
-                lines = f.readlines()
-            
-            # Simple retry mechanism for busy sensor
-            attempts = 0
-            while lines[0].strip()[-3:] != 'YES' and attempts < 3:
-                time.sleep(0.2)
-                with open(device_file, 'r') as f:
-                    lines = f.readlines()
-                attempts += 1
-            
-            equals_pos = lines[1].find('t=')
-            if equals_pos != -1:
-                temp_string = lines[1][equals_pos+2:]
-                temp_c = float(temp_string) / 1000.0
-                temp_f = temp_c * 9.0 / 5.0 + 32.0
-                return temp_f
-            
-        except Exception as e:
-            print(f"TemperatureLogic: Error reading temperature from sensor {sensor_id}: {e}")
-            return None
-        
-        return None
+    def sample_probes(self, sensor_ids):
+        """
+        Samples several probes with one bus-wide conversion and parallel reads.
+        Returns {sensor_id: temp_f or None}.
+        """
+        results = self.sampler.sample(sensor_ids)
+        return {sensor_id: (temp_c * 9.0 / 5.0 + 32.0 if temp_c is not None else None)
+                for sensor_id, temp_c in results.items()}
 
     def _read_rpi_internal_temp(self):
         """Reads the Raspberry Pi internal temperature (Returns C)."""
@@ -144,6 +141,8 @@ class TemperatureLogic:
         if self._running:
             self._running = False
             self._stop_event.set()
+            self._wake_event.set()
+            self.sampler.shutdown()
             if self._temp_thread and self._temp_thread.is_alive():
                 print("TemperatureLogic: Waiting for thread to stop...")
                 self._temp_thread.join(timeout=2)
@@ -152,177 +151,222 @@ class TemperatureLogic:
                 else:
                     print("TemperatureLogic: Thread stopped.")
 
+    # --- SAMPLING CONFIGURATION ---
+    def _on_sampling_settings_changed(self, changed_paths):
+        self._sampling_config_changed = True
+        self._wake_event.set()
+
+    def _apply_sampling_config(self):
+        """Rebuilds the filter and deadband from the current settings; returns the sample interval."""
+        config = self.settings_manager.get_temp_sampling_settings()
+        self._fast_sampling = (config['temp_sampling_mode'] == 'fast')
+        interval = LOG_INTERVAL_SECONDS
+        if self._fast_sampling:
+            try:
+                interval = max(MIN_FAST_INTERVAL_SECONDS, int(config['temp_fast_interval_seconds']))
+            except (TypeError, ValueError):
+                interval = DEFAULT_FAST_INTERVAL_SECONDS
+        self._temp_filter = create_filter(config['temp_filter'], interval)
+        self._publisher = DeadbandPublisher(float(config['temp_deadband_f']))
+        self._sampling_config_changed = False
+        print(f"TemperatureLogic: Sampling every {interval}s ({'fast, ' + config['temp_filter'] if self._fast_sampling else 'standard'}).")
+        return interval
+
+    def _publish_temperature(self, amb_temp_f, status):
+        """Pushes a (filtered) kegerator temperature to the UI, dashboard and notification path."""
+        self.last_known_temp_f = amb_temp_f
+        
+        display_units = self.settings_manager.get_display_units()
+        if amb_temp_f is not None:
+            if display_units == "imperial":
+                self.ui_callbacks.get("update_temp_display_cb")(amb_temp_f, "F")
+            else:
+                temp_c = (amb_temp_f - 32) * (5/9)
+                self.ui_callbacks.get("update_temp_display_cb")(temp_c, "C")
+        else:
+            self.ui_callbacks.get("update_temp_display_cb")(None, status)
+        
+        if self.dashboard:
+            self.dashboard.publish_temperature(amb_temp_f, status)
+        
+        if self.alert_engine:
+            self.alert_engine.report(METRIC_KEGERATOR_TEMP_F, KEGERATOR_KEY, amb_temp_f)
+
     def _monitor_loop(self):
+        interval = self._apply_sampling_config()
+        last_log_time = None
+        
         while self._running:
             try:
-                # 1. Read Kegerator Sensor
-                amb_temp_f = self.read_ambient_temperature()
+                if self._sampling_config_changed:
+                    interval = self._apply_sampling_config()
                 
-                # Update Live Display
-                if amb_temp_f is not None:
-                    self.last_known_temp_f = amb_temp_f
-                    display_units = self.settings_manager.get_display_units()
-                    if display_units == "imperial":
-                        self.ui_callbacks.get("update_temp_display_cb")(amb_temp_f, "F")
-                    else:
-                        temp_c = (amb_temp_f - 32) * (5/9)
-                        self.ui_callbacks.get("update_temp_display_cb")(temp_c, "C")
+                # 1. Read Kegerator Sensor (smoothed in fast mode)
+                amb_temp_f = self.read_ambient_temperature()
+                if amb_temp_f is None:
+                    self._temp_filter.reset()
+                    status = "Error" if self.ambient_sensor and self.ambient_sensor != 'unassigned' else "No Sensor"
                 else:
-                    self.last_known_temp_f = None
-                    if self.ambient_sensor and self.ambient_sensor != 'unassigned':
-                        self.ui_callbacks.get("update_temp_display_cb")(None, "Error")
-                    else:
-                        self.ui_callbacks.get("update_temp_display_cb")(None, "No Sensor")
-
-                # 2. Read RPi Internal Sensor
-                rpi_temp_c = self._read_rpi_internal_temp()
+                    status = "OK"
+                    if self._fast_sampling:
+                        amb_temp_f = self._temp_filter.update(amb_temp_f)
+                
+                # Update Live Display: every sample in standard mode, only beyond the deadband in fast mode
+                if not self._fast_sampling or self._publisher.should_publish(amb_temp_f, status):
+                    self._publish_temperature(amb_temp_f, status)
 
-                # 3. Log Data
-                self._log_temperature_reading(amb_temp_f, rpi_temp_c)
+                # 2./3. Read RPi Internal Sensor and log at the rollup cadence, whatever the sample rate
+                now = time.monotonic()
+                if last_log_time is None or now - last_log_time >= LOG_INTERVAL_SECONDS - LOG_INTERVAL_SLACK_SECONDS:
+                    rpi_temp_c = self._read_rpi_internal_temp()
+                    self._log_temperature_reading(amb_temp_f, rpi_temp_c)
+                    last_log_time = now
                 
-                # Sleep for 5 minutes
-                self._stop_event.wait(300)
+                self._wake_event.wait(interval)
+                self._wake_event.clear()
 
             except Exception as e:
                 print(f"TemperatureLogic: Error in monitor loop: {e}")
-                self._stop_event.wait(60) # Wait a bit before retry on error
+                self._wake_event.wait(60) # Wait a bit before retry on error
+                self._wake_event.clear()
 
         print("TemperatureLogic: Monitor loop ended.")
 
     def _load_log_data(self):
-        """Loads log data from the JSON file."""
+        """
+        Rebuilds the history: loads the snapshot (migrating older layouts), then
+        replays the journal's readings with one sequential scan.
+        """
+        now = time.time()
+        needs_compaction = False
+        
         if os.path.exists(self.log_file):
             try:
                 with open(self.log_file, 'r') as f:
                     data = json.load(f)
-                    
-                    # --- MIGRATION: Ensure new RPi keys exist ---
-                    if "rpi_daily_log" not in data:
-                        data["rpi_daily_log"] = []
-                        data["rpi_weekly_log"] = []
-                        data["rpi_monthly_log"] = []
-                        data["rpi_high_low_avg"] = {
-                            "day": {"high": None, "low": None, "avg": None, "last_updated": None},
-                            "week": {"high": None, "low": None, "avg": None, "last_updated": None},
-                            "month": {"high": None, "low": None, "avg": None, "last_updated": None},
-                        }
-                    
-                    self.log_data = data
-                    
-                    # Rehydrate datetime objects from strings if present
-                    for section in ["high_low_avg", "rpi_high_low_avg"]:
-                        for key in ["day", "week", "month"]:
-                            ts = self.log_data[section][key]["last_updated"]
-                            if ts:
-                                self.log_data[section][key]["last_updated"] = datetime.fromisoformat(ts)
-                                
+                
+                version = data.get("version", 1)
+                if version == TEMPERATURE_LOG_VERSION:
+                    with self._history_lock:
+                        self.keg_history.load(data.get("keg", {}), now)
+                        self.rpi_history.load(data.get("rpi", {}), now)
+                    self._snapshot_generation = int(data.get("generation", 0))
+                    self._last_compaction_time = float(data.get("compacted_at", 0.0))
+                else:
+                    if version == 2:
+                        keg_pairs, rpi_pairs = data.get("keg", []), data.get("rpi", [])
+                    else:
+                        # The monthly lists are supersets of the daily/weekly ones
+                        keg_pairs = self._legacy_entries_to_pairs(data.get("monthly_log", []), "temp_f")
+                        rpi_pairs = self._legacy_entries_to_pairs(data.get("rpi_monthly_log", []), "temp_c")
+                    # Replaying the raw readings builds the hourly and daily tiers
+                    with self._history_lock:
+                        self.keg_history.load_readings(keg_pairs, now)
+                        self.rpi_history.load_readings(rpi_pairs, now)
+                    print(f"TemperatureLogic: Migrating temperature log from version {version} to {TEMPERATURE_LOG_VERSION}.")
+                    needs_compaction = True
+                                    
                 print(f"TemperatureLogic: Log data loaded from {self.log_file}.")
-            except (json.JSONDecodeError, KeyError, TypeError) as e:
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError) as e:
                 print(f"TemperatureLogic: Error loading log data from file: {e}. Starting with new log.")
+        
+        try:
+            readings = self.journal.load(self._snapshot_generation)
+        except OSError as e:
+            print(f"TemperatureLogic: Error opening temperature journal: {e}")
+            readings = []
+        
+        if readings:
+            with self._history_lock:
+                for channel, epoch, value in readings:
+                    series = self.keg_history if channel == CHANNEL_KEG else self.rpi_history
+                    series.add(epoch, value)
+                self.keg_history.expire(now)
+                self.rpi_history.expire(now)
+            print(f"TemperatureLogic: Replayed {len(readings)} journal readings.")
+        
+        if needs_compaction:
+            self._compact_log()
+
+    def _legacy_entries_to_pairs(self, entries, key_name):
+        pairs = [(datetime.fromisoformat(e["timestamp"]).timestamp(), e[key_name]) for e in entries]
+        pairs.sort(key=lambda pair: pair[0])
+        return pairs
 
-    def _save_log_data(self):
-        """Saves log data to the JSON file."""
+    def _compact_log(self):
+        """Writes the in-memory history as a new snapshot generation and starts an empty journal."""
         try:
-            data_to_save = self.log_data.copy()
-            
-            # Serialize datetimes to strings
-            for section in ["high_low_avg", "rpi_high_low_avg"]:
-                for key in ["day", "week", "month"]:
-                    ts = data_to_save[section][key]["last_updated"]
-                    if isinstance(ts, datetime):
-                        data_to_save[section][key]["last_updated"] = ts.isoformat()
-            
-            with open(self.log_file, 'w') as f:
-                json.dump(data_to_save, f, indent=4)
-            # print(f"TemperatureLogic: Log data saved.") # Commented out to reduce spam
+            now = time.time()
+            with self._history_lock:
+                generation = self._snapshot_generation + 1
+                data_to_save = {
+                    "version": TEMPERATURE_LOG_VERSION,
+                    "generation": generation,
+                    "compacted_at": now,
+                    "keg": self.keg_history.to_dict(),
+                    "rpi": self.rpi_history.to_dict(),
+                }
+                # Snapshot first: if we stop before the journal reset, the old journal's
+                # generation no longer matches and it is discarded as already included.
+                write_json_atomic(self.log_file, data_to_save, indent=None)
+                self._snapshot_generation = generation
+                self._last_compaction_time = now
+                self.journal.reset(generation)
         except Exception as e:
-            print(f"TemperatureLogic: Error saving log data: {e}")
+            print(f"TemperatureLogic: Error compacting temperature log: {e}")
 
     def _log_temperature_reading(self, temp_f, rpi_temp_c=None):
-        """Adds new temperature readings to the in-memory log and triggers a save."""
-        now = datetime.now()
-        timestamp = now.isoformat()
+        """Adds new temperature readings to the history tiers (O(1) stats update) and appends them to the journal."""
+        now = time.time()
         
-        # Log Kegerator Temp (if available)
-        if temp_f is not None:
-            entry = {"timestamp": timestamp, "temp_f": temp_f}
-            self.log_data["daily_log"].append(entry)
-            self.log_data["weekly_log"].append(entry)
-            self.log_data["monthly_log"].append(entry)
-
-        # Log RPi Temp (if available)
-        if rpi_temp_c is not None:
-            entry = {"timestamp": timestamp, "temp_c": rpi_temp_c}
-            self.log_data["rpi_daily_log"].append(entry)
-            self.log_data["rpi_weekly_log"].append(entry)
-            self.log_data["rpi_monthly_log"].append(entry)
-
-        self._prune_logs(now)
-        self._calculate_stats_and_update_log()
-        self._save_log_data()
-
-    def _prune_logs(self, now):
-        """Removes old entries from the in-memory log data."""
-        # Kegerator Logs
-        self.log_data["daily_log"] = [e for e in self.log_data["daily_log"] if datetime.fromisoformat(e["timestamp"]) >= now - timedelta(days=1)]
-        self.log_data["weekly_log"] = [e for e in self.log_data["weekly_log"] if datetime.fromisoformat(e["timestamp"]) >= now - timedelta(weeks=1)]
-        self.log_data["monthly_log"] = [e for e in self.log_data["monthly_log"] if datetime.fromisoformat(e["timestamp"]) >= now - timedelta(days=30)]
-
-        # RPi Logs
-        self.log_data["rpi_daily_log"] = [e for e in self.log_data["rpi_daily_log"] if datetime.fromisoformat(e["timestamp"]) >= now - timedelta(days=1)]
-        self.log_data["rpi_weekly_log"] = [e for e in self.log_data["rpi_weekly_log"] if datetime.fromisoformat(e["timestamp"]) >= now - timedelta(weeks=1)]
-        self.log_data["rpi_monthly_log"] = [e for e in self.log_data["rpi_monthly_log"] if datetime.fromisoformat(e["timestamp"]) >= now - timedelta(days=30)]
-
-    def _calculate_stats(self, log_list, key_name="temp_f"):
-        """Calculates high, low, and average from a list of readings."""
-        if not log_list:
-            return None, None, None
-        
-        temps = [e[key_name] for e in log_list]
-        return max(temps), min(temps), sum(temps) / len(temps)
+        with self._history_lock:
+            # Log Kegerator Temp (if available)
+            if temp_f is not None:
+                self.keg_history.add(now, temp_f)
+            # Log RPi Temp (if available)
+            if rpi_temp_c is not None:
+                self.rpi_history.add(now, rpi_temp_c)
+            
+            # Expire old readings even when a sensor did not report
+            self.keg_history.expire(now)
+            self.rpi_history.expire(now)
 
-    def _calculate_stats_and_update_log(self):
-        """Calculates and updates stats for day, week, and month for both sensors."""
-        now = datetime.now()
-        
-        # --- Kegerator Stats (Source: F) ---
-        for period, log_list in [("day", self.log_data["daily_log"]), 
-                                 ("week", self.log_data["weekly_log"]), 
-                                 ("month", self.log_data["monthly_log"])]:
-            high, low, avg = self._calculate_stats(log_list, key_name="temp_f")
-            self.log_data["high_low_avg"][period] = {"high": high, "low": low, "avg": avg, "last_updated": now}
-
-        # --- RPi Stats (Source: C) ---
-        for period, log_list in [("day", self.log_data["rpi_daily_log"]), 
-                                 ("week", self.log_data["rpi_weekly_log"]), 
-                                 ("month", self.log_data["rpi_monthly_log"])]:
-            high, low, avg = self._calculate_stats(log_list, key_name="temp_c")
-            self.log_data["rpi_high_low_avg"][period] = {"high": high, "low": low, "avg": avg, "last_updated": now}
+            try:
+                if temp_f is not None:
+                    self.journal.append(CHANNEL_KEG, now, temp_f)
+                if rpi_temp_c is not None:
+                    self.journal.append(CHANNEL_RPI, now, rpi_temp_c)
+            except OSError as e:
+                print(f"TemperatureLogic: Error appending to temperature journal: {e}")
+
+        if now - self._last_compaction_time >= COMPACTION_INTERVAL_SECONDS:
+            self._compact_log()
+
+    def _get_series_stats(self, series):
+        last_updated = datetime.fromtimestamp(series.last_updated) if series.last_updated is not None else None
+        stats = {}
+        for period, _ in STAT_PERIODS:
+            high, low, avg = series.get_stats(period)
+            stats[period] = {"high": high, "low": low, "avg": avg, "last_updated": last_updated}
+        return stats
 
     def get_temperature_log(self):
         """Returns the current log data structured for UI display with unit conversion."""
         display_units = self.settings_manager.get_display_units()
         
         # Prepare Data Structure
-        ui_data = {
-            "keg": {
-                "day": self.log_data["high_low_avg"]["day"].copy(),
-                "week": self.log_data["high_low_avg"]["week"].copy(),
-                "month": self.log_data["high_low_avg"]["month"].copy(),
-            },
-            "rpi": {
-                "day": self.log_data["rpi_high_low_avg"]["day"].copy(),
-                "week": self.log_data["rpi_high_low_avg"]["week"].copy(),
-                "month": self.log_data["rpi_high_low_avg"]["month"].copy(),
+        with self._history_lock:
+            ui_data = {
+                "keg": self._get_series_stats(self.keg_history),
+                "rpi": self._get_series_stats(self.rpi_history),
             }
-        }
 
         # --- UNIT CONVERSION LOGIC ---
         # Keg Source is F. RPi Source is C.
         
         if display_units == "metric":
             # Convert Keg (F -> C)
-            for period in ["day", "week", "month"]:
+            for period, _ in STAT_PERIODS:
                 for stat in ["high", "low", "avg"]:
                     val = ui_data["keg"][period][stat]
                     if val is not None:
@@ -332,7 +376,7 @@ class TemperatureLogic:
         else: # imperial
             # Keg is already F, do nothing.
             # Convert RPi (C -> F)
-            for period in ["day", "week", "month"]:
+            for period, _ in STAT_PERIODS:
                 for stat in ["high", "low", "avg"]:
                     val = ui_data["rpi"][period][stat]
                     if val is not None:
@@ -340,6 +384,59 @@ class TemperatureLogic:
         
         return ui_data
 
+    # --- HISTORY QUERIES ---
+    def query_temperature_history(self, sensor="keg", start=None, end=None, resolution_seconds=None, max_points=DEFAULT_QUERY_POINTS):
+        """
+        Returns readings of 'sensor' ("keg" or "rpi") between epochs 'start' and 'end'
+        (default: the last day, up to now) as min/max/avg per bucket, in display units:
+
+            {"sensor": "keg", "units": "F", "resolution_seconds": 3600, "source": "hourly",
+             "points": [{"start": datetime, "low": .., "high": .., "avg": .., "count": n}, ...]}
+
+        'resolution_seconds' is the bucket size; when omitted it is chosen so the range
+        fits in about 'max_points' buckets. Buckets come from the history rollups (see
+        TemperatureSeries.query), so the returned resolution can be coarser than asked
+        for ranges older than the finer tiers keep.
+        """
+        if sensor not in ("keg", "rpi"):
+            raise ValueError(f"Unknown temperature sensor '{sensor}'")
+        
+        end = time.time() if end is None else float(end)
+        start = end - DAY_SECONDS if start is None else float(start)
+        if start >= end:
+            raise ValueError("Query start must be before end")
+        if resolution_seconds is None:
+            # Round up to whole log intervals (or whole hours) so buckets line up with the rollups
+            resolution_seconds = (end - start) / max(1, max_points)
+            step = HOUR_SECONDS if resolution_seconds > HOUR_SECONDS else LOG_INTERVAL_SECONDS
+            resolution_seconds = math.ceil(resolution_seconds / step) * step
+        resolution_seconds = max(LOG_INTERVAL_SECONDS, int(resolution_seconds))
+        
+        series = self.keg_history if sensor == "keg" else self.rpi_history
+        with self._history_lock:
+            resolution_seconds, source, points = series.query(start, end, resolution_seconds)
+
+        # Keg Source is F. RPi Source is C.
+        metric = self.settings_manager.get_display_units() == "metric"
+        if sensor == "keg" and metric:
+            convert, units = (lambda t: (t - 32) * (5/9)), "C"
+        elif sensor == "rpi" and not metric:
+            convert, units = (lambda t: (t * 9/5) + 32), "F"
+        else:
+            convert, units = (lambda t: t), ("C" if metric else "F")
+
+        return {
+            "sensor": sensor,
+            "units": units,
+            "resolution_seconds": resolution_seconds,
+            "source": source,
+            "points": [
+                {"start": datetime.fromtimestamp(bucket_start), "low": convert(low), "high": convert(high),
+                 "avg": convert(avg), "count": count}
+                for bucket_start, low, high, avg, count in points
+            ],
+        }
+
     def read_ambient_temperature(self):
         """Reads the temperature from the assigned ambient sensor."""
         if self.ambient_sensor:
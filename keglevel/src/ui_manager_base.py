@@ -66,6 +66,11 @@ LITERS_TO_GALLONS = 0.264172
 # CONSTANT: Ratio of US Fluid Ounces to Liters
 OZ_TO_LITERS = 0.0295735
 
+# How often the UI checks the shared change feed for saves made by another keglevel process
+EXTERNAL_CHANGE_CHECK_SECONDS = 1.0
+# Sections that change what the main window shows
+EXTERNAL_DISPLAY_SECTIONS = frozenset(["beverage_library", "sensor_beverage_assignments", "sensor_labels", "system_settings"])
+
 # --- BASE CLASS: Contains main window layout and update logic ---
 class MainUIBase:
     def __init__(self, root, settings_manager_instance, sensor_logic_instance, notification_service_instance, temp_logic_instance, num_sensors, app_version_string):
@@ -91,6 +96,23 @@ class MainUIBase:
         
         self._last_applied_geometry = None
         self._current_cols = 0 
+        
+        # --- INCREMENTAL LAYOUT STATE ---
+        # tap_index -> (row, col) of the last grid() call; absent = not gridded
+        self._tap_grid_positions = {}
+        # tap_index -> ui_mode whose metadata frame is currently packed
+        self._applied_tap_modes = {}
+        
+        # Beverage assignments are checked on every tap update; keep a copy that the
+        # SettingsManager refreshes on change instead of re-reading per update.
+        self._beverage_assignments = self.settings_manager.get_sensor_beverage_assignments()
+        self.settings_manager.subscribe("sensor_beverage_assignments", self._on_beverage_assignments_changed)
+        
+        # --- CROSS-PROCESS CHANGES ---
+        # The beverage library window runs as its own process; poll the shared change feed
+        # (one stat() when idle) and refresh only what the other process saved.
+        self._next_external_change_check = 0.0
+        self.settings_manager.add_external_change_listener(self._on_external_settings_changes)
 
         self.root.title("KegLevel Monitor")
         
@@ -114,10 +136,11 @@ class MainUIBase:
         # --- Primary UI Variables ---
         self.sensor_name_texts = [tk.StringVar() for _ in range(self.num_sensors)]
         
-        self.flow_rate_label_widgets = [] 
-        self.flow_rate_value_labels = []  
-        self.last_pour_label_widgets = [] 
-        self.last_pour_value_labels = [] 
+        # Indexed by tap (not appended) because tap columns are built on demand
+        self.flow_rate_label_widgets = [None] * self.num_sensors 
+        self.flow_rate_value_labels = [None] * self.num_sensors  
+        self.last_pour_label_widgets = [None] * self.num_sensors 
+        self.last_pour_value_labels = [None] * self.num_sensors 
         
         self.flow_rate_label_texts = [tk.StringVar(value="Flow rate:") for _ in range(self.num_sensors)] 
         self.flow_rate_value_texts = [tk.StringVar() for _ in range(self.num_sensors)]
@@ -378,115 +401,10 @@ class MainUIBase:
         self.main_columns_frame.bind("<Configure>", on_frame_configure)
         self.tap_canvas.bind("<Configure>", on_canvas_configure)
 
-        # --- TAP COLUMN CREATION LOOP ---
-        WRAPLENGTH_TAP_COLUMN = 250 
-        
-        for i in range(self.num_sensors):
-            column_frame = ttk.Frame(self.main_columns_frame, padding=(3,3), relief="groove")
-            self.sensor_column_frames[i] = column_frame
-            
-            # Note: Grid placement now happens in _reflow_layout, not here.
-            
-            # 1. Header: "Tap X" + Dropdown
-            header_subframe = ttk.Frame(column_frame)
-            header_subframe.pack(fill="x", pady=(0, 2))
-            
-            ttk.Label(header_subframe, text=f"Tap {i + 1}:", style='Tap.Bold.TLabel').pack(side="left", padx=(0, 5))
-            
-            keg_dropdown = ttk.Combobox(header_subframe, textvariable=self.sensor_keg_selection_vars[i], state="readonly")
-            keg_dropdown.pack(side="left", fill="x", expand=True)
-            keg_dropdown.bind("<<ComboboxSelected>>", lambda event, idx=i: self._handle_keg_selection_change(idx))
-            keg_dropdown.bind("<Button-1>", self._on_combobox_click)
-            self.sensor_keg_dropdowns[i] = keg_dropdown
-
-            # --- DYNAMIC METADATA SECTIONS ---
-            self.metadata_frame_refs[i] = {}
-
-            # A. Lite Mode Metadata (Single Line)
-            lite_meta_frame = ttk.Frame(column_frame)
-            
-            ttk.Label(lite_meta_frame, text="ABV:", style='Metadata.Bold.TLabel').pack(side="left", padx=(0, 2))
-            ttk.Label(lite_meta_frame, textvariable=self.beverage_metadata_texts[i]['abv']).pack(side="left", anchor="w")
-            
-            ttk.Label(lite_meta_frame, textvariable=self.beverage_metadata_texts[i]['ibu']).pack(side="right", anchor="e")
-            ttk.Label(lite_meta_frame, text="IBU:", style='Metadata.Bold.TLabel').pack(side="right", padx=(5, 2))
-            
-            self.metadata_frame_refs[i]['lite'] = lite_meta_frame
-
-            # B. Full Mode Metadata (Gray Box)
-            # --- MODIFICATION: Reduced Fixed Height to 220 ---
-            METADATA_HEIGHT = 220
-            # pack_propagate(False) ensures this frame stays exactly 220px tall
-            full_meta_container = ttk.Frame(column_frame, height=METADATA_HEIGHT, style='LightGray.TFrame') 
-            full_meta_container.pack_propagate(False) 
-            
-            full_meta_inner = ttk.Frame(full_meta_container, padding=(5, 5), style='LightGray.TFrame') 
-            full_meta_inner.pack(fill="both", expand=True) 
-            
-            # Row 1: BJCP, ABV, IBU
-            fm_row1 = ttk.Frame(full_meta_inner, style='LightGray.TFrame')
-            fm_row1.pack(anchor="w", fill="x")
-            
-            ttk.Label(fm_row1, text="BJCP:", style='Metadata.Bold.TLabel', background='#F0F0F0').pack(side="left", padx=(0, 2))
-            ttk.Label(fm_row1, textvariable=self.beverage_metadata_texts[i]['bjcp'], background='#F0F0F0').pack(side="left", padx=(0, 10), anchor='w')
-
-            # Right aligned ABV/IBU
-            fm_ibu = ttk.Frame(fm_row1, style='LightGray.TFrame'); fm_ibu.pack(side="right", anchor='e')
-            ttk.Label(fm_ibu, textvariable=self.beverage_metadata_texts[i]['ibu'], anchor='e', background='#F0F0F0').pack(side="right")
-            ttk.Label(fm_ibu, text="IBU:", style='Metadata.Bold.TLabel', background='#F0F0F0').pack(side="right", padx=(0, 2))
-            
-            fm_abv = ttk.Frame(fm_row1, style='LightGray.TFrame'); fm_abv.pack(side="right", anchor='e', padx=(10, 10)) 
-            ttk.Label(fm_abv, textvariable=self.beverage_metadata_texts[i]['abv'], anchor='e', background='#F0F0F0').pack(side="right")
-            ttk.Label(fm_abv, text="ABV:", style='Metadata.Bold.TLabel', background='#F0F0F0').pack(side="right", padx=(0, 2))
-
-            # Row 2: Description
-            # Added padding to keep text away from edges
-            description_label = ttk.Label(full_meta_inner, textvariable=self.beverage_metadata_texts[i]['description'], 
-                                          anchor='nw', font=('TkDefaultFont', 11, 'italic'), justify=tk.LEFT,
-                                          wraplength=WRAPLENGTH_TAP_COLUMN, background='#F0F0F0', padding=(10, 5)) 
-            description_label.pack(anchor="w", fill="both", expand=True, pady=(5, 5))
-            
-            # Use dynamic wrapping for description based on column width
-            def resize_desc_wrap(event, lbl=description_label):
-                # Adjust wrap length to account for padding
-                lbl.config(wraplength=event.width - 25)
-            full_meta_container.bind("<Configure>", resize_desc_wrap)
-
-            self.metadata_frame_refs[i]['full'] = full_meta_container
-
-            # 3. Progress Bar
-            pb = ttk.Progressbar(column_frame, orient="horizontal", mode="determinate", maximum=100, style="default.Horizontal.TProgressbar")
-            pb.pack(pady=(10,5), fill='x', expand=False)
-            self.sensor_progressbars[i] = pb
-            
-            # 4. Measurements
-            # A. Flow Rate
-            lidar_frame = ttk.Frame(column_frame); lidar_frame.pack(anchor="w", fill="x", pady=1)
-            lbl_title = ttk.Label(lidar_frame, textvariable=self.flow_rate_label_texts[i])
-            lbl_title.pack(side="left", padx=(0, 2))
-            self.flow_rate_label_widgets.append(lbl_title)
-            lbl_val = ttk.Label(lidar_frame, textvariable=self.flow_rate_value_texts[i], anchor="w")
-            lbl_val.pack(side="left", padx=(0,0)) 
-            self.flow_rate_value_labels.append(lbl_val)
-            
-            # B. Last Pour
-            pour_track_frame = ttk.Frame(column_frame); pour_track_frame.pack(anchor="w", fill="x", pady=1)
-            lbl_pour_title = ttk.Label(pour_track_frame, textvariable=self.last_pour_label_texts[i])
-            lbl_pour_title.pack(side="left", padx=(0, 2))
-            self.last_pour_label_widgets.append(lbl_pour_title)
-            lbl_pour_val = ttk.Label(pour_track_frame, textvariable=self.last_pour_value_texts[i], anchor="w")
-            lbl_pour_val.pack(side="left", padx=(0,0))
-            self.last_pour_value_labels.append(lbl_pour_val)
-            
-            # C. Volume Remaining
-            vol1_frame = ttk.Frame(column_frame); vol1_frame.pack(anchor="w", fill="x", pady=1)
-            ttk.Label(vol1_frame, textvariable=self.volume1_label_texts[i]).pack(side="left", padx=(0, 2))
-            ttk.Label(vol1_frame, textvariable=self.volume1_value_texts[i], anchor="w").pack(side="left", padx=(0,0))
-            
-            # D. Pours Remaining
-            vol2_frame = ttk.Frame(column_frame); vol2_frame.pack(anchor="w", fill="x", pady=1)
-            ttk.Label(vol2_frame, textvariable=self.volume2_label_texts[i]).pack(side="left", padx=(0, 2))
-            ttk.Label(vol2_frame, textvariable=self.volume2_value_texts[i], anchor="w").pack(side="left", padx=(0,0))
+        # --- TAP COLUMN POOL ---
+        # Only the displayed taps are built at startup. Columns for further taps are
+        # created on demand by _ensure_tap_columns and then kept for reuse.
+        self._ensure_tap_columns(self.settings_manager.get_displayed_taps())
             
         # --- 4. Bottom Status Bar (PACKED) ---
         notification_label_container = ttk.Frame(self.root, height=26)
@@ -495,6 +413,128 @@ class MainUIBase:
         self.notification_status_label = ttk.Label(notification_label_container, textvariable=self.notification_status_text, anchor="w", relief="sunken", padding=(5,2))
         self.notification_status_label.pack(fill='both', expand=True)
 
+    def _ensure_tap_columns(self, count):
+        """
+        Makes sure tap columns 0..count-1 exist. Existing columns are reused as-is;
+        only missing ones are built. Returns the indexes that were created.
+        """
+        created = []
+        for i in range(min(count, self.num_sensors)):
+            if self.sensor_column_frames[i] is None:
+                self._create_tap_column(i)
+                created.append(i)
+        return created
+
+    def _create_tap_column(self, i):
+        """Builds the widget tree for a single tap column (card)."""
+        WRAPLENGTH_TAP_COLUMN = 250 
+        
+        column_frame = ttk.Frame(self.main_columns_frame, padding=(3,3), relief="groove")
+        self.sensor_column_frames[i] = column_frame
+        
+        # Note: Grid placement now happens in _reflow_layout, not here.
+        
+        # 1. Header: "Tap X" + Dropdown
+        header_subframe = ttk.Frame(column_frame)
+        header_subframe.pack(fill="x", pady=(0, 2))
+        
+        ttk.Label(header_subframe, text=f"Tap {i + 1}:", style='Tap.Bold.TLabel').pack(side="left", padx=(0, 5))
+        
+        keg_dropdown = ttk.Combobox(header_subframe, textvariable=self.sensor_keg_selection_vars[i], state="readonly")
+        keg_dropdown.pack(side="left", fill="x", expand=True)
+        keg_dropdown.bind("<<ComboboxSelected>>", lambda event, idx=i: self._handle_keg_selection_change(idx))
+        keg_dropdown.bind("<Button-1>", self._on_combobox_click)
+        self.sensor_keg_dropdowns[i] = keg_dropdown
+
+        # --- DYNAMIC METADATA SECTIONS ---
+        self.metadata_frame_refs[i] = {}
+
+        # A. Lite Mode Metadata (Single Line)
+        lite_meta_frame = ttk.Frame(column_frame)
+        
+        ttk.Label(lite_meta_frame, text="ABV:", style='Metadata.Bold.TLabel').pack(side="left", padx=(0, 2))
+        ttk.Label(lite_meta_frame, textvariable=self.beverage_metadata_texts[i]['abv']).pack(side="left", anchor="w")
+        
+        ttk.Label(lite_meta_frame, textvariable=self.beverage_metadata_texts[i]['ibu']).pack(side="right", anchor="e")
+        ttk.Label(lite_meta_frame, text="IBU:", style='Metadata.Bold.TLabel').pack(side="right", padx=(5, 2))
+        
+        self.metadata_frame_refs[i]['lite'] = lite_meta_frame
+
+        # B. Full Mode Metadata (Gray Box)
+        # --- MODIFICATION: Reduced Fixed Height to 220 ---
+        METADATA_HEIGHT = 220
+        # pack_propagate(False) ensures this frame stays exactly 220px tall
+        full_meta_container = ttk.Frame(column_frame, height=METADATA_HEIGHT, style='LightGray.TFrame') 
+        full_meta_container.pack_propagate(False) 
+        
+        full_meta_inner = ttk.Frame(full_meta_container, padding=(5, 5), style='LightGray.TFrame') 
+        full_meta_inner.pack(fill="both", expand=True) 
+        
+        # Row 1: BJCP, ABV, IBU
+        fm_row1 = ttk.Frame(full_meta_inner, style='LightGray.TFrame')
+        fm_row1.pack(anchor="w", fill="x")
+        
+        ttk.Label(fm_row1, text="BJCP:", style='Metadata.Bold.TLabel', background='#F0F0F0').pack(side="left", padx=(0, 2))
+        ttk.Label(fm_row1, textvariable=self.beverage_metadata_texts[i]['bjcp'], background='#F0F0F0').pack(side="left", padx=(0, 10), anchor='w')
+
+        # Right aligned ABV/IBU
+        fm_ibu = ttk.Frame(fm_row1, style='LightGray.TFrame'); fm_ibu.pack(side="right", anchor='e')
+        ttk.Label(fm_ibu, textvariable=self.beverage_metadata_texts[i]['ibu'], anchor='e', background='#F0F0F0').pack(side="right")
+        ttk.Label(fm_ibu, text="IBU:", style='Metadata.Bold.TLabel', background='#F0F0F0').pack(side="right", padx=(0, 2))
+        
+        fm_abv = ttk.Frame(fm_row1, style='LightGray.TFrame'); fm_abv.pack(side="right", anchor='e', padx=(10, 10)) 
+        ttk.Label(fm_abv, textvariable=self.beverage_metadata_texts[i]['abv'], anchor='e', background='#F0F0F0').pack(side="right")
+        ttk.Label(fm_abv, text="ABV:", style='Metadata.Bold.TLabel', background='#F0F0F0').pack(side="right", padx=(0, 2))
+
+        # Row 2: Description
+        # Added padding to keep text away from edges
+        description_label = ttk.Label(full_meta_inner, textvariable=self.beverage_metadata_texts[i]['description'], 
+                                      anchor='nw', font=('TkDefaultFont', 11, 'italic'), justify=tk.LEFT,
+                                      wraplength=WRAPLENGTH_TAP_COLUMN, background='#F0F0F0', padding=(10, 5)) 
+        description_label.pack(anchor="w", fill="both", expand=True, pady=(5, 5))
+        
+        # Use dynamic wrapping for description based on column width
+        def resize_desc_wrap(event, lbl=description_label):
+            # Adjust wrap length to account for padding
+            lbl.config(wraplength=event.width - 25)
+        full_meta_container.bind("<Configure>", resize_desc_wrap)
+
+        self.metadata_frame_refs[i]['full'] = full_meta_container
+
+        # 3. Progress Bar
+        pb = ttk.Progressbar(column_frame, orient="horizontal", mode="determinate", maximum=100, style="default.Horizontal.TProgressbar")
+        pb.pack(pady=(10,5), fill='x', expand=False)
+        self.sensor_progressbars[i] = pb
+        
+        # 4. Measurements
+        # A. Flow Rate
+        lidar_frame = ttk.Frame(column_frame); lidar_frame.pack(anchor="w", fill="x", pady=1)
+        lbl_title = ttk.Label(lidar_frame, textvariable=self.flow_rate_label_texts[i])
+        lbl_title.pack(side="left", padx=(0, 2))
+        self.flow_rate_label_widgets[i] = lbl_title
+        lbl_val = ttk.Label(lidar_frame, textvariable=self.flow_rate_value_texts[i], anchor="w")
+        lbl_val.pack(side="left", padx=(0,0)) 
+        self.flow_rate_value_labels[i] = lbl_val
+        
+        # B. Last Pour
+        pour_track_frame = ttk.Frame(column_frame); pour_track_frame.pack(anchor="w", fill="x", pady=1)
+        lbl_pour_title = ttk.Label(pour_track_frame, textvariable=self.last_pour_label_texts[i])
+        lbl_pour_title.pack(side="left", padx=(0, 2))
+        self.last_pour_label_widgets[i] = lbl_pour_title
+        lbl_pour_val = ttk.Label(pour_track_frame, textvariable=self.last_pour_value_texts[i], anchor="w")
+        lbl_pour_val.pack(side="left", padx=(0,0))
+        self.last_pour_value_labels[i] = lbl_pour_val
+        
+        # C. Volume Remaining
+        vol1_frame = ttk.Frame(column_frame); vol1_frame.pack(anchor="w", fill="x", pady=1)
+        ttk.Label(vol1_frame, textvariable=self.volume1_label_texts[i]).pack(side="left", padx=(0, 2))
+        ttk.Label(vol1_frame, textvariable=self.volume1_value_texts[i], anchor="w").pack(side="left", padx=(0,0))
+        
+        # D. Pours Remaining
+        vol2_frame = ttk.Frame(column_frame); vol2_frame.pack(anchor="w", fill="x", pady=1)
+        ttk.Label(vol2_frame, textvariable=self.volume2_label_texts[i]).pack(side="left", padx=(0, 2))
+        ttk.Label(vol2_frame, textvariable=self.volume2_value_texts[i], anchor="w").pack(side="left", padx=(0,0))
+
     # def _create_widgets(self):
         # s = self._define_progressbar_styles()
         # s.configure('Tap.Bold.TLabel', font=('TkDefaultFont', 10, 'bold'))
@@ -696,28 +736,37 @@ class MainUIBase:
         if not force and cols == self._current_cols:
             return
             
+        previous_cols = self._current_cols
         self._current_cols = cols
         
         displayed_taps = self.settings_manager.get_displayed_taps()
         
-        # Clear existing weights to prevent ghost columns
-        for i in range(10):
-            self.main_columns_frame.grid_columnconfigure(i, weight=0)
+        # Column weights only change with the column count. Columns beyond 'cols'
+        # are zeroed to prevent ghost columns; active ones stretch equally.
+        if cols != previous_cols:
+            for c in range(max(cols, previous_cols)):
+                self.main_columns_frame.grid_columnconfigure(c, weight=1 if c < cols else 0)
             
-        # Set weight for active columns so they stretch equally
-        for i in range(cols):
-            self.main_columns_frame.grid_columnconfigure(i, weight=1)
-            
-        # Re-grid visible items
-        for i in range(displayed_taps):
+        # Only touch cards whose (row, col) actually changed
+        layout_changed = False
+        for i in range(self.num_sensors):
             frame = self.sensor_column_frames[i]
-            if frame:
-                row = i // cols
-                col = i % cols
-                frame.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
+            if not frame: continue
+            
+            if i < displayed_taps:
+                position = (i // cols, i % cols)
+                if self._tap_grid_positions.get(i) != position:
+                    frame.grid(row=position[0], column=position[1], padx=5, pady=5, sticky="nsew")
+                    self._tap_grid_positions[i] = position
+                    layout_changed = True
+            elif i in self._tap_grid_positions:
+                frame.grid_remove()
+                del self._tap_grid_positions[i]
+                layout_changed = True
                 
-        # Force update
-        self.main_columns_frame.update_idletasks()
+        # Force update only when the geometry actually moved
+        if layout_changed:
+            self.main_columns_frame.update_idletasks()
         
     def _on_combobox_click(self, event):
         """Forces the combobox list to scroll to the top when opened."""
@@ -788,6 +837,7 @@ class MainUIBase:
         if self.notification_service: self.notification_service.stop_scheduler()
         if self.sensor_logic: self.sensor_logic.stop_monitoring()
         if self.temp_logic: self.temp_logic.stop_monitoring()
+        self.settings_manager.flush_settings()
         
         try:
             python = sys.executable
@@ -822,9 +872,31 @@ class MainUIBase:
                 self.ui_update_queue.task_done()
                 events_processed += 1
         finally:
+            now = time.monotonic()
+            if now >= self._next_external_change_check:
+                self._next_external_change_check = now + EXTERNAL_CHANGE_CHECK_SECONDS
+                try:
+                    self.settings_manager.check_for_external_changes()
+                except Exception as e:
+                    print(f"UIManager: Error checking for external settings changes: {e}")
+            
             if self.root.winfo_exists(): 
                 self.root.after(50, self._poll_ui_update_queue)
                 
+    def _on_external_settings_changes(self, sections):
+        """Another keglevel process saved 'sections'; the SettingsManager has already reloaded them."""
+        if sections & EXTERNAL_DISPLAY_SECTIONS:
+            self._refresh_ui_for_settings_or_resume()
+        
+        if self.sensor_logic and sections & {"keg_library", "sensor_keg_assignments"}:
+            self.sensor_logic.force_recalculation()
+        
+        if self.workflow_app:
+            try:
+                self.workflow_app.apply_external_changes(sections)
+            except tk.TclError:
+                pass
+                
     def update_temperature_display(self, temp_value, unit):
         self.ui_update_queue.put(("update_temp_display", (temp_value, unit)))
 
@@ -849,11 +921,14 @@ class MainUIBase:
     def update_sensor_data_display(self, sensor_index, flow_rate_lpm, remaining_liters_float, status_string, last_pour_vol=None):
         self.ui_update_queue.put(("update_sensor_data", (sensor_index, flow_rate_lpm, remaining_liters_float, status_string, last_pour_vol)))
 
+    def _on_beverage_assignments_changed(self, changed_paths):
+        self._beverage_assignments = self.settings_manager.get_sensor_beverage_assignments()
+
     def _do_update_sensor_data_display(self, sensor_index, flow_rate_lpm, remaining_liters_float, status_string, last_pour_vol=None):
         if not self.root.winfo_exists() or not (0 <= sensor_index < self.num_sensors): return
         
         # --- Check for Unassigned Beverage (Empty Keg) ---
-        assignments = self.settings_manager.get_sensor_beverage_assignments()
+        assignments = self._beverage_assignments
         is_empty_beverage = (sensor_index < len(assignments) and assignments[sensor_index] == UNASSIGNED_BEVERAGE_ID)
         
         # Override logic: If no beverage, force volume to 0 for display
@@ -974,12 +1049,8 @@ class MainUIBase:
         liters_val = self.last_known_remaining_liters[sensor_index]
         if liters_val is not None:
             keg_id = self.settings_manager.get_sensor_keg_assignments()[sensor_index]
-            keg_params = self.settings_manager.get_keg_by_id(keg_id)
-            if keg_params and keg_params.get('id') != UNASSIGNED_KEG_ID:
-                total_keg_volume_liters_for_100_percent = float(keg_params.get('maximum_full_volume_liters', 0))
-                if total_keg_volume_liters_for_100_percent > 0:
-                    percentage_calc = (liters_val / total_keg_volume_liters_for_100_percent) * 100
-                    current_percentage = max(0, min(percentage_calc, 100))
+            # Same helper as the web dashboard, so both show the same fill level
+            current_percentage = self.settings_manager.get_keg_fill_percent(keg_id, liters_val) or 0
 
         current_style = pb.cget('style')
         new_style = current_style
@@ -1190,11 +1261,20 @@ class MainUIBase:
     
     # --- Dynamic Visibility Toggler ---
     def _apply_ui_mode_visibility(self):
-        """Hides or Shows metadata frames based on self.ui_mode."""
+        """
+        Hides or Shows metadata frames based on self.ui_mode.
+        Only displayed taps whose packed frame does not already match the mode are
+        touched; hidden taps pick up the mode when they are next displayed.
+        """
         mode = self.ui_mode # 'detailed' or 'basic'
+        displayed_taps = self.settings_manager.get_displayed_taps()
         
-        for i in range(self.num_sensors):
-            frames = self.metadata_frame_refs.get(i, {})
+        for i in range(min(displayed_taps, self.num_sensors)):
+            if self._applied_tap_modes.get(i) == mode:
+                continue
+            frames = self.metadata_frame_refs.get(i)
+            if not frames:
+                continue
             lite_frame = frames.get('lite')
             full_frame = frames.get('full')
             
@@ -1205,6 +1285,7 @@ class MainUIBase:
             else:
                 if full_frame: full_frame.pack_forget()
                 if lite_frame: lite_frame.pack(anchor="w", pady=(2, 0), fill="x", after=self.sensor_keg_dropdowns[i].master)
+            self._applied_tap_modes[i] = mode
 
     def _update_sensor_column_visibility(self):
         """
@@ -1213,16 +1294,16 @@ class MainUIBase:
         """
         displayed_taps_count = self.settings_manager.get_displayed_taps()
         
-        # 1. Update visibility state (Mapped/Unmapped)
-        for i in range(self.num_sensors):
+        # 1. Build any newly displayed columns (existing ones are reused from the pool).
+        # Dropdown values for new columns are filled by _refresh_ui_for_settings_or_resume.
+        self._ensure_tap_columns(displayed_taps_count)
+        
+        # Unmap columns that are no longer displayed. They stay in the pool for reuse.
+        for i in range(displayed_taps_count, self.num_sensors):
             column_frame = self.sensor_column_frames[i]
-            if column_frame:
-                if i < displayed_taps_count:
-                    # We don't grid() here; _reflow_layout handles grid placement.
-                    # Just ensure we don't hide it if it's meant to be shown.
-                    pass 
-                else: 
-                    column_frame.grid_remove()
+            if column_frame and i in self._tap_grid_positions:
+                column_frame.grid_remove()
+                del self._tap_grid_positions[i]
                     
         # 2. Apply visibility rules (Lite vs Full metadata)
         self._apply_ui_mode_visibility()
@@ -1345,6 +1426,9 @@ class MainUIBase:
         if self.notification_service: self.notification_service.stop_scheduler()
         if self.sensor_logic: self.sensor_logic.stop_monitoring()
         if self.temp_logic: self.temp_logic.stop_monitoring()
+        
+        # Persist anything still pending in the debounced settings writer
+        self.settings_manager.stop_settings_writer()
 
         self.header_is_animating = False
         if self.header_animation_job_id:
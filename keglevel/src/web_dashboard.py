@@ -0,0 +1,362 @@
+# keglevel app
+#
+# web_dashboard.py
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_DASHBOARD_PORT = 8080
+
+# Coalesce bursts of tap updates (a pour updates every 0.5s per tap) into one push
+PUBLISH_MIN_INTERVAL_SECONDS = 0.5
+# Rebuild the snapshot at least this often so keg/beverage edits made in the UI show up
+METADATA_REFRESH_SECONDS = 30
+# SSE comment sent when nothing changed, so proxies and browsers keep the stream open
+SSE_KEEPALIVE_SECONDS = 15
+# Each SSE client holds one server thread; cap them so a misbehaving client can't exhaust the Pi
+MAX_SSE_CLIENTS = 32
+
+
+class WebDashboard:
+    """
+    Read-only browser dashboard for tap levels, flow and temperature.
+
+    SensorLogic and TemperatureLogic call publish_tap() / publish_temperature().
+    Those only store the latest values and set an Event, so the sensor loop does no
+    per-client work. A single publisher thread turns changes into one cached JSON
+    snapshot; HTTP clients are served that cached snapshot and SSE clients are woken
+    only when its version changes.
+    """
+
+    def __init__(self, settings_manager, num_sensors, port=DEFAULT_DASHBOARD_PORT, host="0.0.0.0"):
+        self.settings_manager = settings_manager
+        self.num_sensors = num_sensors
+        self.port = port
+        self.host = host
+
+        # Latest raw values from the producer threads (written under _state_lock)
+        self._state_lock = threading.Lock()
+        self._taps = {}
+        self._temperature = {"temp_f": None, "status": "No Sensor"}
+        self._dirty_event = threading.Event()
+
+        # Published snapshot (read under _snapshot_cond)
+        self._snapshot_cond = threading.Condition()
+        self._snapshot_version = 0
+        self._snapshot_bytes = b"{}"
+
+        self._sse_clients = 0
+        self._sse_lock = threading.Lock()
+
+        self._running = False
+        self._stop_event = threading.Event()
+        self._server = None
+        self._server_thread = None
+        self._publisher_thread = None
+
+    # --- PRODUCER SIDE (called from sensor / temperature threads) ---
+
+    def publish_tap(self, sensor_index, flow_rate_lpm, remaining_liters, status_string, last_pour_liters):
+        with self._state_lock:
+            self._taps[sensor_index] = (flow_rate_lpm, remaining_liters, status_string, last_pour_liters)
+        self._dirty_event.set()
+
+    def publish_temperature(self, temp_f, status_string):
+        with self._state_lock:
+            self._temperature = {"temp_f": temp_f, "status": status_string}
+        self._dirty_event.set()
+
+    # --- SNAPSHOT ---
+
+    def _build_snapshot(self):
+        with self._state_lock:
+            taps = dict(self._taps)
+            temperature = dict(self._temperature)
+
+        displayed_taps = self.settings_manager.get_displayed_taps()
+        labels = self.settings_manager.get_sensor_labels()
+        keg_assignments = self.settings_manager.get_sensor_keg_assignments()
+
+        tap_list = []
+        for i in range(min(displayed_taps, self.num_sensors)):
+            flow_rate_lpm, remaining_liters, status_string, last_pour_liters = taps.get(i, (0.0, None, "Acquiring", None))
+
+            keg_id = keg_assignments[i] if i < len(keg_assignments) else None
+            keg = self.settings_manager.get_keg_by_id(keg_id) if keg_id else None
+            starting_liters = keg.get('calculated_starting_volume_liters', 0.0) if keg else 0.0
+            # Against the keg's full volume, as the kegerator screen's progress bar
+            percent = self.settings_manager.get_keg_fill_percent(keg_id, remaining_liters) if keg_id else None
+
+            tap_list.append({
+                "tap": i + 1,
+                "name": labels[i] if i < len(labels) else f"Tap {i + 1}",
+                "keg": keg.get('title', '') if keg else '',
+                "status": status_string,
+                "flow_lpm": round(flow_rate_lpm or 0.0, 3),
+                "remaining_liters": None if remaining_liters is None else round(remaining_liters, 3),
+                "starting_liters": round(starting_liters, 3),
+                "percent": None if percent is None else round(percent, 1),
+                "last_pour_liters": None if last_pour_liters is None else round(last_pour_liters, 3),
+            })
+
+        return {
+            "display_units": self.settings_manager.get_display_units(),
+            "temperature": temperature,
+            "taps": tap_list,
+        }
+
+    def _publish_snapshot(self):
+        snapshot = self._build_snapshot()
+        payload = json.dumps(snapshot, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+        with self._snapshot_cond:
+            if payload == self._snapshot_bytes:
+                return # Nothing visible changed; don't wake clients
+            self._snapshot_bytes = payload
+            self._snapshot_version += 1
+            self._snapshot_cond.notify_all()
+
+    def get_snapshot(self):
+        """Returns (version, json_bytes) of the current cached snapshot."""
+        with self._snapshot_cond:
+            return self._snapshot_version, self._snapshot_bytes
+
+    def wait_for_snapshot(self, last_version, timeout):
+        """
+        Blocks until the snapshot version differs from last_version or timeout expires.
+        Returns (version, json_bytes), or (last_version, None) on timeout.
+        """
+        with self._snapshot_cond:
+            if self._snapshot_version == last_version:
+                self._snapshot_cond.wait(timeout)
+            if self._snapshot_version == last_version:
+                return last_version, None
+            return self._snapshot_version, self._snapshot_bytes
+
+    def _publisher_loop(self):
+        while self._running:
+            changed = self._dirty_event.wait(METADATA_REFRESH_SECONDS)
+            if not self._running:
+                break
+            self._dirty_event.clear()
+            try:
+                self._publish_snapshot()
+            except Exception as e:
+                print(f"WebDashboard: Error building snapshot: {e}")
+            if changed:
+                # Coalesce the rest of a burst into the next snapshot
+                self._stop_event.wait(PUBLISH_MIN_INTERVAL_SECONDS)
+        print("WebDashboard: Publisher loop ended.")
+
+    # --- SERVER LIFECYCLE ---
+
+    def start(self):
+        if self._running:
+            return
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), DashboardRequestHandler)
+        except OSError as e:
+            print(f"WebDashboard: Could not bind to port {self.port}: {e}")
+            self._server = None
+            return
+
+        self._server.daemon_threads = True
+        self._server.dashboard = self
+        self._running = True
+        self._stop_event.clear()
+
+        self._publish_snapshot()
+
+        self._publisher_thread = threading.Thread(target=self._publisher_loop, daemon=True)
+        self._publisher_thread.start()
+        self._server_thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.5}, daemon=True)
+        self._server_thread.start()
+        print(f"WebDashboard: Serving on http://{self.host}:{self.port}/")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._stop_event.set()
+        self._dirty_event.set()
+        with self._snapshot_cond:
+            self._snapshot_cond.notify_all() # Release SSE clients
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        print("WebDashboard: Stopped.")
+
+    def is_running(self):
+        return self._running
+
+    def _acquire_sse_slot(self):
+        with self._sse_lock:
+            if self._sse_clients >= MAX_SSE_CLIENTS:
+                return False
+            self._sse_clients += 1
+            return True
+
+    def _release_sse_slot(self):
+        with self._sse_lock:
+            self._sse_clients -= 1
+
+
+class DashboardRequestHandler(BaseHTTPRequestHandler):
+    server_version = "KegLevelDashboard/1.0"
+
+    def log_message(self, format, *args):
+        pass # Keep the console for app messages
+
+    def do_GET(self):
+        dashboard = self.server.dashboard
+        path = self.path.split("?", 1)[0]
+
+        if path in ("/", "/index.html"):
+            self._send_bytes(200, "text/html; charset=utf-8", DASHBOARD_HTML.encode("utf-8"), cache_seconds=300)
+        elif path == "/api/snapshot":
+            version, payload = dashboard.get_snapshot()
+            etag = f'"{version}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self._send_bytes(200, "application/json", payload, etag=etag)
+        elif path == "/events":
+            self._serve_events(dashboard)
+        else:
+            self._send_bytes(404, "text/plain; charset=utf-8", b"Not found")
+
+    def do_POST(self):
+        self._send_bytes(405, "text/plain; charset=utf-8", b"Read-only dashboard")
+
+    do_PUT = do_POST
+    do_DELETE = do_POST
+
+    def _send_bytes(self, code, content_type, payload, etag=None, cache_seconds=0):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Cache-Control", f"max-age={cache_seconds}" if cache_seconds else "no-cache")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _serve_events(self, dashboard):
+        if not dashboard._acquire_sse_slot():
+            self._send_bytes(503, "text/plain; charset=utf-8", b"Too many dashboard clients")
+            return
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "keep-alive")
+            self.end_headers()
+
+            version, payload = dashboard.get_snapshot()
+            self._write_event(version, payload)
+
+            while dashboard.is_running():
+                new_version, payload = dashboard.wait_for_snapshot(version, SSE_KEEPALIVE_SECONDS)
+                if payload is None:
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                version = new_version
+                self._write_event(version, payload)
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            pass # Client went away
+        finally:
+            dashboard._release_sse_slot()
+            self.close_connection = True
+
+    def _write_event(self, version, payload):
+        self.wfile.write(b"id: " + str(version).encode("ascii") + b"\nevent: snapshot\ndata: " + payload + b"\n\n")
+        self.wfile.flush()
+
+
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>KegLevel Monitor</title>
+<style>
+  body { font-family: sans-serif; background: #202124; color: #eee; margin: 0; padding: 12px; }
+  h1 { font-size: 1.3em; margin: 0 0 10px 0; display: flex; justify-content: space-between; }
+  #taps { display: grid; grid-template-columns: repeat(auto-fill, minmax(220px, 1fr)); gap: 12px; }
+  .tap { background: #303134; border-radius: 6px; padding: 10px; }
+  .name { font-weight: bold; font-size: 1.1em; }
+  .keg { color: #aaa; font-size: 0.85em; margin-bottom: 6px; }
+  .bar { background: #555; height: 18px; border-radius: 4px; overflow: hidden; margin: 6px 0; }
+  .fill { background: #2e7d32; height: 100%; }
+  .fill.low { background: #f9a825; }
+  .fill.empty { background: #c62828; }
+  .pouring .name { color: #66bb6a; }
+  .row { display: flex; justify-content: space-between; font-size: 0.9em; }
+  #conn { font-size: 0.6em; color: #888; }
+</style>
+</head>
+<body>
+<h1><span>KegLevel Monitor</span><span id="temp">--</span></h1>
+<div id="conn">connecting...</div>
+<div id="taps"></div>
+<script>
+function fmtVol(liters, units) {
+  if (liters === null) return "--";
+  return units === "imperial" ? (liters * 0.264172).toFixed(2) + " gal" : liters.toFixed(2) + " L";
+}
+function fmtPour(liters, units) {
+  if (!liters) return "--";
+  return units === "imperial" ? (liters / 0.0295735).toFixed(1) + " oz" : (liters * 1000).toFixed(0) + " ml";
+}
+function fmtFlow(lpm, units) {
+  return units === "imperial" ? (lpm / 0.0295735).toFixed(1) + " oz/min" : lpm.toFixed(2) + " L/min";
+}
+function esc(s) {
+  var d = document.createElement("div"); d.textContent = s; return d.innerHTML;
+}
+function render(s) {
+  var t = s.temperature;
+  var tempEl = document.getElementById("temp");
+  if (t.temp_f === null) { tempEl.textContent = t.status; }
+  else if (s.display_units === "imperial") { tempEl.textContent = t.temp_f.toFixed(1) + " \\u00B0F"; }
+  else { tempEl.textContent = ((t.temp_f - 32) * 5 / 9).toFixed(1) + " \\u00B0C"; }
+
+  var html = "";
+  s.taps.forEach(function (tap) {
+    var pct = tap.percent === null ? 0 : tap.percent;
+    var cls = pct <= 0 ? "empty" : (pct < 20 ? "low" : "");
+    html += '<div class="tap' + (tap.status === "Pouring" ? " pouring" : "") + '">' +
+      '<div class="name">' + tap.tap + ". " + esc(tap.name) + "</div>" +
+      '<div class="keg">' + esc(tap.keg) + "</div>" +
+      '<div class="bar"><div class="fill ' + cls + '" style="width:' + pct + '%"></div></div>' +
+      '<div class="row"><span>Remaining</span><span>' + fmtVol(tap.remaining_liters, s.display_units) + "</span></div>" +
+      '<div class="row"><span>' + (tap.status === "Pouring" ? "Flowing" : "Flow rate") + "</span><span>" + fmtFlow(tap.flow_lpm, s.display_units) + "</span></div>" +
+      '<div class="row"><span>Last pour</span><span>' + fmtPour(tap.last_pour_liters, s.display_units) + "</span></div>" +
+      "</div>";
+  });
+  document.getElementById("taps").innerHTML = html;
+}
+function connect() {
+  if (!window.EventSource) {
+    // Very old browsers: fall back to polling the cached snapshot
+    setInterval(function () {
+      fetch("/api/snapshot").then(function (r) { return r.json(); }).then(render);
+    }, 5000);
+    return;
+  }
+  var es = new EventSource("/events");
+  es.addEventListener("snapshot", function (e) {
+    document.getElementById("conn").textContent = "live";
+    render(JSON.parse(e.data));
+  });
+  es.onerror = function () { document.getElementById("conn").textContent = "reconnecting..."; };
+}
+connect();
+</script>
+</body>
+</html>
+"""